@@ -0,0 +1,72 @@
+"""
+Measures the events per second that pass from a sending actor through its consumer greenlets to 1, 4 and 16 receiving
+actors, which is the full Actor send_event -> Queue -> consume path, with deepcopied and with copy-on-write fan-out
+"""
+
+import gevent
+from time import time
+from compysition.actor import Actor
+from compysition.event import XMLEvent
+from compysition.queue import Queue
+from util import receive, report
+
+FANOUTS = (1, 4, 16)
+EVENTS = 5000
+TIMEOUT = 600       # The max seconds for all events of a run to reach every outbox
+XML = "<root>{0}</root>".format("".join("<item id='{0}'><value>{0}</value></item>".format(i) for i in range(20)))
+
+
+class _Forwarder(Actor):
+
+    input = XMLEvent
+    output = XMLEvent
+
+    def consume(self, event, *args, **kwargs):
+        self.send_event(event)
+
+
+def _run(fanout, copy_on_write):
+    sender = _Forwarder("sender", copy_on_write=copy_on_write)
+    inbox = Queue("inbox")
+    sender.register_consumer("inbox", inbox)
+    receivers, outboxes = [], []
+    for i in range(fanout):
+        receiver = _Forwarder("receiver_{0}".format(i), copy_on_write=copy_on_write)
+        queue = sender.pool.outbound.add("outbox_{0}".format(i))
+        receiver.register_consumer("inbox", queue)
+        outboxes.append(receiver.pool.outbound.add("outbox"))
+        receivers.append(receiver)
+
+    for actor in [sender] + receivers:
+        actor.start()
+
+    events = [XMLEvent(data=XML) for i in xrange(EVENTS)]
+    start = time()
+    for event in events:
+        inbox.put(event)
+    deadline = start + TIMEOUT
+    for outbox in outboxes:
+        receive(outbox, EVENTS, deadline)
+    seconds = time() - start
+
+    for actor in [sender] + receivers:
+        actor.stop()
+    gevent.sleep(0)
+    return seconds
+
+
+def run():
+    results = []
+    for fanout in FANOUTS:
+        for copy_on_write in (False, True):
+            seconds = _run(fanout, copy_on_write)
+            results.append({"name": "send_consume_fanout_{0}{1}".format(fanout, "_cow" if copy_on_write else ""),
+                            "seconds": seconds,
+                            "events_per_second": int(EVENTS / seconds),
+                            "fanout": fanout,
+                            "copy_on_write": copy_on_write})
+    return results
+
+
+if __name__ == "__main__":
+    report(run())
@@ -0,0 +1,33 @@
+"""
+Compares the encode and decode cost of the pickle and binary event codecs for small and large XML and JSON events
+"""
+
+from compysition.event import XMLEvent, JSONEvent, PickleEventCodec, BinaryEventCodec
+from util import measure, report
+
+CODECS = (("pickle", PickleEventCodec()), ("binary", BinaryEventCodec()))
+
+
+def _events():
+    large_xml = "<root>{0}</root>".format("".join("<item id='{0}'><value>{0}</value></item>".format(i) for i in range(20000)))
+    return (("small_xml", XMLEvent(data="<foo><bar>baz</bar></foo>")),
+            ("large_xml", XMLEvent(data=large_xml)),
+            ("small_json", JSONEvent(data={"foo": {"bar": "baz"}})))
+
+
+def run():
+    results = []
+    for event_name, event in _events():
+        for codec_name, codec in CODECS:
+            number = 3 if event_name.startswith("large") else 1000
+            frames = codec.encode(event)
+            results.append({"name": "encode_{0}_{1}".format(event_name, codec_name),
+                            "seconds": measure(lambda: codec.encode(event), number=number),
+                            "bytes": sum(len(frame) for frame in frames)})
+            results.append({"name": "decode_{0}_{1}".format(event_name, codec_name),
+                            "seconds": measure(lambda: codec.decode(frames), number=number)})
+    return results
+
+
+if __name__ == "__main__":
+    report(run())
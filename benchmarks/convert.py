@@ -0,0 +1,28 @@
+"""
+Measures Event.convert between event classes of the same and of different data formats, the way Actor input conversion
+calls it for every consumed event
+"""
+
+from compysition.event import XMLEvent, JSONEvent, XMLHttpEvent, JSONHttpEvent
+from util import measure, report
+
+
+def _conversions():
+    xml = "<root>{0}</root>".format("".join("<item id='{0}'><value>{0}</value></item>".format(i) for i in range(20)))
+    json_data = {"root": {"item": [{"@id": str(i), "value": str(i)} for i in range(20)]}}
+    return (("xml_to_xmlhttp", XMLEvent(data=xml), XMLHttpEvent),
+            ("json_to_jsonhttp", JSONEvent(data=json_data), JSONHttpEvent),
+            ("xml_to_json", XMLEvent(data=xml), JSONEvent),
+            ("json_to_xml", JSONEvent(data=json_data), XMLEvent))
+
+
+def run():
+    results = []
+    for name, event, convert_to in _conversions():
+        results.append({"name": "convert_{0}".format(name),
+                        "seconds": measure(lambda: event.convert(convert_to), number=2000)})
+    return results
+
+
+if __name__ == "__main__":
+    report(run())
@@ -0,0 +1,34 @@
+"""
+Measures the cost of creating events, including the lazily generated event_id, and of copying them the way Actor fan-out
+does, with deepcopy and with copy-on-write copies
+"""
+
+from copy import deepcopy
+from compysition.event import Event, XMLEvent, JSONEvent, UnparsedData
+from util import measure, report
+
+NUMBER = 20000
+XML = "<root>{0}</root>".format("".join("<item id='{0}'><value>{0}</value></item>".format(i) for i in range(20)))
+JSON = {"root": {"item": [{"@id": str(i), "value": str(i)} for i in range(20)]}}
+
+
+def run():
+    results = []
+    creations = (("event", lambda: Event(data="foo")),
+                 ("event_with_id", lambda: Event(data="foo").event_id),
+                 ("xml_event", lambda: XMLEvent(data=XML)),
+                 ("xml_event_unparsed", lambda: XMLEvent(data=UnparsedData(XML))),
+                 ("json_event", lambda: JSONEvent(data=JSON)))
+    for name, create in creations:
+        seconds = measure(create, number=NUMBER)
+        results.append({"name": "create_{0}".format(name), "seconds": seconds, "events_per_second": int(1 / seconds)})
+
+    for name, event in (("xml_event", XMLEvent(data=XML)), ("json_event", JSONEvent(data=JSON))):
+        results.append({"name": "deepcopy_{0}".format(name), "seconds": measure(lambda: deepcopy(event), number=NUMBER / 10)})
+        results.append({"name": "shared_copy_{0}".format(name), "seconds": measure(event.shared_copy, number=NUMBER / 10)})
+
+    return results
+
+
+if __name__ == "__main__":
+    report(run())
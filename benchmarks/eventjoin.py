@@ -0,0 +1,49 @@
+"""
+Measures the events per second an EventJoin joins when every event arrives on 2 and on 8 inbound queues
+"""
+
+from time import time
+from compysition.actors import EventJoin
+from compysition.event import Event
+from compysition.queue import Queue
+from util import receive, report
+
+INBOXES = (2, 8)
+EVENTS = 5000
+TIMEOUT = 600       # The max seconds for all events of a run to arrive
+
+
+def _join(inboxes):
+    actor = EventJoin("eventjoin")
+    queues = [Queue("inbox_{0}".format(i)) for i in range(inboxes)]
+    for queue in queues:
+        actor.register_consumer(queue.name, queue)
+    outbox = actor.pool.outbound.add("outbox")
+    actor.start()
+
+    events = [Event(data="event {0}".format(i)) for i in xrange(EVENTS)]
+    for event in events:
+        event.event_id      # Generated lazily, so it has to exist before the event is cloned for each inbox
+    start = time()
+    for event in events:
+        for queue in queues:
+            queue.put(event.clone())
+    receive(outbox, EVENTS, start + TIMEOUT)
+    seconds = time() - start
+
+    actor.stop()
+    return seconds
+
+
+def run():
+    results = []
+    for inboxes in INBOXES:
+        seconds = _join(inboxes)
+        results.append({"name": "eventjoin_{0}_inboxes".format(inboxes),
+                        "seconds": seconds,
+                        "events_per_second": int(EVENTS / seconds)})
+    return results
+
+
+if __name__ == "__main__":
+    report(run())
@@ -0,0 +1,60 @@
+"""
+Compares Actor.send_event fan-out cost with deepcopied events against copy-on-write events (Actor(copy_on_write=True))
+for an outbox fan-out of 1, 4 and 16 queues
+"""
+
+from compysition.actor import Actor
+from compysition.event import XMLEvent
+from util import measure, report
+
+FANOUTS = (1, 4, 16)
+ELEMENTS = 20000        # Roughly a 1MB XML payload
+
+
+class _Sender(Actor):
+
+    output = XMLEvent
+
+    def consume(self, event, *args, **kwargs):
+        pass
+
+
+def _build_event():
+    items = "".join("<item id='{0}'><value>{0}</value></item>".format(i) for i in range(ELEMENTS))
+    return XMLEvent(data="<root>{0}</root>".format(items))
+
+
+def _build_sender(fanout, copy_on_write):
+    sender = _Sender("sender", copy_on_write=copy_on_write)
+    sender.start()
+    for i in range(fanout):
+        sender.pool.outbound.add("outbox_{0}".format(i))
+    return sender
+
+
+def _send_and_drain(sender, event, touch_data):
+    sender.send_event(event)
+    for queue in sender.pool.outbound.values():
+        received = queue.get()
+        if touch_data:
+            received.data
+
+
+def run():
+    event = _build_event()
+    results = []
+    for fanout in FANOUTS:
+        for copy_on_write in (False, True):
+            for touch_data in (False, True):
+                sender = _build_sender(fanout, copy_on_write)
+                seconds = measure(lambda: _send_and_drain(sender, event, touch_data), number=3)
+                results.append({"name": "fanout_{0}{1}{2}".format(fanout, "_cow" if copy_on_write else "", "_touched" if touch_data else ""),
+                                "seconds": seconds,
+                                "fanout": fanout,
+                                "copy_on_write": copy_on_write,
+                                "data_accessed": touch_data})
+    return results
+
+
+if __name__ == "__main__":
+    report(run())
@@ -0,0 +1,59 @@
+"""
+Measures the lines per second a FileLogger writes when every log event goes through the python logging handler, when a
+batch of log events is written as a single record (batch_size), and when lines are buffered and written per 1000 lines
+(buffered)
+"""
+
+import logging
+import shutil
+import tempfile
+from time import time
+from compysition.actors import FileLogger
+from compysition.event import LogEvent
+from util import report
+
+LINES = 100000
+BATCH_SIZE = 100
+
+
+def _write(events, write, **actor_kwargs):
+    directory = tempfile.mkdtemp()
+    try:
+        actor = FileLogger("filelogger", directory=directory, **actor_kwargs)
+        start = time()
+        write(actor, events)
+        actor.post_hook()
+        return time() - start
+    finally:
+        shutil.rmtree(directory)
+
+
+def _per_event(actor, events):
+    for event in events:
+        actor.consume(event)
+
+
+def _per_batch(actor, events):
+    for i in xrange(0, len(events), BATCH_SIZE):
+        actor.consume_batch(events[i:i + BATCH_SIZE])
+
+
+def run():
+    events = [LogEvent(logging.INFO, "actor", "Received event {0}".format(i), id=str(i)) for i in xrange(LINES)]
+    cases = [("handler_per_event", _per_event, {}),
+             ("handler_per_batch_{0}".format(BATCH_SIZE), _per_batch, {}),
+             ("buffered_per_event", _per_event, {"buffered": True}),
+             ("buffered_per_batch_{0}".format(BATCH_SIZE), _per_batch, {"buffered": True})]
+
+    results = []
+    for name, write, actor_kwargs in cases:
+        seconds = _write(events, write, **actor_kwargs)
+        results.append({"name": "filelogger_{0}_{1}".format(name, LINES),
+                        "seconds": seconds,
+                        "lines_per_second": int(LINES / seconds)})
+
+    return results
+
+
+if __name__ == "__main__":
+    report(run())
@@ -0,0 +1,108 @@
+"""
+Measures requests per second and the p50/p99 latency of an HTTPServer that echoes every request, with CLIENTS concurrent
+keep-alive clients. Compares the AsyncResult responder with the former response path, which returned a gevent Queue per
+request that Bottle iterated for an HTTPResponse followed by StopIteration
+"""
+
+import socket
+import gevent
+import gevent.socket
+from gevent.queue import Queue as GQueue
+from bottle import Bottle, HTTPResponse, request
+from time import time
+from compysition.actors import HTTPServer
+from compysition.queue import Queue
+from util import report
+
+CLIENTS = 50
+REQUESTS_PER_CLIENT = 200
+REQUEST = "POST /echo HTTP/1.1\r\nHost: localhost\r\nContent-Type: text/plain\r\nContent-Length: 5\r\n\r\nhello"
+
+
+class _QueueResponseHTTPServer(HTTPServer):
+
+    def __call__(self, environ, start_response):
+        environ['PATH_INFO'] = environ['PATH_INFO'].rstrip('/')
+        return Bottle.__call__(self, environ, start_response)
+
+    def callback(self, *args, **kwargs):
+        environ = request.environ
+        HTTPServer.callback(self, *args, **kwargs)
+        request_event, result = environ.pop(self.RESPONDER_KEY)
+        response_queue = GQueue()
+        result.rawlink(lambda result: self._queue_response(response_queue, result.get()))
+        return response_queue
+
+    def _queue_response(self, response_queue, event):
+        local_response = HTTPResponse()
+        local_response.status = "{0} {1}".format(*event.status)
+        for header in event.headers.keys():
+            local_response.set_header(header, event.headers[header])
+        local_response.set_header("Content-Type", event.content_type)
+        local_response.body = self.format_response_data(event)
+        response_queue.put(local_response)
+        response_queue.put(StopIteration)
+
+
+def _free_port():
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+def _read_response(connection, buffer):
+    while "\r\n\r\n" not in buffer:
+        buffer += connection.recv(65536)
+    head, buffer = buffer.split("\r\n\r\n", 1)
+    length = int([line.split(":", 1)[1] for line in head.split("\r\n") if line.lower().startswith("content-length")][0])
+    while len(buffer) < length:
+        buffer += connection.recv(65536)
+    return buffer[length:]
+
+
+def _client(port, latencies):
+    connection = gevent.socket.create_connection(("127.0.0.1", port))
+    buffer = ""
+    for i in xrange(REQUESTS_PER_CLIENT):
+        start = time()
+        connection.sendall(REQUEST)
+        buffer = _read_response(connection, buffer)
+        latencies.append(time() - start)
+    connection.close()
+
+
+def _load(server_class):
+    port = _free_port()
+    server = server_class("http", address="127.0.0.1", port=port)
+    echo = Queue("echo")
+    server.pool.outbound.add("echo", queue=echo)
+    server.register_consumer("inbox", echo)
+    server.start()
+
+    latencies = []
+    start = time()
+    gevent.joinall([gevent.spawn(_client, port, latencies) for i in xrange(CLIENTS)], raise_error=True)
+    seconds = time() - start
+    server.stop()
+
+    latencies.sort()
+    return {"seconds": seconds,
+            "requests_per_second": int(len(latencies) / seconds),
+            "p50_ms": round(latencies[len(latencies) / 2] * 1000, 2),
+            "p99_ms": round(latencies[int(len(latencies) * 0.99)] * 1000, 2)}
+
+
+def run():
+    results = []
+    for name, server_class in [("queue_response", _QueueResponseHTTPServer), ("async_result", HTTPServer)]:
+        result = _load(server_class)
+        result["name"] = "http_{0}_{1}_clients".format(name, CLIENTS)
+        results.append(result)
+
+    return results
+
+
+if __name__ == "__main__":
+    report(run())
@@ -0,0 +1,60 @@
+"""
+Measures how long the gevent hub is blocked while an XSLT actor transforms a large document, with the transform run on
+the hub and offloaded to the actor threadpool (Actor(threadpool_size=N)). The longest stall is the worst case latency
+added to every other greenlet, such as HTTPServer requests for other routes
+"""
+
+import gevent
+from time import time
+from compysition.actors import XSLT
+from compysition.event import XMLEvent, UnparsedData
+from util import report
+
+ELEMENTS = 50000
+TRANSFORMS = 5
+XSLT_TEMPLATE = """
+<xsl:stylesheet version="1.0" xmlns:xsl="http://www.w3.org/1999/XSL/Transform">
+    <xsl:template match="@*|node()">
+        <xsl:copy><xsl:apply-templates select="@*|node()"/></xsl:copy>
+    </xsl:template>
+    <xsl:template match="value"><copied><xsl:value-of select="."/></copied></xsl:template>
+</xsl:stylesheet>
+"""
+
+
+def _ticker(stalls, done):
+    last = time()
+    while not done:
+        gevent.sleep(0.001)
+        now = time()
+        stalls.append(now - last)
+        last = now
+
+
+def _run(threadpool_size):
+    actor = XSLT("xslt", xslt=XSLT_TEMPLATE, threadpool_size=threadpool_size)
+    data = "<root>{0}</root>".format("".join("<item id='{0}'><value>{0}</value></item>".format(i) for i in range(ELEMENTS)))
+    stalls, done = [], []
+    ticker = gevent.spawn(_ticker, stalls, done)
+    gevent.sleep(0.01)
+
+    start = time()
+    events = [XMLEvent(data=UnparsedData(data)) for i in range(TRANSFORMS)]
+    workers = [gevent.spawn(actor.offload, actor.transform_event, event, event.detached_data()) for event in events]
+    gevent.joinall(workers, raise_error=True)
+    seconds = time() - start
+
+    done.append(True)
+    ticker.join()
+    actor.stop()
+    return {"name": "xslt_threadpool_{0}".format(threadpool_size),
+            "seconds": seconds,
+            "max_hub_stall_ms": round(max(stalls) * 1000, 1)}
+
+
+def run():
+    return [_run(threadpool_size) for threadpool_size in (0, 1, 4)]
+
+
+if __name__ == "__main__":
+    report(run())
@@ -0,0 +1,64 @@
+"""
+Measures compysition.queue.Queue put/get throughput against gevent.queue.Queue, as well as the CPU time used by 500 idle
+actors that have each consumed an event
+"""
+
+import resource
+import gevent
+import gevent.queue
+from compysition.actor import Actor
+from compysition.event import Event
+from compysition.queue import Queue
+from util import measure, report
+
+ITEMS = 100000
+IDLE_ACTORS = 500
+IDLE_SECONDS = 2
+
+
+class _Idle(Actor):
+
+    def consume(self, event, *args, **kwargs):
+        pass
+
+
+def _put_get(queue):
+    for i in xrange(ITEMS):
+        queue.put(i)
+    for i in xrange(ITEMS):
+        queue.get()
+
+
+def _cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _idle_cpu():
+    actors = []
+    for i in range(IDLE_ACTORS):
+        actor = _Idle("idle_{0}".format(i))
+        queue = Queue("inbox")
+        actor.register_consumer("inbox", queue)
+        actor.start()
+        queue.put(Event())
+        actors.append(actor)
+
+    gevent.sleep(0.5)
+    start = _cpu_seconds()
+    gevent.sleep(IDLE_SECONDS)
+    return _cpu_seconds() - start
+
+
+def run():
+    results = []
+    for name, queue in (("put_get_compysition", Queue("benchmark")), ("put_get_gevent", gevent.queue.Queue())):
+        seconds = measure(lambda: _put_get(queue))
+        results.append({"name": name, "seconds": seconds, "ops_per_second": int(ITEMS * 2 / seconds)})
+
+    results.append({"name": "idle_cpu_{0}_actors".format(IDLE_ACTORS), "seconds": _idle_cpu(), "wall_seconds": IDLE_SECONDS})
+    return results
+
+
+if __name__ == "__main__":
+    report(run())
@@ -0,0 +1,62 @@
+"""
+Routes XML events through an EventRouter with 20 EventXMLFilter filters, each matching an xpath lookup against a different
+value, the way content based routing of a larger topology looks up every event once per filter. Also routes events on
+their service through 200 plain EventFilters, the way a SimpleRouter in front of many queues does
+"""
+
+from compysition.actors import EventRouter, EventXMLFilter, EventFilter
+from compysition.event import Event, XMLEvent
+from time import time
+
+FILTERS = 20
+SERVICE_FILTERS = 200
+EVENTS = 100000
+
+
+def _build_router(filters):
+    router = EventRouter("router", routing_filters=filters)
+    for i in range(len(filters)):
+        router.pool.outbound.add("outbox_{0}".format(i))
+    router.start()
+    return router
+
+
+def _build_events():
+    return [XMLEvent(data="<order><id>{0}</id><type>type_{1}</type></order>".format(i, i % FILTERS)) for i in range(EVENTS)]
+
+
+def _route(router, events):
+    queues = router.pool.outbound.values()
+
+    start = time()
+    for event in events:
+        router.consume(event)
+        for queue in queues:
+            while queue.qsize():
+                queue.get()
+    return time() - start
+
+
+def run():
+    results = []
+
+    router = _build_router([EventXMLFilter(xpath="/order/type", value_regexes="^type_{0}$".format(i), outbox_names="outbox_{0}".format(i))
+                            for i in range(FILTERS)])
+    seconds = _route(router, _build_events())
+    results.append({"name": "route_{0}_events_{1}_xml_filters".format(EVENTS, FILTERS),
+                    "seconds": seconds,
+                    "events_per_second": int(EVENTS / seconds)})
+
+    router = _build_router([EventFilter(value_regexes="service_{0}".format(i), outbox_names="outbox_{0}".format(i), event_scope="service")
+                            for i in range(SERVICE_FILTERS)])
+    seconds = _route(router, [Event(service="service_{0}".format(i % SERVICE_FILTERS)) for i in range(EVENTS)])
+    results.append({"name": "route_{0}_events_{1}_service_filters".format(EVENTS, SERVICE_FILTERS),
+                    "seconds": seconds,
+                    "events_per_second": int(EVENTS / seconds)})
+
+    return results
+
+
+if __name__ == "__main__":
+    from util import report
+    report(run())
@@ -0,0 +1,90 @@
+"""
+Runs the benchmark modules and writes their results as JSON, so that results of different compysition versions can be
+compared, e.g.:
+    PYTHONPATH=. python benchmarks/run.py --output baseline.json
+    PYTHONPATH=. python benchmarks/run.py --output current.json --compare baseline.json
+    PYTHONPATH=. python benchmarks/run.py queues router
+
+A benchmark module whose dependencies are not installed (e.g. smtp without gsmtpd) is skipped, and the skip is recorded
+in the output. Comparisons print current seconds / baseline seconds for every result both runs share, so a ratio above
+1 is a slowdown
+"""
+
+import argparse
+import importlib
+import json
+import platform
+import sys
+import traceback
+from datetime import datetime
+
+from util import report
+
+BENCHMARKS = ("queues", "event", "convert", "codec", "fanout", "actors", "router", "eventjoin", "offload", "filelogger",
+              "httpserver", "tcp", "zeromq", "smtp")
+
+
+def run_benchmarks(names):
+    results = {}
+    for name in names:
+        try:
+            module = importlib.import_module(name)
+        except ImportError as err:
+            results[name] = {"skipped": "Unable to import: {0}".format(err)}
+            continue
+
+        try:
+            results[name] = {"results": module.run()}
+        except Exception:
+            results[name] = {"error": traceback.format_exc()}
+
+    return results
+
+
+def compare(current, baseline):
+    """Returns a list of result dicts with the seconds of every result in <current> relative to the same result in <baseline>"""
+    comparison = []
+    for module, outcome in sorted(current["benchmarks"].items()):
+        baseline_results = {result["name"]: result for result in baseline["benchmarks"].get(module, {}).get("results", [])}
+        for result in outcome.get("results", []):
+            baseline_result = baseline_results.get(result["name"], None)
+            if baseline_result and baseline_result["seconds"]:
+                comparison.append({"name": "{0}.{1}".format(module, result["name"]),
+                                   "seconds": result["seconds"],
+                                   "baseline_seconds": baseline_result["seconds"],
+                                   "ratio": round(result["seconds"] / baseline_result["seconds"], 3)})
+    return comparison
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Runs the compysition benchmarks")
+    parser.add_argument("benchmarks", nargs="*", default=BENCHMARKS, help="The benchmark modules to run. Default: all")
+    parser.add_argument("--output", help="The file to write the JSON results to. Default: stdout")
+    parser.add_argument("--compare", help="A JSON results file of an earlier run to compare the results to")
+    args = parser.parse_args(argv)
+
+    import compysition
+    current = {"compysition_version": getattr(compysition, "__version__", None),
+               "python_version": platform.python_version(),
+               "platform": platform.platform(),
+               "created": datetime.utcnow().isoformat(),
+               "benchmarks": run_benchmarks(args.benchmarks)}
+
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(current, output, indent=2, sort_keys=True)
+    else:
+        json.dump(current, sys.stdout, indent=2, sort_keys=True)
+        sys.stdout.write("\n")
+
+    for name, outcome in sorted(current["benchmarks"].items()):
+        if "results" not in outcome:
+            sys.stderr.write("{0}: {1}\n".format(name, outcome.get("skipped", None) or outcome["error"]))
+
+    if args.compare:
+        with open(args.compare) as baseline:
+            report(compare(current, json.load(baseline)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Measures the messages per second sent to a local gsmtpd server with a new SMTP session per message (the former SMTPOut
+behaviour), with a pooled session, and with batches of messages sent per session. As a session per message is
+dominated by the session setup and teardown, that case sends fewer messages
+"""
+
+import gsmtpd.server
+from compysition.actors.util import SMTPConnectionPool
+from util import measure, report
+
+MESSAGES = 2000
+SESSION_PER_MESSAGE_MESSAGES = 200
+BATCH_SIZE = 100
+MESSAGE = "From: from@test.com\r\nTo: to@test.com\r\nSubject: Benchmark\r\n\r\nbody"
+
+
+class _Server(gsmtpd.server.SMTPServer):
+
+    def process_message(self, peer, mailfrom, rcpttos, data):
+        pass
+
+
+def _send(pool, messages):
+    for i in xrange(messages):
+        pool.sendmail("from@test.com", ["to@test.com"], MESSAGE)
+    pool.close()
+
+
+def _send_batches(pool, messages):
+    for i in xrange(0, messages, BATCH_SIZE):
+        pool.sendmany([("from@test.com", ["to@test.com"], MESSAGE)] * BATCH_SIZE)
+    pool.close()
+
+
+def run():
+    server = _Server(("127.0.0.1", 0))
+    server.start()
+    host = ("127.0.0.1", server.server_port)
+    cases = [("session_per_message", _send, SESSION_PER_MESSAGE_MESSAGES, {"max_messages": 1}),
+             ("pooled_session", _send, MESSAGES, {"max_messages": None}),
+             ("batch_{0}_per_session".format(BATCH_SIZE), _send_batches, MESSAGES, {"max_messages": None})]
+
+    results = []
+    try:
+        for name, send, messages, pool_kwargs in cases:
+            seconds = measure(lambda: send(SMTPConnectionPool(host, **pool_kwargs), messages), repeat=1)
+            results.append({"name": "smtp_{0}_{1}".format(name, messages),
+                            "seconds": seconds,
+                            "messages_per_second": int(messages / seconds)})
+    finally:
+        server.stop()
+
+    return results
+
+
+if __name__ == "__main__":
+    report(run())
@@ -0,0 +1,92 @@
+"""
+Measures the events per second sent from a TCPOut over localhost, sending every event with its own write and sending
+batches of events with a single write. The events are sent both to a plain socket that discards them, which measures the
+sending end only, and to a TCPIn that decodes every event and puts it on its outbox
+"""
+
+import socket
+from time import time
+from gevent.server import StreamServer
+from compysition.actors import TCPIn, TCPOut
+from compysition.event import Event
+from compysition.queue import Queue
+from util import report
+
+EVENTS = 50000
+BATCH_SIZE = 100
+
+
+def _free_port():
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+def _per_event(sender, events):
+    for event in events:
+        sender.consume(event)
+
+
+def _per_batch(sender, events):
+    for i in xrange(0, len(events), BATCH_SIZE):
+        sender.consume_batch(events[i:i + BATCH_SIZE])
+
+
+def _discard(connection, address):
+    while connection.recv(65536):
+        pass
+
+
+def _send_only(send, events):
+    port = _free_port()
+    server = StreamServer(("127.0.0.1", port), _discard)
+    server.start()
+    sender = TCPOut("tcpout", host="127.0.0.1", port=port)
+    sender.start()
+
+    start = time()
+    send(sender, events)
+    seconds = time() - start
+
+    sender.stop()
+    server.stop()
+    return seconds
+
+
+def _transport(send, events):
+    port = _free_port()
+    receiver = TCPIn("tcpin", host="127.0.0.1", port=port)
+    outbox = Queue("outbox")
+    receiver.pool.outbound.add("outbox", queue=outbox)
+    receiver.start()
+    sender = TCPOut("tcpout", host="127.0.0.1", port=port)
+    sender.start()
+
+    start = time()
+    send(sender, events)
+    for i in xrange(len(events)):
+        outbox.get(block=True, timeout=10)
+    seconds = time() - start
+
+    sender.stop()
+    receiver.stop()
+    return seconds
+
+
+def run():
+    events = [Event(data="event {0}".format(i)) for i in xrange(EVENTS)]
+    results = []
+    for transport_name, transport in [("send", _send_only), ("send_receive", _transport)]:
+        for name, send in [("per_event", _per_event), ("batch_{0}".format(BATCH_SIZE), _per_batch)]:
+            seconds = transport(send, events)
+            results.append({"name": "tcp_{0}_{1}_{2}".format(transport_name, name, EVENTS),
+                            "seconds": seconds,
+                            "events_per_second": int(EVENTS / seconds)})
+
+    return results
+
+
+if __name__ == "__main__":
+    report(run())
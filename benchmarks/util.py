@@ -0,0 +1,33 @@
+"""
+Shared helpers for the compysition benchmarks.
+
+Benchmarks are plain scripts that are run from the repository root against an installed (or PYTHONPATH exported) compysition, e.g.:
+    PYTHONPATH=. python benchmarks/fanout.py
+
+benchmarks/run.py runs all of them and writes the results as JSON for comparisons between versions
+"""
+
+import timeit
+from time import time
+
+
+def measure(function, number=1, repeat=3):
+    """Returns the best average time in seconds of a single call to 'function' over 'repeat' rounds of 'number' calls"""
+    return min(timeit.repeat(function, number=number, repeat=repeat)) / number
+
+
+def report(results):
+    """Prints a list of result dicts ({"name": str, "seconds": float, ...}) as an aligned table"""
+    width = max([len(result["name"]) for result in results] + [0])
+    for result in results:
+        extra = ", ".join("{0}={1}".format(key, value) for key, value in sorted(result.items()) if key not in ("name", "seconds"))
+        print("{name}  {seconds:>12.6f} s  {extra}".format(name=result["name"].ljust(width), seconds=result["seconds"], extra=extra))
+
+
+def receive(queue, number, deadline):
+    """
+    Gets 'number' events from the compysition 'queue', which must all arrive before the time() 'deadline'. Events may arrive
+    in bursts with long gaps at high fan-outs, so a run is bounded as a whole rather than per event
+    """
+    for i in xrange(number):
+        queue.get(block=True, timeout=max(deadline - time(), 0))
@@ -0,0 +1,57 @@
+"""
+Measures the events per second sent from a ZMQPush to a ZMQPull actor over the inproc and ipc transports
+"""
+
+import os
+import tempfile
+from time import time
+from compysition.actors import ZMQPush, ZMQPull
+from compysition.event import XMLEvent
+from compysition.queue import Queue
+from util import receive, report
+
+EVENTS = 20000
+TIMEOUT = 600       # The max seconds for all events of a run to arrive
+XML = "<root>{0}</root>".format("".join("<item id='{0}'><value>{0}</value></item>".format(i) for i in range(20)))
+
+
+def _transport(transmission_protocol, socket_file):
+    # The pulling end binds, and an inproc socket must be bound before it is connected to
+    pull = ZMQPull("pull", transmission_protocol=transmission_protocol, socket_file=socket_file)
+    push = ZMQPush("push", transmission_protocol=transmission_protocol, socket_file=socket_file)
+    outbox = Queue("outbox")
+    pull.pool.outbound.add("outbox", queue=outbox)
+    pull.start()
+    push.start()
+
+    events = [XMLEvent(data=XML) for i in xrange(EVENTS)]
+    start = time()
+    for event in events:
+        push.consume(event)
+    receive(outbox, EVENTS, start + TIMEOUT)
+    seconds = time() - start
+
+    push.stop()
+    pull.stop()
+    return seconds
+
+
+def run():
+    directory = tempfile.mkdtemp()
+    results = []
+    try:
+        for name, socket_file in (("inproc", "compysition-benchmark"), ("ipc", os.path.join(directory, "benchmark.ipc"))):
+            seconds = _transport(name, socket_file)
+            results.append({"name": "zmq_push_pull_{0}_{1}".format(name, EVENTS),
+                            "seconds": seconds,
+                            "events_per_second": int(EVENTS / seconds)})
+    finally:
+        for name in os.listdir(directory):
+            os.remove(os.path.join(directory, name))
+        os.rmdir(directory)
+
+    return results
+
+
+if __name__ == "__main__":
+    report(run())
@@ -24,14 +24,19 @@
 
 from compysition.queue import QueuePool
 from compysition.logger import Logger
+from compysition.metrics import ActorMetrics
 from compysition.errors import *
 from restartlet import RestartPool
 from compysition.event import Event, LogEvent
 from gevent import sleep
 from gevent.event import Event as GEvent
 from gevent.local import local
+from gevent.pool import Pool
+from gevent.threadpool import ThreadPool
 from copy import deepcopy
+from time import time
 import traceback
+import logging
 import functools
 import abc
 
@@ -51,7 +56,7 @@ class Actor(object):
     REQUIRED_EVENT_ATTRIBUTES = None
     __NOT_DEFINED = object()
 
-    def __init__(self, name, size=0, blocking_consume=False, rescue=False, max_rescue=5, *args, **kwargs):
+    def __init__(self, name, size=0, blocking_consume=False, rescue=False, max_rescue=5, copy_on_write=False, batch_size=1, batch_linger_ms=0, max_concurrency=None, threadpool_size=0, log_level=logging.NOTSET, tracer=None, *args, **kwargs):
         """
         **Base class for all compysition actors**
 
@@ -67,13 +72,46 @@ class Actor(object):
                 | it should execute 'consume' and block until that 'consume' is complete. This is usually
                 | only necessary if executing work on an event in the order that it was received is critical.
                 | (Default: False)
+            copy_on_write (Optional[bool]):
+                | Define if events sent by this actor should be copy-on-write copies (See Event.shared_copy) instead of deepcopies.
+                | Each receiving actor shares the original event data, and only receives a private copy of it once it accesses 'data'.
+                | This greatly reduces the cost of sending large events to actors that never inspect the event data
+                | (Default: False)
+            batch_size (Optional[int]):
+                | The max amount of events to hand to 'consume_batch' in a single call. Only used if the actor implements
+                | 'consume_batch(events)'. A value of 1 disables batching and every event is passed to 'consume'
+                | (Default: 1)
+            batch_linger_ms (Optional[int]):
+                | The amount of milliseconds to wait for a batch to fill up to 'batch_size' after the first event of the batch
+                | was received. A value of 0 hands over whatever events are waiting on the queue at that moment
+                | (Default: 0)
+            max_concurrency (Optional[int]):
+                | The max amount of 'consume' executions that may run concurrently for this actor. Once the limit is reached
+                | the actor stops taking events off of its inbound queues until an execution completes, so that a bounded queue
+                | 'size' applies backpressure to the sending actors. Ignored if blocking_consume is True. A value of None
+                | represents unbounded concurrency
+                | (Default: None)
+            threadpool_size (Optional[int]):
+                | The amount of OS threads this actor may use to run CPU heavy work (See 'offload'), such as lxml parsing,
+                | XSLT transforms and XSD validation, which release the GIL. While work runs in a thread, the gevent hub keeps
+                | serving all other greenlets. A value of 0 runs offloaded work directly on the hub
+                | (Default: 0)
+            log_level (Optional[int or str]):
+                | The minimum level of log messages this actor sends to its log queues, as a python logging level or level name.
+                | Messages below this level are dropped before the log event is even created (See Logger)
+                | (Default: logging.NOTSET)
+            tracer (Optional[compysition.tracing.Tracer]):
+                | Records the hops of sampled events through this actor. A value of None disables tracing for this actor.
+                | Otherwise, every send of an event that is not yet traced computes the crc32 of its meta_id to decide whether it is sampled
+                | (Default: None)
 
         """
         self.blockdiag_config = {"shape": "box"}
         self.name = name
         self.size = size
         self.pool = QueuePool(size)
-        self.logger = Logger(name, self.pool.logs)
+        self.logger = Logger(name, self.pool.logs, level=log_level)
+        self.metrics = ActorMetrics()
         self.__loop = True
         self.threads = RestartPool(logger=self.logger, sleep_interval=1)
 
@@ -84,6 +122,13 @@ class Actor(object):
         self.__blocking_consume = blocking_consume
         self.rescue = rescue
         self.max_rescue = max_rescue
+        self.copy_on_write = copy_on_write
+        self.batch_size = batch_size
+        self.batch_linger_ms = batch_linger_ms
+        self.max_concurrency = max_concurrency
+        self.__consume_pool = Pool(max_concurrency) if max_concurrency and not blocking_consume else None
+        self.threadpool = ThreadPool(threadpool_size) if threadpool_size else None
+        self.tracer = tracer
 
     def block(self):
         self.__block.wait()
@@ -164,6 +209,9 @@ class Actor(object):
             self.logger.debug("pre_hook() found, executing")
             self.pre_hook()
 
+        if self.batch_size > 1 and not hasattr(self, "consume_batch"):
+            self.logger.warning("A batch_size of {size} was defined, but consume_batch() was not found. Events will be consumed individually".format(size=self.batch_size))
+
         self.__run.set()
         self.logger.debug("Started with max queue size of {size} events".format(size=self.size))
 
@@ -180,10 +228,26 @@ class Actor(object):
             self.logger.debug("post_hook() found, executing")
             self.post_hook()
 
+        if self.threadpool is not None:
+            self.threadpool.kill()
+
+    def offload(self, function, *args, **kwargs):
+        """
+        Calls <function> in the threadpool of this actor and blocks the calling greenlet until it returns, re-raising any
+        exception it raised. If the actor has no threadpool, <function> is called directly.
+        The offloaded function must not use gevent, and must not share data that other greenlets may modify while it runs.
+        Event data must be detached on the hub before an event or its data is passed to the function (See Event.detached_data)
+        """
+        if self.threadpool is None:
+            return function(*args, **kwargs)
+
+        return self.threadpool.apply(function, args, kwargs)
+
     def send_event(self, event, queues=__NOT_DEFINED, check_output=True):
         """
         Sends event to all registered outbox queues. If multiple queues are consuming the event,
-        a deepcopy of the event is sent instead of raw event.
+        a deepcopy of the event is sent instead of raw event. If the actor was configured with copy_on_write,
+        a copy-on-write copy is sent instead of a deepcopy
         """
 
         if queues is self.__NOT_DEFINED:
@@ -208,11 +272,21 @@ class Actor(object):
             raise InvalidActorOutput("Event was of type '{_type}', expected '{output}'".format(_type=type(event), output=self.output))
 
         if len(queues) > 0:
-            self._send(queues[0], deepcopy(event))
-            map(lambda _queue: self._send(_queue, deepcopy(event)), queues[1:])
+            if self.tracer is not None:
+                self.tracer.send(event)
+
+            if self.copy_on_write:
+                map(lambda _queue: self._send(_queue, event.shared_copy()), queues)
+            else:
+                self._send(queues[0], deepcopy(event))
+                map(lambda _queue: self._send(_queue, deepcopy(event)), queues[1:])
 
     def _send(self, queue, event):
+        if self.tracer is not None:
+            self.tracer.enqueue(event, queue.name)
+
         queue.put(event)
+        self.metrics.sent += 1
         sleep(0)
 
     def __consumer(self, function, queue):
@@ -220,18 +294,22 @@ class Actor(object):
         '''
 
         self.__run.wait()
+        batching = self.batch_size > 1 and hasattr(self, "consume_batch")
 
         while self.loop():
             queue.wait_until_content()
+            if self.__consume_pool is not None:
+                self.__consume_pool.wait_available()
+
             try:
-                event = queue.get(timeout=10)
+                event = queue.get()
             except QueueEmpty:
                 pass
             else:
-                if self.__blocking_consume:
-                    self.__do_consume(function, event, queue)
+                if batching:
+                    self.__dispatch(self.__do_consume_batch, self.__fill_batch(queue, [event]), queue)
                 else:
-                    self.threads.spawn(self.__do_consume, function, event, queue, restart=False)
+                    self.__dispatch(self.__do_consume, function, event, queue)
 
         while True:
             if queue.qsize() > 0:
@@ -240,46 +318,143 @@ class Actor(object):
                 except QueueEmpty as err:
                     break
                 else:
-                    self.threads.spawn(self.__do_consume, function, event, queue, restart=False)
+                    if batching:
+                        self.__spawn(self.__do_consume_batch, self.__fill_batch(queue, [event], linger=False), queue)
+                    else:
+                        self.__spawn(self.__do_consume, function, event, queue)
             else:
                 break
 
+    def __dispatch(self, function, *args):
+        if self.__blocking_consume:
+            function(*args)
+        else:
+            self.__spawn(function, *args)
+
+    def __spawn(self, function, *args):
+        if self.__consume_pool is not None:
+            self.__consume_pool.spawn(function, *args)
+        else:
+            self.threads.spawn(function, restart=False, *args)
+
+    def __fill_batch(self, queue, events, linger=True):
+        """
+        Adds waiting events from <queue> to <events> until 'batch_size' is reached. If <linger> is True, this will wait up
+        to 'batch_linger_ms' for additional events to arrive
+        """
+        deadline = time() + self.batch_linger_ms / 1000.0
+
+        while len(events) < self.batch_size:
+            timeout = deadline - time()
+            try:
+                if linger and timeout > 0:
+                    events.append(queue.get(block=True, timeout=timeout))
+                else:
+                    events.append(queue.get())
+            except QueueEmpty:
+                break
+
+        return events
+
+    def __prepare_input(self, event):
+        """
+        Converts the incoming event to the input type of this actor, if necessary, and validates that all REQUIRED_EVENT_ATTRIBUTES
+        are present
+        """
+        if not isinstance(event, self.input):
+            event.detached_data()
+            new_event = self.offload(event.convert, self.input[0])
+            self.logger.warning("Incoming event was of type '{_type}' when type {input} was expected. Converted to {converted}".format(
+                _type=type(event), input=self.input, converted=type(new_event)), event=event)
+            event = new_event
+
+        if self.REQUIRED_EVENT_ATTRIBUTES:
+            missing = [event.get(attribute) for attribute in self.REQUIRED_EVENT_ATTRIBUTES if not event.get(attribute, None)]
+            if len(missing) > 0:
+                raise InvalidActorInput("Required incoming event attributes were missing: {missing}".format(missing=missing))
+
+        return event
+
     def __do_consume(self, function, event, queue):
         """
         A function designed to be spun up in a greenlet to maximize concurrency for the __consumer method
         This function actually calls the consume function for the actor
         """
+        metrics = self.metrics
+        metrics.in_progress += 1
+        start = time()
+        span = self.tracer.begin(event, self.name, start) if self.tracer is not None else None
+        traced_event = event
         try:
-
-            if not isinstance(event, self.input):
-                new_event = event.convert(self.input[0])
-                self.logger.warning("Incoming event was of type '{_type}' when type {input} was expected. Converted to {converted}".format(
-                    _type=type(event), input=self.input, converted=type(new_event)), event=event)
-                event = new_event
-
-            if self.REQUIRED_EVENT_ATTRIBUTES:
-                missing = [event.get(attribute) for attribute in self.REQUIRED_EVENT_ATTRIBUTES if not event.get(attribute, None)]
-                if len(missing) > 0:
-                    raise InvalidActorInput("Required incoming event attributes were missing: {missing}".format(missing=missing))
-
+            event = self.__prepare_input(event)
             function(event, origin=queue.name, origin_queue=queue)
-        except QueueFull as err:
-            err.wait_until_free()
+        except QueueFull:
+            queue.wait_until_free()
             queue.put(event)
         except InvalidActorInput as error:
             self.logger.error("Invalid input detected: {0}".format(error))
         except InvalidEventConversion:
             self.logger.error("Event was of type '{_type}', expected '{input}'".format(_type=type(event), input=self.input))
         except Exception as err:
-            self.logger.warning("Event exception caught: {traceback}".format(traceback=traceback.format_exc()), event=event)
-            rescue_tracker = "{actor}_rescue_num".format(actor=self.name)
-            if self.rescue and event.get(rescue_tracker, 0) < self.max_rescue:
-                setattr(event, rescue_tracker, event.get(rescue_tracker, 0) + 1)
-                sleep(1)
-                queue.put(event)
-            else:
-                event.error = err
-                self.send_error(event)
+            self.__process_consume_error(err, event, queue)
+        finally:
+            end = time()
+            metrics.in_progress -= 1
+            metrics.consumed += 1
+            metrics.consume_time.observe(end - start)
+            if span is not None:
+                self.tracer.end(traced_event, span, end)
+
+    def __do_consume_batch(self, events, queue):
+        """
+        The batched counterpart of __do_consume. Events that fail input preparation are filtered from the batch individually,
+        while an uncaught exception in 'consume_batch' is processed for every event in the batch
+        """
+        batch = []
+        for event in events:
+            try:
+                batch.append(self.__prepare_input(event))
+            except InvalidActorInput as error:
+                self.logger.error("Invalid input detected: {0}".format(error))
+            except InvalidEventConversion:
+                self.logger.error("Event was of type '{_type}', expected '{input}'".format(_type=type(event), input=self.input))
+            except Exception as err:
+                self.__process_consume_error(err, event, queue)
+
+        if len(batch) > 0:
+            metrics = self.metrics
+            metrics.in_progress += 1
+            start = time()
+            spans = [self.tracer.begin(event, self.name, start) for event in batch] if self.tracer is not None else ()
+            try:
+                self.consume_batch(batch, origin=queue.name, origin_queue=queue)
+            except QueueFull:
+                for event in batch:
+                    queue.wait_until_free()
+                    queue.put(event)
+            except Exception as err:
+                for event in batch:
+                    self.__process_consume_error(err, event, queue)
+            finally:
+                metrics.in_progress -= 1
+                end = time()
+                metrics.consumed += len(batch)
+                metrics.consume_time.observe(end - start)
+                for event, span in zip(batch, spans):
+                    if span is not None:
+                        self.tracer.end(event, span, end)
+
+    def __process_consume_error(self, err, event, queue):
+        self.metrics.errors += 1
+        self.logger.warning("Event exception caught: {traceback}".format(traceback=traceback.format_exc()), event=event)
+        rescue_tracker = "{actor}_rescue_num".format(actor=self.name)
+        if self.rescue and event.get(rescue_tracker, 0) < self.max_rescue:
+            setattr(event, rescue_tracker, event.get(rescue_tracker, 0) + 1)
+            sleep(1)
+            queue.put(event)
+        else:
+            event.error = err
+            self.send_error(event)
 
     def create_event(self, *args, **kwargs):
         if len(self.output) == 1:
@@ -293,5 +468,8 @@ class Actor(object):
             event:  The implementation of event.Event this actor is consuming
             *args:
             **kwargs:
+
+        An actor may additionally implement 'consume_batch(self, events, *args, **kwargs)', which receives a list of up to
+        'batch_size' events in a single call when 'batch_size' is greater than 1
         """
         pass
\ No newline at end of file
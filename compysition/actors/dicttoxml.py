@@ -63,7 +63,8 @@ class DictToXML(Actor):
 
     def consume(self, event, *args, **kwargs):
         try:
-            event = self.convert(event)
+            event.detached_data()
+            event = self.offload(self.convert, event)
             self.logger.info("Successfully converted Dict to XML", event=event)
             self.send_event(event)
         except Exception as err:
@@ -45,6 +45,11 @@ class EventLogger(Actor):
         self.log_full_event = log_full_event
 
     def consume(self, event, *args, **kwargs):
+        if self.logger.is_enabled_for(self.level):
+            self.logger.log(self.level, self._format_message(event), event=event)
+        self.send_event(event)
+
+    def _format_message(self, event):
         message = self.prefix + ""
         if self.log_full_event:
             message += str(event)
@@ -57,5 +62,4 @@ class EventLogger(Actor):
                 else:
                     message += str(getattr(event, tag, None))
 
-        self.logger.log(self.level, message, event=event)
-        self.send_event(event)
\ No newline at end of file
+        return message
\ No newline at end of file
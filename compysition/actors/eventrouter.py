@@ -24,7 +24,7 @@
 from compysition import Actor
 from lxml import etree
 import re
-from util import XPathLookup
+from util import XPathLookup, namespace_scope, registry
 import json
 from compysition.event import HttpEvent
 from compysition.errors import SetupError, EventCommandNotAllowed
@@ -50,13 +50,20 @@ class EventRouter(Actor):
             | the event will be output to all connected outboxes that do not have an explicit filter condition declared, that match the
             | regex(es) provided
             | (Default: .*)
+        deduplicate_outboxes (Optional[bool]):
+            | If True, the outboxes of all filters matching an event are collected first and the event is sent once to every
+            | distinct outbox, so the event is copied once per destination rather than once per matched filter and overlapping
+            | filters no longer put duplicate events on a shared outbox
+            | (Default: False)
 
     """
 
-    def __init__(self, name, routing_filters=[], type="whitelist", default_outbox_regexes=[".*"], *args, **kwargs):
+    def __init__(self, name, routing_filters=[], type="whitelist", default_outbox_regexes=[".*"], deduplicate_outboxes=False, *args, **kwargs):
         super(EventRouter, self).__init__(name, *args, **kwargs)
         self.blockdiag_config["shape"] = "flowchart.condition"
+        self.deduplicate_outboxes = deduplicate_outboxes
         self.filters = []
+        self.__index = None
         self.default_outbox_regexes = default_outbox_regexes
         self.default_outboxes = []
         if not isinstance(routing_filters, list):
@@ -112,21 +119,57 @@ class EventRouter(Actor):
                             exception=err))
 
     def consume(self, event, *args, **kwargs):
+        if self.deduplicate_outboxes:
+            return self.__consume_deduplicated(event)
+
         matched = False
-        for filter in self.filters:
-            if filter.matches(event):
-                matched = True
-                if len(filter.outboxes) > 0:
-                    self.send_event(event, queues=filter.outboxes)
-                    self.logger.debug("EventFilter matched for outbound queues ({outbox_names}). Event successfully forwarded".format(
-                            outbox_names=filter.outbox_names),
-                        event=event)
-                else:
-                    self.logger.info("EventFilter matched, but no outbound queues were defined for filter. Event has been discarded.", event=event)
+        for filter in self.get_matching_filters(event):
+            matched = True
+            if len(filter.outboxes) > 0:
+                self.send_event(event, queues=filter.outboxes)
+                self.logger.debug("EventFilter matched for outbound queues ({outbox_names}). Event successfully forwarded".format(
+                        outbox_names=filter.outbox_names),
+                    event=event)
+            else:
+                self.logger.info("EventFilter matched, but no outbound queues were defined for filter. Event has been discarded.", event=event)
 
         if not matched:
             self.process_no_match(event)
 
+    def __consume_deduplicated(self, event):
+        filters = self.get_matching_filters(event)
+        if not filters:
+            return self.process_no_match(event)
+
+        outboxes, outbox_names, seen = [], [], set()
+        for filter in filters:
+            if len(filter.outboxes) == 0:
+                self.logger.info("EventFilter matched, but no outbound queues were defined for filter. Event has been discarded.", event=event)
+
+            for outbox_name, outbox in zip(filter.outbox_names, filter.outboxes):
+                if id(outbox) not in seen:
+                    seen.add(id(outbox))
+                    outboxes.append(outbox)
+                    outbox_names.append(outbox_name)
+
+        if len(outboxes) > 0:
+            self.send_event(event, queues=outboxes)
+            self.logger.debug("EventFilters matched for outbound queues ({outbox_names}). Event successfully forwarded".format(
+                    outbox_names=outbox_names),
+                event=event)
+
+    def get_matching_filters(self, event):
+        """
+        Returns the filters that match the event, in the order they were set. Plain EventFilters are looked up through an
+        index that is built on first use, any other filter is checked with its own 'matches' method. The namespaces of a
+        document are discovered once for all xpath filters
+        """
+        if self.__index is None:
+            self.__index = _FilterIndex(self.filters)
+
+        with namespace_scope():
+            return self.__index.match(event)
+
     def process_no_match(self, event, *args, **kwargs):
         if not self.whitelist:
             if len(self.default_outboxes) > 0:
@@ -143,6 +186,7 @@ class EventRouter(Actor):
     def set_filter(self, filter):
         if isinstance(filter, EventFilter):
             self.filters.append(filter)
+            self.__index = None
         else:
             raise TypeError("The provided filter is not a valid EventFilter type")
 
@@ -300,7 +344,7 @@ class EventXMLFilter(EventFilter):
         self.xpath = xpath
 
         if xslt:
-            xslt = etree.XSLT(etree.XML(xslt))
+            xslt = registry.xslt(xslt)
 
         self.xslt = xslt
 
@@ -400,4 +444,106 @@ class EventJSONFilter(EventFilter):
             yield None
 
 
+class _FilterIndex(object):
+
+    """
+    Matches events against a list of filters without running every regex of every filter for every event.
+
+    A plain EventFilter (no next_filter, no overridden lookup) only depends on the string value found at its event_scope,
+    so such filters are grouped by scope and the scope value is looked up once per group. The set of filters matching a
+    given value is remembered, which turns routing on recurring values (service names, http methods, ...) into a single
+    dict lookup. Values that were not seen before are first checked against one alternation of all patterns in the group,
+    so that a value matching none of them costs a single regex search. Any other filter is checked with its own 'matches'.
+    """
+
+    MEMO_SIZE = 1024
+    MEMO_VALUE_LENGTH = 256
+
+    def __init__(self, filters):
+        self.__filters = []
+        groups = {}
+        for position, filter in enumerate(filters):
+            if filter.__class__ is EventFilter and filter.next_filter is None:
+                group = groups.get(filter.event_scope)
+                if group is None:
+                    group = groups[filter.event_scope] = _ScopeGroup(filter.event_scope)
+                    self.__filters.append((position, group))
+                group.add(position, filter)
+            else:
+                self.__filters.append((position, filter))
+
+        self.__single_group = len(self.__filters) == 1 and isinstance(self.__filters[0][1], _ScopeGroup)
+
+    def match(self, event):
+        if self.__single_group:
+            return [filter for position, filter in self.__filters[0][1].match(event)]
+
+        matched = []
+        for position, filter in self.__filters:
+            if isinstance(filter, _ScopeGroup):
+                matched.extend(filter.match(event))
+            elif filter.matches(event):
+                matched.append((position, filter))
+
+        matched.sort(key=lambda match: match[0])
+        return [filter for position, filter in matched]
+
+
+class _ScopeGroup(object):
+
+    """A set of plain EventFilters sharing the same event_scope. See _FilterIndex"""
+
+    def __init__(self, event_scope):
+        self.event_scope = event_scope
+        self.filters = []
+        self.__memo = {}
+        self.__pattern = None
+
+    def add(self, position, filter):
+        self.filters.append((position, filter))
+        self.__pattern = self.__combine()
+
+    def __combine(self):
+        patterns = []
+        for position, filter in self.filters:
+            for regex in filter.value_regexes:
+                # Inline flags and backreferences change meaning once patterns are joined, so those groups are not combined
+                if regex.flags & ~re.UNICODE or "(?" in regex.pattern or re.search(r"\\\d", regex.pattern):
+                    return None
+                patterns.append("(?:{0})".format(regex.pattern))
+
+        try:
+            return re.compile("|".join(patterns))
+        except re.error:
+            return None
+
+    def match(self, event):
+        position, first = self.filters[0]
+        value = next(first._get_value(event, self.event_scope))
+        if value is None:
+            return ()
+
+        memoize = isinstance(value, basestring) and len(value) <= _FilterIndex.MEMO_VALUE_LENGTH
+        if memoize:
+            matched = self.__memo.get(value)
+            if matched is not None:
+                return matched
+
+        try:
+            string = str(value)
+        except Exception:
+            # Let the filters themselves report the error
+            return [(position, filter) for position, filter in self.filters if filter.matches(event)]
+
+        if self.__pattern is not None and not self.__pattern.search(string):
+            matched = ()
+        else:
+            matched = tuple((position, filter) for position, filter in self.filters
+                            if any(regex.search(string) for regex in filter.value_regexes))
+
+        if memoize:
+            if len(self.__memo) >= _FilterIndex.MEMO_SIZE:
+                self.__memo.clear()
+            self.__memo[value] = matched
 
+        return matched
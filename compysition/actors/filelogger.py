@@ -27,6 +27,7 @@ import logging
 import logging.handlers
 import traceback
 import os
+import gevent
 import gevent.lock
 from compysition.event import LogEvent
 
@@ -56,13 +57,128 @@ class RotatingFileHandler(logging.handlers.RotatingFileHandler):
             os.mkdir(file_path)
 
 
+class BufferedFileWriter(object):
+
+    """
+    Collects formatted log lines in memory and writes them to a file with a single 'writelines' call per write.
+    Rotation follows RotatingFileHandler, but is only checked once per write, so a file may exceed maxBytes by the size
+    of a single write.
+
+    Parameters:
+        file_path (str):
+            | The path of the file to write to. Missing directories are created on the first write
+        maxBytes (Optional[int]):
+            | The size at which the file is rotated. A value of 0 disables rotation
+            | (Default: 0)
+        backupCount (Optional[int]):
+            | The amount of rotated files to keep
+            | (Default: 0)
+    """
+
+    def __init__(self, file_path, maxBytes=0, backupCount=0):
+        self.file_path = file_path
+        self.maxBytes = maxBytes
+        self.backupCount = backupCount
+        self.lines = []
+        self.lock = gevent.lock.Semaphore()
+        self.__file = None
+
+    def append(self, line):
+        self.lines.append(line)
+
+    def take(self):
+        """Returns all collected lines and starts collecting anew"""
+        lines, self.lines = self.lines, []
+        return lines
+
+    def write(self, lines):
+        """Writes lines to the file, rotating it first if they would grow it past maxBytes. Does not use gevent, so it may run in a thread"""
+        if self.__file is None:
+            self.__open("a")
+
+        if self.maxBytes > 0:
+            size = self.__file.tell()
+            if size > 0 and size + sum(len(line) for line in lines) > self.maxBytes:
+                self.__rotate()
+
+        self.__file.writelines(lines)
+        self.__file.flush()
+
+    def close(self):
+        if self.__file is not None:
+            self.__file.close()
+            self.__file = None
+
+    def __open(self, mode):
+        file_dir = os.path.dirname(self.file_path)
+        if file_dir and not os.path.exists(file_dir):
+            os.makedirs(file_dir)
+
+        self.__file = open(self.file_path, mode)
+        self.__file.seek(0, os.SEEK_END)
+
+    def __rotate(self):
+        self.close()
+        if self.backupCount > 0:
+            for i in range(self.backupCount - 1, 0, -1):
+                source = "{0}.{1}".format(self.file_path, i)
+                destination = "{0}.{1}".format(self.file_path, i + 1)
+                if os.path.exists(source):
+                    if os.path.exists(destination):
+                        os.remove(destination)
+                    os.rename(source, destination)
+
+            destination = "{0}.1".format(self.file_path)
+            if os.path.exists(destination):
+                os.remove(destination)
+            os.rename(self.file_path, destination)
+            self.__open("a")
+        else:
+            self.__open("w")
+
+
 class FileLogger(Actor):
     '''**Prints incoming events to a log file for debugging.**
+
+    When configured with a 'batch_size' greater than 1, waiting log events are written to their log file in a single write
+
+    Parameters:
+        name (str):
+            | The instance name
+        default_filename (Optional[str]):
+            | The file to write log events to that do not define a 'logger_filename'
+            | (Default: compysition.log)
+        level (Optional[str]):
+            | The minimum level name of log events that are written
+            | (Default: INFO)
+        directory (Optional[str]):
+            | The directory to write log files in
+            | (Default: logs)
+        maxBytes (Optional[int]):
+            | The size at which a log file is rotated
+            | (Default: 20000000)
+        backupCount (Optional[int]):
+            | The amount of rotated log files to keep
+            | (Default: 10)
+        buffered (Optional[bool]):
+            | If True, log lines are collected in memory per file and written with a single write once 'flush_size' lines are
+            | waiting or every 'flush_interval' seconds, instead of passing every log event through the python logging handler.
+            | Rotation is then checked once per write. Writes are done in the threadpool of the actor if it has one
+            | (See Actor 'threadpool_size'), so that disk latency never blocks other greenlets
+            | (Default: False)
+        flush_size (Optional[int]):
+            | The amount of waiting lines of a file that triggers a write. Only used if 'buffered' is True
+            | (Default: 1000)
+        flush_interval (Optional[float]):
+            | The max amount of seconds a line may wait before it is written. Only used if 'buffered' is True. A value of 0
+            | only writes once 'flush_size' lines are waiting or the actor stops
+            | (Default: 1)
     '''
 
     input = LogEvent
 
-    def __init__(self, name, default_filename="compysition.log", level="INFO", directory="logs", maxBytes=20000000, backupCount=10, *args, **kwargs):
+    def __init__(self, name, default_filename="compysition.log", level="INFO", directory="logs", maxBytes=20000000, backupCount=10,
+                 buffered=False, flush_size=1000, flush_interval=1, *args, **kwargs):
         super(FileLogger, self).__init__(name, *args, **kwargs)
         self.blockdiag_config["shape"] = "note"
         self.default_filename = default_filename
@@ -70,8 +186,65 @@ class FileLogger(Actor):
         self.directory = directory
         self.maxBytes = int(maxBytes)
         self.backupCount = int(backupCount)
+        self.buffered = buffered
+        self.flush_size = int(flush_size)
+        self.flush_interval = flush_interval
 
         self.loggers = {}
+        self.writers = {}
+
+    def pre_hook(self):
+        if self.buffered and self.flush_interval > 0:
+            self.threads.spawn(self.__flush_periodically)
+
+    def post_hook(self):
+        self.flush()
+        for writer in self.writers.values():
+            writer.close()
+
+    def __flush_periodically(self):
+        while self.loop():
+            gevent.sleep(self.flush_interval)
+            self.flush()
+
+    def flush(self):
+        """Writes all waiting lines of a 'buffered' FileLogger"""
+        for writer in self.writers.values():
+            self._flush_writer(writer)
+
+    def _flush_writer(self, writer):
+        with writer.lock:
+            lines = writer.take()
+            if lines:
+                try:
+                    self.offload(writer.write, lines)
+                except:
+                    print traceback.format_exc()
+
+    def _get_writer(self, event):
+        event_filename = event.get("logger_filename", self.default_filename)
+        writer = self.writers.get(event_filename, None)
+        if not writer:
+            writer = BufferedFileWriter("{0}/{1}".format(self.directory, event_filename), maxBytes=self.maxBytes, backupCount=self.backupCount)
+            self.writers[event_filename] = writer
+
+        return writer
+
+    def _buffer_entries(self, events):
+        full_writers = []
+        for event in events:
+            if event.level >= self.level:
+                writer = self._get_writer(event)
+                entry = self._format_entry(event)
+                if isinstance(entry, unicode):
+                    entry = entry.encode("utf-8")
+
+                writer.append(entry + "\n")
+                if len(writer.lines) == self.flush_size:
+                    full_writers.append(writer)
+
+        for writer in full_writers:
+            self._flush_writer(writer)
 
     def _create_logger(self, filepath):
         file_logger = logging.getLogger(filepath)
@@ -83,16 +256,22 @@ class FileLogger(Actor):
         file_logger.setLevel(self.level)
         return file_logger
 
-    def _process_log_entry(self, event):
+    def _get_logger(self, event):
         event_filename = event.get("logger_filename", self.default_filename)
         logger = self.loggers.get(event_filename, None)
         if not logger:
             logger = self._create_logger("{0}/{1}".format(self.directory, event_filename))
             self.loggers[event_filename] = logger
 
-        self._do_log(logger, event)
+        return logger
 
-    def _do_log(self, logger, event):
+    def _process_log_entry(self, event):
+        if self.buffered:
+            self._buffer_entries([event])
+        else:
+            self._do_log(self._get_logger(event), event)
+
+    def _format_entry(self, event):
         actor_name = event.origin_actor
         id = event.id
         message = event.message
@@ -106,10 +285,33 @@ class FileLogger(Actor):
         else:
             entry = "actor={0} :: {1}".format(actor_name, message)
 
+        return "{0}{1}".format(entry_prefix, entry)
+
+    def _do_log(self, logger, event):
         try:
-            logger.log(level, "{0}{1}".format(entry_prefix, entry))
+            logger.log(event.level, self._format_entry(event))
         except:
             print traceback.format_exc()
 
     def consume(self, event, *args, **kwargs):
         self._process_log_entry(event)
+
+    def consume_batch(self, events, *args, **kwargs):
+        """
+        Writes all entries of a batch that are destined for the same file as a single log record, so that the handler lock,
+        rotation check and file write are only done once per file per batch
+        """
+        if self.buffered:
+            return self._buffer_entries(events)
+
+        entries = {}
+        for event in events:
+            if event.level >= self.level:
+                logger = self._get_logger(event)
+                entries.setdefault(logger, []).append(event)
+
+        for logger, logger_events in entries.items():
+            try:
+                logger.log(max(event.level for event in logger_events), "\n".join(self._format_entry(event) for event in logger_events))
+            except:
+                print traceback.format_exc()
@@ -22,16 +22,17 @@
 #  MA 02110-1301, USA.
 
 from compysition import Actor
-from compysition.errors import InvalidEventDataModification, MalformedEventData, ResourceNotFound
-from compysition.event import HttpEvent, JSONHttpEvent, XMLHttpEvent
+from compysition.errors import InvalidEventDataModification, MalformedEventData, ResourceNotFound, ActorTimeout
+from compysition.event import HttpEvent, JSONHttpEvent, XMLHttpEvent, UnparsedData
 from gevent import pywsgi
 import json
 from functools import wraps
 from collections import defaultdict
-from gevent.queue import Queue
+from gevent.event import AsyncResult, Event as GEvent
 from bottle import *
 import re
 import time
+import heapq
 import mimeparse
 from datetime import datetime
 
@@ -90,6 +91,18 @@ class HTTPServer(Actor, Bottle):
             | Special values:
             |    id(Optional[str]): Used to identify this route in the json object
             |    base_path(Optional[str]): Used to identify a route that this route extends, using the referenced id
+            |    response_timeout(Optional[float]): Overrides the 'response_timeout' of the actor for this route
+        lazy_data(Optional[bool]):
+            | When True, request bodies are kept unparsed in the created events until event.data is first accessed, so
+            | requests that are only passed along or answered with their own body are never parsed.
+            | Malformed request bodies are then only detected by the first actor that reads event.data, rather than being
+            | answered with a '400 Bad Request' by this actor.
+            | Default: False
+        response_timeout(Optional[float]):
+            | The amount of seconds to wait for the response event of a request. If it does not arrive in time, for instance
+            | because the event was dropped along the way, the request is answered with a '408 Request Timeout' (See ActorTimeout)
+            | and a late response event is ignored. A value of None waits indefinitely
+            | Default: 60
 
     Examples:
         Default:
@@ -136,6 +149,8 @@ class HTTPServer(Actor, Bottle):
     X_WWW_FORM_URLENCODED_KEY_MAP = defaultdict(lambda: HttpEvent, {"XML": XMLHttpEvent, "JSON": JSONHttpEvent})
     X_WWW_FORM_URLENCODED = "application/x-www-form-urlencoded"
 
+    RESPONDER_KEY = "compysition.responder"
+
     def combine_base_paths(self, route, named_routes):
         base_path_id = route.get('base_path', None)
         if base_path_id:
@@ -179,7 +194,7 @@ class HTTPServer(Actor, Bottle):
 
         return path
 
-    def __init__(self, name, address="0.0.0.0", port=8080, keyfile=None, certfile=None, routes_config=None, *args, **kwargs):
+    def __init__(self, name, address="0.0.0.0", port=8080, keyfile=None, certfile=None, routes_config=None, lazy_data=False, response_timeout=60, *args, **kwargs):
         Actor.__init__(self, name, *args, **kwargs)
         Bottle.__init__(self)
         self.blockdiag_config["shape"] = "cloud"
@@ -187,7 +202,15 @@ class HTTPServer(Actor, Bottle):
         self.port = port
         self.keyfile = keyfile
         self.certfile = certfile
+        self.lazy_data = lazy_data
+        self.response_timeout = response_timeout
         self.responders = {}
+        self.timed_out_requests = 0
+        self.__deadlines = []           # A heap of (deadline, event_id). Entries of answered requests are only removed lazily
+        self.__deadlines_changed = GEvent()
+        self.metrics.register("outstanding_requests", lambda: self.outstanding_requests, description="Requests waiting for their response event")
+        self.metrics.register("timed_out_requests_total", lambda: self.timed_out_requests, metric_type="counter",
+                              description="Requests answered with a timeout, as their response event did not arrive in time")
         routes_config = routes_config or self.DEFAULT_ROUTE
 
         if isinstance(routes_config, str):
@@ -223,11 +246,26 @@ class HTTPServer(Actor, Bottle):
             return actual_response
         return _log_to_logger
 
-    def __call__(self, e, h):
-        """**Override Bottle.__call__ to strip trailing slash from incoming requests**"""
+    def __call__(self, environ, start_response):
+        """
+        **Override Bottle.__call__ to strip trailing slash from incoming requests**
+
+        Requests that were sent as an event are answered directly through <start_response> once the response event was
+        consumed, instead of through the (thread local) Bottle response
+        """
+
+        environ['PATH_INFO'] = environ['PATH_INFO'].rstrip('/')
+        bottle_start_response = []
+        body = Bottle.__call__(self, environ, lambda status, headers, exc_info=None: bottle_start_response.append((status, headers)))
+        responder = environ.pop(self.RESPONDER_KEY, None)
+        if responder is None:
+            start_response(*bottle_start_response[-1])
+            return body
+
+        if hasattr(body, "close"):
+            body.close()
 
-        e['PATH_INFO'] = e['PATH_INFO'].rstrip('/')
-        return Bottle.__call__(self, e, h)
+        return self._respond(environ, start_response, *responder)
 
     def format_response_data(self, event):
         """
@@ -239,6 +277,8 @@ class HTTPServer(Actor, Bottle):
                 response_data = json.dumps({"errors": event.format_error()})
             else:
                 response_data = event.error_string()
+        elif isinstance(event, XMLHttpEvent):
+            response_data = event.data_string()
         else:
             if not isinstance(event.data, (list, dict, str)) or \
                     (isinstance(event.data, dict) and len(event.data) == 1 and event.data.get("data", None)):
@@ -249,41 +289,55 @@ class HTTPServer(Actor, Bottle):
         return response_data
 
     def consume(self, event, *args, **kwargs):
-        # There is an error that results in responding with an empty list that will cause an internal server error
+        responder = self.responders.pop(event.event_id, None)
 
-        original_event_class, response_queue = self.responders.pop(event.event_id, None)
-
-        if response_queue:
-
-            accept = event.get('accept', original_event_class.content_type)
-
-            if not isinstance(event, self.CONTENT_TYPE_MAP[accept]):
-                self.logger.warning(
-                    "Incoming event did did not match the clients Accept format. Converting '{current}' to '{new}'".format(
-                        current=type(event), new=original_event_class.__name__))
-                event = event.convert(self.CONTENT_TYPE_MAP[accept])
+        if responder:
+            responder[1].set(event)
+        else:
+            self.logger.warning("Received event response for an unknown event ID. The request might have already received a response", event=event)
 
-            local_response = HTTPResponse()
-            status, status_message = event.status
-            local_response.status = "{code} {message}".format(code=status, message=status_message)
+    @property
+    def outstanding_requests(self):
+        """The amount of requests that are waiting for their response event"""
+        return len(self.responders)
 
-            for header in event.headers.keys():
-                local_response.set_header(header, event.headers[header])
+    def _respond(self, environ, start_response, request_event, result):
+        """
+        Waits for the response event of a request and writes it as the WSGI response. If no response event arrives in time,
+        the request event itself is answered with its ActorTimeout error
+        """
+        original_event_class = request_event.__class__
+        try:
+            event = result.get()
+        except ActorTimeout as err:
+            self.logger.warning("No response event was received for event '{event_id}' in time".format(event_id=request_event.event_id), event=request_event)
+            event = request_event
+            event.error = err
 
-            local_response.set_header("Content-Type", event.content_type)
+        accept = event.get('accept', original_event_class.content_type)
 
-            if int(status) == 204:
-                response_data = ""
-            else:
-                response_data = self.format_response_data(event)
+        if not isinstance(event, self.CONTENT_TYPE_MAP[accept]):
+            self.logger.warning(
+                "Incoming event did did not match the clients Accept format. Converting '{current}' to '{new}'".format(
+                    current=type(event), new=original_event_class.__name__))
+            event = event.convert(self.CONTENT_TYPE_MAP[accept])
 
-            local_response.body = response_data
+        code, message = event.status
+        status = "{code} {message}".format(code=code, message=message)
+        headers = dict((str(header), str(value)) for header, value in event.headers.iteritems())
+        headers["Content-Type"] = event.content_type
 
-            response_queue.put(local_response)
-            response_queue.put(StopIteration)
-            self.logger.info("[{status}] Returned in {time} ms".format(status=local_response.status, time=(datetime.now()-event.created).microseconds / 1000), event=event)
+        if int(code) in (204, 304) or environ['REQUEST_METHOD'] == 'HEAD':
+            response_data = ""
         else:
-            self.logger.warning("Received event response for an unknown event ID. The request might have already received a response", event=event)
+            response_data = self.format_response_data(event)
+            if isinstance(response_data, unicode):
+                response_data = response_data.encode("utf-8")
+
+        headers["Content-Length"] = str(len(response_data))
+        start_response(status, headers.items())
+        self.logger.info("[{status}] Returned in {time} ms".format(status=status, time=int((datetime.now()-event.created).total_seconds() * 1000)), event=event)
+        return [response_data]
 
     def _format_bottle_env(self, environ):
         """**Filters incoming bottle environment of non-serializable objects, and adds useful shortcuts**"""
@@ -298,6 +352,9 @@ class HTTPServer(Actor, Bottle):
         return environ
 
     def callback(self, queue=None, *args, **kwargs):
+        # The thread local Bottle request may be rebound by other requests once this greenlet yields
+        environ = request.environ
+        response_timeout = environ['bottle.route'].config.get('response_timeout', self.response_timeout)
         queue_name = queue or self.name
         queue = self.pool.outbound.get(queue_name, None)
         ctype = request.content_type.split(';')[0]
@@ -345,6 +402,8 @@ class HTTPServer(Actor, Bottle):
 
             if data == '':
                 data = None
+            elif data is not None and self.lazy_data:
+                data = UnparsedData(data)
 
             event = event_class(environment=environment, service=queue_name, data=data, accept=accept, **kwargs)
 
@@ -354,15 +413,52 @@ class HTTPServer(Actor, Bottle):
             event.error = err
             queue = self.pool.inbound[self.pool.inbound.keys()[0]]
 
-        response_queue = Queue()
-        self.responders.update({event.event_id: (event_class, response_queue)})
-        local_response = response_queue
-        self.logger.info("Received {0} request for service {1}".format(request.method, queue_name), event=event)
-        self.send_event(event, queues=[queue])
+        result = AsyncResult()
+        self.responders[event.event_id] = (event_class, result)
+        if response_timeout is not None:
+            self.__expire_after(event.event_id, response_timeout)
 
-        return local_response
+        self.logger.info("Received {0} request for service {1}".format(request.method, queue_name), event=event)
+        try:
+            self.send_event(event, queues=[queue])
+        except:
+            self.responders.pop(event.event_id, None)
+            raise
+
+        event.data = None       # Only copies of the request are sent, this one is kept to answer a timeout
+        environ[self.RESPONDER_KEY] = (event, result)
+        return ""
+
+    def __expire_after(self, event_id, timeout):
+        deadlines = self.__deadlines
+        if len(deadlines) > 1024 and len(deadlines) > 2 * len(self.responders):
+            # Drops the entries of answered requests, which costs O(1) amortized per request
+            deadlines[:] = [entry for entry in deadlines if entry[1] in self.responders]
+            heapq.heapify(deadlines)
+
+        deadline = time.time() + timeout
+        if not deadlines or deadline < deadlines[0][0]:
+            self.__deadlines_changed.set()
+        heapq.heappush(deadlines, (deadline, event_id))
+
+    def __expire_responders(self):
+        """Answers requests whose response event did not arrive before their deadline with an ActorTimeout"""
+        deadlines = self.__deadlines
+        while self.loop():
+            self.__deadlines_changed.clear()
+            timeout = deadlines[0][0] - time.time() if deadlines else None
+            if timeout is None or timeout > 0:
+                self.__deadlines_changed.wait(timeout)
+                continue
+
+            deadline, event_id = heapq.heappop(deadlines)
+            responder = self.responders.pop(event_id, None)
+            if responder:
+                self.timed_out_requests += 1
+                responder[1].set_exception(ActorTimeout("No response was received within the response timeout"))
 
     def post_hook(self):
+        self.__deadlines_changed.set()
         self.__server.stop()
         self.logger.info("Stopped serving")
 
@@ -375,4 +471,5 @@ class HTTPServer(Actor, Bottle):
         self.__server.start()
 
     def pre_hook(self):
+        self.threads.spawn(self.__expire_responders)
         self.__serve()
\ No newline at end of file
@@ -27,6 +27,7 @@ from jsonschema.exceptions import SchemaError, ValidationError
 import json
 from compysition.event import JSONEvent
 from compysition.errors import MalformedEventData
+from util import registry
 
 
 class JSONValidator(Actor):
@@ -49,16 +50,9 @@ class JSONValidator(Actor):
         super(JSONValidator, self).__init__(name, *args, **kwargs)
         self.schema = schema
         if self.schema:
-            formatter = self._build_formatter()
-
             try:
-                if isinstance(self.schema, str):
-                    self.schema = json.loads(self.schema)
-
-                if isinstance(self.schema, dict):
-                    self.schema = Draft4Validator(self.schema, format_checker=formatter)
-                else:
-                    raise ValueError("Schema must be of type str or dict. Instead received type '{type}'".format(type=type(self.schema)))
+                # Formatters are built per class, so validators are only shared between instances of the same class
+                self.schema = registry.get(("json_schema", self.__class__), self.schema, self._build_validator)
             except Exception as err:
                 self.logger.error("Invalid schema: {err}".format(err=err))
                 self.schema = None
@@ -84,6 +78,15 @@ class JSONValidator(Actor):
             message = error_reasons
             self.process_error(message, event)
 
+    def _build_validator(self, schema):
+        if isinstance(schema, str):
+            schema = json.loads(schema)
+
+        if isinstance(schema, dict):
+            return Draft4Validator(schema, format_checker=self._build_formatter())
+        else:
+            raise ValueError("Schema must be of type str or dict. Instead received type '{type}'".format(type=type(schema)))
+
     @staticmethod
     def _build_formatter():
         """Create a formatter to be passed to the validator. This method can be subclassed to add custom formatters ie:
@@ -28,8 +28,8 @@ from gevent.queue import Queue
 from compysition import Actor
 from uuid import uuid4 as uuid
 import util.mdpdefinition as MDPDefinition
+from compysition.event import PickleEventCodec
 import traceback
-import cPickle as pickle
 import abc
 
 """
@@ -53,9 +53,10 @@ class MDPActor(Actor):
     socket_identity = None
     outbound_queue = None
 
-    def __init__(self, name, service_prefix="", service_postfix="", *args, **kwargs):
+    def __init__(self, name, service_prefix="", service_postfix="", codec=None, *args, **kwargs):
         super(MDPActor, self).__init__(name, *args, **kwargs)
         self.blockdiag_config["shape"] = "cloud"
+        self.codec = codec or PickleEventCodec()    # The compysition.event.EventCodec wire format used for events
         self.socket_identity = uuid().get_hex()
         self.context = zmq.Context()
         self.outbound_queue = Queue()
@@ -166,7 +167,7 @@ class MDPClient(MDPActor):
             request_id = event.meta_id                  # Set for broker logging so we can trace the path of an event easily
             service = b"{0}".format(self.service_prefix + event.service + self.service_postfix)
             self.logger.info("Sending event to service '{0}'".format(service), event=event)
-            message = [request_id, b"{0}".format(pickle.dumps(event))]
+            message = [request_id] + self.codec.encode(event)
             self.send(service, message, broker_socket=socket)
         except Exception as err:
             self.logger.error("Unable to find necessary chains: {0}".format(traceback.format_exc()))
@@ -195,7 +196,7 @@ class MDPClient(MDPActor):
                 empty = message.pop(0)
                 request_identity = message.pop(0)
 
-                event = pickle.loads(message[0])
+                event = self.codec.decode(message)
 
                 self.logger.info("Received reply from broker", event=event)
                 self.send_event(event)
@@ -256,7 +257,7 @@ class MDPWorker(MDPActor):
                 return_address = message.pop(0)
                 empty = message.pop(0)
                 broker_event_logging_id = message.pop(0)
-                event = pickle.loads(message.pop(0))
+                event = self.codec.decode(message)
 
                 request_id = event.event_id
                 self.requests[request_id] = Request(return_address, origin_broker)
@@ -282,7 +283,7 @@ class MDPWorker(MDPActor):
             return_address = request.return_address
             broker_event_logging_id = event.meta_id
             try:
-                message = ['', MDPDefinition.W_WORKER, MDPDefinition.W_REPLY, return_address, '', str(broker_event_logging_id), b"{0}".format(pickle.dumps(event))]
+                message = ['', MDPDefinition.W_WORKER, MDPDefinition.W_REPLY, return_address, '', str(broker_event_logging_id)] + self.codec.encode(event)
             except Exception as err:
                 self.logger.error(err, event=event)
 
@@ -14,6 +14,7 @@ import traceback
 from bs4 import BeautifulSoup
 import re
 from compysition.event import XMLEvent, JSONEvent
+from util import SMTPConnectionPool
 
 class SMTPOut(Actor):
 
@@ -24,12 +25,19 @@ class SMTPOut(Actor):
 
     Parameters:
 
-        - name (str):       The instance name.
+        - name (str):                           The instance name.
+        - pool_size (int):                      (Default: 1) The max amount of SMTP sessions that are open at the same time
+        - idle_timeout (float):                 (Default: 60) The amount of seconds after which an unused SMTP session is closed
+        - max_messages_per_connection (int):    (Default: 100) The amount of messages after which an SMTP session is closed and replaced
+
+    SMTP sessions are kept open and reused between events (See SMTPConnectionPool). When configured with a 'batch_size'
+    greater than 1, all messages of a batch are sent over a single session
     '''
 
     address_regex = re.compile("^.*@.*$")
 
-    def __init__(self, name, from_address=None, domain=None, key=None, host=("localhost", 25), *args, **kwargs):
+    def __init__(self, name, from_address=None, domain=None, key=None, host=("localhost", 25), pool_size=1, idle_timeout=60,
+                 max_messages_per_connection=100, *args, **kwargs):
         Actor.__init__(self, name, *args, **kwargs)
         self.blockdiag_config["shape"] = "mail"
         self.logger.info("Initialized SMTPOut Actor")
@@ -38,6 +46,10 @@ class SMTPOut(Actor):
         self.domain = domain
         self.address = self.normalize_address(from_address, self.domain)
         self.body_tag = 'Body'
+        self.connections = SMTPConnectionPool(host, size=pool_size, idle_timeout=idle_timeout, max_messages=max_messages_per_connection)
+
+    def post_hook(self):
+        self.connections.close()
 
     def normalize_address(self, address, domain):
         """
@@ -54,6 +66,35 @@ class SMTPOut(Actor):
         return address
 
     def consume(self, event, *args, **kwargs):
+        message = self._build_message(event)
+        if message is not None:
+            msg, to, from_address = message
+            try:
+                self.send(msg, to, from_address)
+            except Exception as err:
+                self._log_result(event, to, from_address, traceback.format_exc())
+            else:
+                self._log_result(event, to, from_address)
+
+        self.send_event(event)
+
+    def consume_batch(self, events, *args, **kwargs):
+        """Sends the messages of all events in the batch over a single SMTP session"""
+        messages = []
+        for event in events:
+            message = self._build_message(event)
+            if message is not None:
+                messages.append((event, message))
+
+        results = self.connections.sendmany([(from_address, to.split(","), msg.as_string()) for event, (msg, to, from_address) in messages])
+        for (event, (msg, to, from_address)), error in zip(messages, results):
+            self._log_result(event, to, from_address, error)
+
+        for event in events:
+            self.send_event(event)
+
+    def _build_message(self, event):
+        """Returns the (MIMEText, to, from_address) to send for event, or None if the event has no recipient"""
         msg_xml = event.data
         to = msg_xml.find("To").text
         from_element = msg_xml.find("From")
@@ -65,23 +106,20 @@ class SMTPOut(Actor):
                 if element.tag != self.body_tag:
                     msg[element.tag] = element.text
 
-            try:
-                self.send(msg, to, from_address)
-            except Exception as err:
-                self.logger.error("Error sending message: {err}".format(err=traceback.format_exc()), event=event)
-            else:
-                self.logger.info("Email sent to {to} from {from_address} via smtp server {host}".format(to=to,
-                                                                                                        from_address=from_address,
-                                                                                                        host=self.host), event=event)
+            return msg, to, from_address
         else:
             self.logger.info("No email recipient specified, notification was not sent", event=event)
 
-        self.send_event(event)
+    def _log_result(self, event, to, from_address, error=None):
+        if error is not None:
+            self.logger.error("Error sending message: {err}".format(err=error), event=event)
+        else:
+            self.logger.info("Email sent to {to} from {from_address} via smtp server {host}".format(to=to,
+                                                                                                    from_address=from_address,
+                                                                                                    host=self.host), event=event)
 
     def send(self, msg, to, from_address):
-        sender = smtplib.SMTP(self.host)
-        sender.sendmail(from_address, to.split(","), msg.as_string())
-        sender.quit()
+        self.connections.sendmail(from_address, to.split(","), msg.as_string())
 
 
 class SMTPIn(Actor):
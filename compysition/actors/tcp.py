@@ -22,10 +22,12 @@
 #
 
 from compysition import Actor
+from compysition.event import PickleEventCodec
 import gevent.socket as socket
 from gevent.server import StreamServer
+from gevent.lock import BoundedSemaphore
 import gevent
-import cPickle as pickle
+import struct
 
 """
 Implementation of a TCP in and out connection using gevent sockets
@@ -35,49 +37,175 @@ Implementation of a TCP in and out connection using gevent sockets
 #TODO: Add non-event TCPIn (Origination from a non-compysition source)
 
 DEFAULT_PORT = 9000
-BUFFER_SIZE  = 1024
+BUFFER_SIZE  = 65536
+
+_LENGTH = struct.Struct("!I")
+
+
+def encode_message(frames):
+    """
+    Frames a list of event frames (See compysition.event.EventCodec) as a single length prefixed message:
+    a 4 byte message length, followed by a 4 byte length and the bytes of every frame
+    """
+    body = "".join(_LENGTH.pack(len(frame)) + frame for frame in frames)
+    return _LENGTH.pack(len(body)) + body
 
-class TCPOut(Actor):
+
+class MessageReader(object):
 
     """
-    Send events over TCP
+    Collects received bytes and splits them into the frame lists of complete messages (See encode_message). Bytes of an
+    incomplete message are kept until the rest of it was received
     """
 
+    def __init__(self):
+        self.__buffer = bytearray()
+
+    def feed(self, data, size=None):
+        """Adds the first <size> bytes of data and returns the frame lists of all messages that are complete"""
+        buffer = self.__buffer
+        buffer += memoryview(data)[:size] if size is not None else data
+        messages = []
+        offset, length = 0, len(buffer)
+        view = memoryview(buffer)
+        while length - offset >= _LENGTH.size:
+            end = offset + _LENGTH.size + _LENGTH.unpack_from(buffer, offset)[0]
+            if end > length:
+                break
+
+            frames, offset = [], offset + _LENGTH.size
+            while offset < end:
+                frame_end = offset + _LENGTH.size + _LENGTH.unpack_from(buffer, offset)[0]
+                frames.append(view[offset + _LENGTH.size:frame_end].tobytes())
+                offset = frame_end
+
+            messages.append(frames)
+
+        del view    # The buffer can not be resized while a view on it exists
+        if offset:
+            del buffer[:offset]
+
+        return messages
+
+
+class TCPOut(Actor):
+
+    """
+    **Send events over TCP**
+
+    Events are sent as length prefixed messages (See encode_message) over long lived connections, which are opened on demand
+    and reused for every following event. When configured with a 'batch_size' greater than 1, all events of a batch are sent
+    with a single write
+
+    Parameters:
+        name (str):
+            | The instance name
+        port (Optional[int]):
+            | The port of the TCPIn to send to
+            | Default: 9000
+        host (Optional[str]):
+            | The host of the TCPIn to send to
+            | Default: Attempts to resolve local host name via socket.gethostbyname(socket.gethostname())
+        codec (Optional[compysition.event.EventCodec]):
+            | The wire format used to transport events. Both ends of a connection must use the same codec.
+            | compysition.event.BinaryEventCodec is faster and safe with untrusted peers, but requires JSON serializable event properties
+            | Default: compysition.event.PickleEventCodec()
+        pool_size (Optional[int]):
+            | The max amount of connections that are open at the same time
+            | Default: 1
+    """
 
-    def __init__(self, name, port=None, host=None, listen=True, *args, **kwargs):
+    def __init__(self, name, port=None, host=None, listen=True, codec=None, pool_size=1, *args, **kwargs):
         super(TCPOut, self).__init__(name, *args, **kwargs)
 
         self.blockdiag_config["shape"] = "cloud"
         self.port = port or DEFAULT_PORT
         self.host = host or socket.gethostbyname(socket.gethostname())
+        self.codec = codec or PickleEventCodec()
+        self.pool_size = pool_size
+        self.__connections = BoundedSemaphore(pool_size)
+        self.__idle = []
 
-    def consume(self, event, *args, **kwargs):
-        self._send(event)
+    def post_hook(self):
+        while self.__idle:
+            self.__idle.pop().close()
 
-    def _send(self, event):
-        while True:
+    def consume(self, event, *args, **kwargs):
+        self._transmit(event)
+
+    def consume_batch(self, events, *args, **kwargs):
+        self._send_message("".join(encode_message(self.codec.encode(event)) for event in events))
+
+    def _transmit(self, event):
+        self._send_message(encode_message(self.codec.encode(event)))
+
+    def _send_message(self, message):
+        with self.__connections:
+            while True:
+                connection = self.__get_connection()
+                try:
+                    if connection is None:
+                        connection = socket.create_connection((self.host, self.port))
+                        connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                    connection.sendall(message)
+                except Exception as err:
+                    if connection is not None:
+                        connection.close()
+                    self.logger.error("Unable to send event over tcp to {host}:{port}: {error}".format(host=self.host, port=self.port, error=err))
+                    gevent.sleep(0)
+                else:
+                    self.__idle.append(connection)
+                    break
+
+    def __get_connection(self):
+        """Returns an idle connection that was not closed by the receiver in the meantime, or None"""
+        while self.__idle:
+            connection = self.__idle.pop()
+            connection.settimeout(0)
             try:
-                sock = socket.socket()
-                sock.connect((self.host, self.port))
-                sock.send((pickle.dumps(event)))
-                sock.close()
-                break
-            except Exception as err:
-                self.logger.error("Unable to send event over tcp to {host}:{port}: {error}".format(host=self.host, port=self.port, error=err))
-                gevent.sleep(0)
+                # The receiver never writes, so a readable connection was closed by the receiver
+                closed = connection.recv(1, socket.MSG_PEEK) == ""
+            except socket.error:
+                closed = False
+            finally:
+                connection.settimeout(None)
+
+            if not closed:
+                return connection
+
+            connection.close()
+
 
 class TCPIn(Actor):
 
     """
-    Receive Events over TCP
+    **Receive events over TCP**
+
+    Reads any amount of length prefixed messages (See TCPOut) per connection
+
+    Parameters:
+        name (str):
+            | The instance name
+        port (Optional[int]):
+            | The port to listen on
+            | Default: 9000
+        host (Optional[str]):
+            | The host to listen on
+            | Default: 0.0.0.0
+        codec (Optional[compysition.event.EventCodec]):
+            | The wire format used to transport events. Both ends of a connection must use the same codec.
+            | compysition.event.BinaryEventCodec is faster and safe with untrusted peers, but requires JSON serializable event properties
+            | Default: compysition.event.PickleEventCodec()
     """
 
-    def __init__(self, name, port=None, host=None, *args, **kwargs):
-        super(TCPIn, self)._init__(name, *args, **kwargs)
+    def __init__(self, name, port=None, host=None, codec=None, *args, **kwargs):
+        super(TCPIn, self).__init__(name, *args, **kwargs)
         self.blockdiag_config["shape"] = "cloud"
         self.port = port or DEFAULT_PORT
         self.host = host or "0.0.0.0"
+        self.codec = codec or PickleEventCodec()
         self.server = StreamServer((self.host, self.port), self.connection_handler)
+        self.__connections = set()
 
     def consume(self, event, *args, **kwargs):
      pass
@@ -88,20 +216,32 @@ class TCPIn(Actor):
 
     def post_hook(self):
         self.server.stop()
+        for connection in list(self.__connections):
+            connection.close()
 
-    def connection_handler(self, socket, address):
-        event_string = ""
-        for l in socket.makefile('r'):
-            event_string += l
-
+    def connection_handler(self, connection, address):
+        reader = MessageReader()
+        buffer = bytearray(BUFFER_SIZE)
+        self.__connections.add(connection)
         try:
-            event = pickle.loads(event_string)
-            self.send_event(event)
-        except:
-            self.logger.error("Received invalid event format: {0}".format(event_string))
-
-
-
-
-
-
+            while True:
+                try:
+                    size = connection.recv_into(buffer)
+                except socket.error as err:
+                    if self.loop():
+                        self.logger.error("Lost tcp connection from {0}: {1}".format(address, err))
+                    break
+
+                if not size:
+                    break
+
+                for frames in reader.feed(buffer, size):
+                    try:
+                        event = self.codec.decode(frames)
+                    except Exception as err:
+                        self.logger.error("Received invalid event format: {0}".format(err))
+                    else:
+                        self.send_event(event)
+        finally:
+            self.__connections.discard(connection)
+            connection.close()
@@ -1 +1,3 @@
-from xpath import *
\ No newline at end of file
+from xpath import *
+from compiled import *
+from smtppool import *
\ No newline at end of file
@@ -0,0 +1,71 @@
+from lxml import etree
+from itertools import count
+import hashlib
+import json
+
+__all__ = ["CompiledRegistry", "registry"]
+
+
+class CompiledRegistry(object):
+    """
+    A process wide registry of compiled stylesheets and schemas, keyed by a hash of their source.
+    Every distinct source is only compiled once, no matter how many actors or filters use it, and the compiled object is shared
+    between all of them. Once more than 'maxsize' entries are registered, the least recently requested entry is evicted.
+    Requests only record a use counter, so that the cost of finding the least recently requested entry is only paid on eviction.
+    Actors that already hold an evicted object keep using it, it is only compiled again for the next actor that requests it
+    """
+
+    def __init__(self, maxsize=256):
+        self.maxsize = maxsize
+        self.__entries = {}
+        self.__last_used = {}
+        self.__uses = count()
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def get(self, kind, source, compile_function):
+        """
+        Returns the compiled object of type <kind> for <source>, calling compile_function(source) if it was not compiled yet.
+        <kind> may be any hashable value that separates objects compiled differently from the same source
+        """
+        key = (kind, self._hash(source))
+        compiled = self.__entries.get(key, None)
+        if compiled is None:
+            compiled = self.__entries[key] = compile_function(source)
+            if len(self.__entries) > self.maxsize:
+                self.__evict()
+
+        self.__last_used[key] = next(self.__uses)
+        return compiled
+
+    def __evict(self):
+        while len(self.__entries) > self.maxsize:
+            key = min(self.__last_used, key=self.__last_used.get)
+            del self.__entries[key], self.__last_used[key]
+
+    def xslt(self, source):
+        """Returns the compiled etree.XSLT of the <source> stylesheet string"""
+        return self.get("xslt", source, lambda xslt: etree.XSLT(etree.XML(xslt)))
+
+    def xml_schema(self, source):
+        """Returns the compiled etree.XMLSchema of the <source> XSD string"""
+        return self.get("xml_schema", source, lambda xsd: etree.XMLSchema(etree.XML(xsd)))
+
+    def clear(self):
+        self.__entries.clear()
+        self.__last_used.clear()
+
+    @staticmethod
+    def _hash(source):
+        if isinstance(source, str) and len(source) <= 256:
+            return source       # Short sources, such as xpath expressions, are cheaper to use as a key than to hash
+        elif isinstance(source, unicode):
+            source = source.encode("utf-8")
+        elif not isinstance(source, str):
+            source = json.dumps(source, sort_keys=True)
+
+        return hashlib.sha1(source).digest()
+
+
+registry = CompiledRegistry()
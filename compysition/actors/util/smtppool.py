@@ -0,0 +1,150 @@
+from gevent.lock import BoundedSemaphore
+from time import time
+import gevent.socket
+import smtplib
+import socket
+
+__all__ = ["SMTPConnectionPool"]
+
+
+class _SMTP(smtplib.SMTP):
+    """An SMTP session over a gevent socket, so that waiting on the server does not block other greenlets"""
+
+    def _get_socket(self, host, port, timeout):
+        return gevent.socket.create_connection((host, port), timeout)
+
+
+class _PooledConnection(object):
+
+    def __init__(self, smtp):
+        self.smtp = smtp
+        self.messages = 0
+        self.last_used = time()
+
+    def sendmail(self, from_address, to_addresses, message):
+        self.messages += 1
+        self.smtp.sendmail(from_address, to_addresses, message)
+
+
+class SMTPConnectionPool(object):
+    """
+    Keeps SMTP sessions open between messages, so that the TCP and SMTP handshake is not paid for every message.
+    At most 'size' sessions are used at the same time, a session that was idle for 'idle_timeout' seconds is closed instead of
+    reused, and a session is closed once it sent 'max_messages' messages. A session that turns out to be disconnected while
+    sending is replaced by a new session, and the message is sent once more.
+
+    Parameters:
+        host (str or tuple(str, int)):
+            | The SMTP server, either as "host", "host:port" or (host, port)
+        size (Optional[int]):
+            | The max amount of sessions that are open at the same time
+            | (Default: 1)
+        idle_timeout (Optional[float]):
+            | The amount of seconds after which an unused session is closed
+            | (Default: 60)
+        max_messages (Optional[int]):
+            | The amount of messages after which a session is closed and replaced. A value of None keeps sessions open indefinitely
+            | (Default: 100)
+        connect_timeout (Optional[float]):
+            | The socket timeout of a session
+            | (Default: socket._GLOBAL_DEFAULT_TIMEOUT)
+    """
+
+    DISCONNECT_ERRORS = (smtplib.SMTPServerDisconnected, socket.error)
+    SERVICE_NOT_AVAILABLE = 421
+
+    def __init__(self, host, size=1, idle_timeout=60, max_messages=100, connect_timeout=socket._GLOBAL_DEFAULT_TIMEOUT):
+        self.host, self.port = host if isinstance(host, tuple) else (host, 0)
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.max_messages = max_messages
+        self.connect_timeout = connect_timeout
+        self.__sessions = BoundedSemaphore(size)
+        self.__idle = []
+
+    def __len__(self):
+        """The amount of idle sessions"""
+        return len(self.__idle)
+
+    def sendmail(self, from_address, to_addresses, message):
+        """Sends a single message, raising the error that prevented it from being sent"""
+        error = self.sendmany([(from_address, to_addresses, message)])[0]
+        if error is not None:
+            raise error
+
+    def sendmany(self, messages):
+        """
+        Sends a list of (from_address, to_addresses, message) tuples over a single session, replacing the session whenever it
+        reaches 'max_messages' or is disconnected. Returns a list holding, for each message, None if it was sent or the error
+        that prevented it from being sent
+        """
+        results = []
+        with self.__sessions:
+            connection = None
+            try:
+                for from_address, to_addresses, message in messages:
+                    if connection is not None and self.max_messages and connection.messages >= self.max_messages:
+                        self.__close(connection)
+                        connection = None
+
+                    try:
+                        if connection is None:
+                            connection = self.__acquire()
+
+                        try:
+                            connection.sendmail(from_address, to_addresses, message)
+                        except Exception as err:
+                            if not self.__is_disconnect(err):
+                                raise
+
+                            self.__close(connection)
+                            connection = None
+                            connection = self.__connect()
+                            connection.sendmail(from_address, to_addresses, message)
+                    except Exception as err:
+                        if connection is not None and self.__is_disconnect(err):
+                            self.__close(connection)
+                            connection = None
+                        results.append(err)
+                    else:
+                        results.append(None)
+            finally:
+                if connection is not None:
+                    self.__release(connection)
+
+        return results
+
+    def close(self):
+        """Closes all idle sessions"""
+        while self.__idle:
+            self.__close(self.__idle.pop())
+
+    def __is_disconnect(self, err):
+        return isinstance(err, self.DISCONNECT_ERRORS) or getattr(err, "smtp_code", None) == self.SERVICE_NOT_AVAILABLE
+
+    def __acquire(self):
+        # Idle sessions are kept in order of last use, so expired sessions are always at the front
+        now = time()
+        while self.__idle and now - self.__idle[0].last_used >= self.idle_timeout:
+            self.__close(self.__idle.pop(0))
+
+        if self.__idle:
+            return self.__idle.pop()
+
+        return self.__connect()
+
+    def __release(self, connection):
+        if self.max_messages and connection.messages >= self.max_messages:
+            self.__close(connection)
+        else:
+            connection.last_used = time()
+            self.__idle.append(connection)
+
+    def __connect(self):
+        return _PooledConnection(_SMTP(self.host, self.port, timeout=self.connect_timeout))
+
+    def __close(self, connection):
+        try:
+            connection.smtp.quit()
+        except Exception:
+            connection.smtp.close()
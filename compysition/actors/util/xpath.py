@@ -1,31 +1,85 @@
 from lxml import etree
+from contextlib import contextmanager
+from compiled import CompiledRegistry
 import re
 
+_namespace_cache = None     # {id(xml): (xml, namespaces, namespaces_key)} while a namespace_scope is active
+_xpath_cache = CompiledRegistry(maxsize=1024)
+
+
+def _discover_namespaces(xml):
+    namespaces = {}
+
+    for key in xml.nsmap:
+        if key is None:
+            namespaces.update({"default": xml.nsmap[key]})
+        else:
+            namespaces.update({key: xml.nsmap[key]})
+
+    for element in xml.iterchildren("*"):
+        for key in element.nsmap:
+            if key is None:
+                namespaces.update({"default": element.nsmap[key]})
+            else:
+                namespaces.update({key: element.nsmap[key]})
+
+    return namespaces
+
+
+@contextmanager
+def namespace_scope():
+    """
+    Caches the namespaces discovered by XPathLookup while the block runs, e.g. while every filter of a router looks up
+    the same document. The block must not modify the looked up documents or yield to other greenlets. Documents are only
+    referenced by the cache until the outermost scope ends
+    """
+    global _namespace_cache
+    outermost = _namespace_cache is None
+    if outermost:
+        _namespace_cache = {}
+
+    try:
+        yield
+    finally:
+        if outermost:
+            _namespace_cache = None
+
+
+def _get_namespaces(xml):
+    """
+    Returns (namespaces, namespaces_key) for <xml>. Within a namespace_scope, namespaces are only discovered once per document.
+    The document is held in the cache alongside its namespaces, so that its id can not be reused by another document
+    """
+    cache = _namespace_cache
+    entry = cache.get(id(xml), None) if cache is not None else None
+    if entry is None or entry[0] is not xml:
+        namespaces = _discover_namespaces(xml)
+        entry = (xml, namespaces, tuple(sorted(namespaces.items())))
+        if cache is not None:
+            cache[id(xml)] = entry
+
+    return entry[1], entry[2]
+
+
+def _compile_xpath(xpath, namespaces):
+    if namespaces.get("default", None):
+        xpath = re.sub(r'\/(?!\/|([\w{0, }]\:[\w{0, }]))', r'/default:', xpath)
+
+    return etree.XPath(xpath, namespaces=namespaces)
+
+
 class XPathLookup(object):
     """
     Wrapper class that auto populates an xpath lookup with the default namespace, if defined by the provided xml.
     This is necessary because lxml does not take default namespaces into account with simple xpath lookups by default
+
+    Compiled xpath expressions are cached per expression and namespace map, so that lookups on similarly namespaced documents
+    are cheap. The discovered namespaces of a document are only cached within a namespace_scope
     """
 
     def __init__(self, xml):
         self.xml = xml
-        self.__initialize_namespaces(self.xml)
-
-    def __initialize_namespaces(self, xml):
-        self.namespaces = {}
-
-        for key in xml.nsmap:
-            if key is None:
-                self.namespaces.update({"default": xml.nsmap[key]})
-            else:
-                self.namespaces.update({key: xml.nsmap[key]})
-
-        for element in xml.iterchildren("*"):
-            for key in element.nsmap:
-                if key is None:
-                    self.namespaces.update({"default": element.nsmap[key]})
-                else:
-                    self.namespaces.update({key: element.nsmap[key]})
+        self.namespaces, self.__namespaces_key = _get_namespaces(xml)
 
     def lookup(self, xpath):
         """
@@ -65,7 +119,5 @@ class XPathLookup(object):
                 It will not, at this time, recursively check for each child nodes default ns and map accordingly
         """
 
-        if self.namespaces.get("default", None):
-            xpath = re.sub(r'\/(?!\/|([\w{0, }]\:[\w{0, }]))', r'/default:', xpath)
-
-        return self.xml.xpath(xpath, namespaces=self.namespaces)
\ No newline at end of file
+        compiled = _xpath_cache.get(self.__namespaces_key, xpath, lambda xpath: _compile_xpath(xpath, self.namespaces))
+        return compiled(self.xml)
\ No newline at end of file
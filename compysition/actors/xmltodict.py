@@ -34,7 +34,8 @@ class XMLToDict(Actor):
 
     def consume(self, event, *args, **kwargs):
         try:
-            event = event.convert(JSONEvent)
+            event.detached_data()
+            event = self.offload(event.convert, JSONEvent)
             if self.flatten:
                 event.data = event.data[event.data.keys()[0]]
         except Exception as err:
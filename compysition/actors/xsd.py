@@ -23,8 +23,10 @@
 
 from compysition import Actor
 from lxml import etree
+from threading import local
 from compysition.event import XMLEvent
 from compysition.errors import MalformedEventData
+from util import registry
 
 class XSD(Actor):
     '''**A simple actor which applies a provided XSD to an incoming event XML data. If no XSD is defined, it will validate XML format correctness**
@@ -49,24 +51,54 @@ class XSD(Actor):
 
     def __init__(self, name, xsd=None, *args, **kwargs):
         super(XSD, self).__init__(name, *args, **kwargs)
+        self.xsd = xsd
         if xsd:
-            self.schema = etree.XMLSchema(etree.XML(xsd))
+            self.schema = registry.xml_schema(xsd)
         else:
             self.schema = None
 
+        self.__thread_schemas = local()
+
     def consume(self, event, *args, **kwargs):
         try:
-
             if self.schema:
-                self.schema.assertValid(event.data)
+                messages, event.data = self.offload(self.validate, event, event.detached_data())
+                if messages:
+                    self.process_error(messages, event)
+
             self.logger.info("Incoming XML successfully validated", event=event)
             self.send_event(event)
-        except etree.DocumentInvalid as xml_errors:
-            messages = [message.message for message in xml_errors.error_log.filter_levels([1, 2])]
-            self.process_error(messages, event)
+        except MalformedEventData:
+            raise
         except Exception as error:
             self.process_error(error, event)
 
+    def validate(self, event, data):
+        """
+        Validates <data>, the detached data of <event> (See Event.detached_data), which is parsed first if it is still unparsed.
+        Returns a list of validation error messages, which is empty if the data is valid, and the parsed data
+        """
+        data = event.parse_data(data)
+        schema = self.__get_schema()
+        if schema.validate(data):
+            return [], data
+
+        return [message.message for message in schema.error_log.filter_levels([1, 2])], data
+
+    def __get_schema(self):
+        """
+        Returns the schema for the calling thread. The error log of a schema holds the errors of its last validation, so
+        a schema that is shared between threads may report the errors of another validation
+        """
+        if self.threadpool is None:
+            return self.schema
+
+        schema = getattr(self.__thread_schemas, "schema", None)
+        if schema is None:
+            schema = self.__thread_schemas.schema = etree.XMLSchema(etree.XML(self.xsd))
+
+        return schema
+
     def process_error(self, message, event):
         self.logger.error("Error validating incoming XML: {0}".format(message), event=event)
         raise MalformedEventData(message)
@@ -25,8 +25,10 @@ from compysition import Actor
 from lxml import etree
 from lxml.etree import XSLTApplyError
 import traceback
+import logging
 from compysition.event import XMLEvent
 from compysition.errors import MalformedEventData
+from util import registry
 
 class XSLT(Actor):
     '''**A sample module which applies a provided XSLT to an incoming event XML data**
@@ -55,13 +57,16 @@ class XSLT(Actor):
         if xslt is None and not isinstance(xslt, str):
             raise TypeError("Invalid xslt defined. {_type} is not a valid xslt. Expected 'str'".format(_type=type(xslt)))
         else:
-            self.template = etree.XSLT(etree.XML(xslt))
+            self.template = registry.xslt(xslt)
 
     def consume(self, event, *args, **kwargs):
         try:
-            self.logger.debug("In: {data}".format(data=event.data_string().replace('\n', '')), event=event)
-            event.data = self.transform(event.data)
-            self.logger.debug("Out: {data}".format(data=event.data_string().replace('\n', '')), event=event)
+            debug = self.logger.is_enabled_for(logging.DEBUG)
+            if debug:
+                self.logger.debug("In: {data}".format(data=event.data_string().replace('\n', '')), event=event)
+            event.data = self.offload(self.transform_event, event, event.detached_data())
+            if debug:
+                self.logger.debug("Out: {data}".format(data=event.data_string().replace('\n', '')), event=event)
             self.logger.info("Successfully transformed XML", event=event)
             self.send_event(event)
         except XSLTApplyError as err:
@@ -77,4 +82,8 @@ class XSLT(Actor):
         raise MalformedEventData("Malformed Request: Invalid XML")
 
     def transform(self, etree_element):
-        return self.template(etree_element).getroot()
\ No newline at end of file
+        return self.template(etree_element).getroot()
+
+    def transform_event(self, event, data):
+        """Transforms <data>, the detached data of <event> (See Event.detached_data), which is parsed first if it is still unparsed"""
+        return self.transform(event.parse_data(data))
\ No newline at end of file
@@ -24,8 +24,8 @@
 from compysition import Actor
 import zmq.green as zmq
 from gevent.queue import Queue
+from compysition.event import PickleEventCodec
 import socket
-import cPickle as pickle
 import abc
 
 DEFAULT_PORT = 9000
@@ -63,6 +63,10 @@ class _ZMQ(Actor):
         mode (Optional[str]):
             | The mode for the socket to use. (bind|connect)
             | Default: connect
+        codec (Optional[compysition.event.EventCodec]):
+            | The wire format used to transport events. Both ends of a connection must use the same codec.
+            | compysition.event.BinaryEventCodec is faster and safe with untrusted peers, but requires JSON serializable event properties
+            | Default: compysition.event.PickleEventCodec()
 
     Abstract Properties:
         protocol (zmq.PROTOCOL)
@@ -85,9 +89,10 @@ class _ZMQ(Actor):
     def protocol(self, protocol):
         self._protocol = protocol
 
-    def __init__(self, name, port=DEFAULT_PORT, transmission_protocol=TCP, socket_file=None, host=None, mode="connect", *args, **kwargs):
+    def __init__(self, name, port=DEFAULT_PORT, transmission_protocol=TCP, socket_file=None, host=None, mode="connect", codec=None, *args, **kwargs):
         super(_ZMQ, self).__init__(name, *args, **kwargs)
         self.blockdiag_config["shape"] = "cloud"
+        self.codec = codec or PickleEventCodec()
         self.port = port
         self.host = host or socket.gethostbyname(socket.gethostname())
         self.mode = mode
@@ -149,7 +154,7 @@ class _ZMQOut(_ZMQ):
 
             if event is not None:
                 try:
-                    self.socket.send(pickle.dumps(event))
+                    self.socket.send_multipart(self.codec.encode(event), copy=False)
                 except Exception as err:
                     self.logger.error("Unable to send event over ZMQ: {err}".format(err=err), event=event)
 
@@ -179,9 +184,13 @@ class _ZMQIn(_ZMQ):
                 break
 
             if items:
-                event = self.socket.recv_multipart()
-                event = pickle.loads(event[0])
-                self.send_event(event)
+                frames = self.socket.recv_multipart(copy=False)
+                try:
+                    event = self.codec.decode(frames)
+                except Exception as err:
+                    self.logger.error("Received invalid event format: {err}".format(err=err))
+                else:
+                    self.send_event(event)
 
 
 class ZMQPush(_ZMQOut):
@@ -22,21 +22,119 @@
 #
 
 from compysition.actors import Null, STDOUT, EventLogger
-from compysition.errors import ActorInitFailure
-from gevent import signal as gsignal, event
+from compysition.errors import ActorInitFailure, SetupError
+from compysition.event import PickleEventCodec
+from compysition.ipc import IPCQueue, IPCReceiver
+from compysition.metrics import MetricsRegistry
+from compysition.profiler import SamplingProfiler
+from compysition.watchdog import HubWatchdog
+from compysition.tracing import Tracer
+from gevent import signal as gsignal, event, fork
+import gevent.os
+import zmq.green as zmq
 import signal
+import logging
 import os
+import tempfile
 import traceback
+import time
+import urlparse
+from uuid import uuid4 as uuid
 from compysition.actor import Actor
 
 class Director(object):
 
-    def __init__(self, size=500, name="default", generate_blockdiag=True, blockdiag_dir="./build/blockdiag"):
+    """
+    Parameters:
+        size (Optional[int]):
+            | The max amount of events any queue of a created actor may contain
+            | Default: 500
+        name (Optional[str]):
+            | The name of this director
+            | Default: default
+        generate_blockdiag (Optional[bool]):
+            | Define if a blockdiag of the actor connections should be written on start
+            | Default: True
+        blockdiag_dir (Optional[str]):
+            | The directory to write the blockdiag to
+            | Default: ./build/blockdiag
+        copy_on_write (Optional[bool]):
+            | The default 'copy_on_write' setting of created actors (See Actor)
+            | Default: False
+        ipc_codec (Optional[compysition.event.EventCodec]):
+            | The codec used to send events to and from actors that run in another process (See register_process).
+            | Pickle is safe here, as the same code runs on both ends of the fork
+            | Default: compysition.event.PickleEventCodec()
+        ipc_dir (Optional[str]):
+            | The directory to create the ipc socket files of queues between processes in
+            | Default: tempfile.gettempdir()
+        log_level (Optional[int or str]):
+            | The default 'log_level' of created actors (See Actor). Messages below this level are dropped by the actor that
+            | logs them, instead of by the log actor
+            | Default: logging.NOTSET
+        metrics_address (Optional[tuple]):
+            | A (host, port) tuple to serve the metrics of all actors on, in the Prometheus text format (See compysition.metrics).
+            | The metrics are collected in 'metrics' either way, and only cover actors that run in the main process.
+            | The same server answers '/profile?seconds=<n>' with the collapsed stacks of a profile of <n> seconds (Default: 10)
+            | Default: None
+        profiler_signal (Optional[int]):
+            | A signal that starts the profiler of the main process (See SamplingProfiler), and stops it when received again.
+            | Once stopped, the samples are written as collapsed stacks to 'profile_dir'.
+            | On Python 2, the SIGPROF timer of the running profiler may interrupt blocking system calls in offload threads
+            | and C extensions, which then fail with EINTR
+            | Default: None
+        profile_dir (Optional[str]):
+            | The directory to write profiles to
+            | Default: ./build/profile
+        profile_interval (Optional[float]):
+            | The seconds of CPU time between two profiler samples
+            | Default: 0.005
+        hub_block_threshold (Optional[float]):
+            | If set, a HubWatchdog reports every time the gevent hub of the main process is blocked for longer than this amount
+            | of seconds. The stack that blocked it is logged by the actor whose consume call it belongs to, or by the log actor,
+            | and the block is counted in 'metrics'
+            | Default: None
+        trace_sample_rate (Optional[float]):
+            | The fraction of events to trace once a trace actor is registered (See register_trace_actor and compysition.tracing.Tracer)
+            | Default: 0.01
+        trace_batch_size (Optional[int]):
+            | The amount of finished traces sent to the trace actor in a single event
+            | Default: 100
+        trace_flush_interval (Optional[float]):
+            | The max amount of seconds a finished trace waits before it is sent to the trace actor
+            | Default: 1
+    """
+
+    def __init__(self, size=500, name="default", generate_blockdiag=True, blockdiag_dir="./build/blockdiag", copy_on_write=False, ipc_codec=None, ipc_dir=None, log_level=logging.NOTSET, metrics_address=None,
+                 profiler_signal=None, profile_dir="./build/profile", profile_interval=0.005,
+                 hub_block_threshold=None, trace_sample_rate=0.01, trace_batch_size=100, trace_flush_interval=1):
         gsignal(signal.SIGINT, self.stop)
         gsignal(signal.SIGTERM, self.stop)
         self.name = name
         self.actors = {}
         self.size = size
+        self.copy_on_write = copy_on_write
+        self.log_level = log_level
+        self.ipc_codec = ipc_codec or PickleEventCodec()
+        self.ipc_dir = ipc_dir or tempfile.gettempdir()
+        self.processes = {}
+        self.__process = None
+        self.__children = {}
+        self.__ipc_queues = []
+        self.__ipc_receivers = []
+        self.metrics = MetricsRegistry()
+        self.metrics_address = metrics_address
+        self.__metrics_server = None
+        self.profiler = SamplingProfiler(interval=profile_interval)
+        self.profile_dir = profile_dir
+        if profiler_signal:
+            gsignal(profiler_signal, self.toggle_profiler)
+        self.watchdog = HubWatchdog(threshold=hub_block_threshold, report=self.__report_hub_block) if hub_block_threshold else None
+        self.trace_sample_rate = trace_sample_rate
+        self.trace_batch_size = trace_batch_size
+        self.trace_flush_interval = trace_flush_interval
+        self.tracer = None
+        self.trace_actor = None
 
         self.log_actor = self.__create_actor(STDOUT, "default_stdout")
         self.error_actor = self.__create_actor(EventLogger, "default_error_logger")
@@ -168,6 +266,29 @@ class Director(object):
             self.blockdiag_out += "]\n"
         return actor
 
+    def register_process(self, name, *actors):
+        """
+        Pins <actors> (Actor instances or actor names) to a child process called <name>, which is forked on start().
+        Actors pinned to the same process share that process, and all other actors run in the main process.
+
+        Queues are connected with connect_queue as usual. Once the processes are forked, every queue between actors
+        of different processes is replaced on the sending actor by an IPCQueue, which sends events over a ZeroMQ ipc socket
+        to the process of the receiving actor. As the log and error actors run in the main process, logs and errors of
+        pinned actors are routed to them the same way.
+
+        Events crossing a process are encoded with 'ipc_codec', so all of their attributes must be supported by it.
+        Pinned actors are forked after they are created, so they must not open sockets or ZeroMQ contexts in __init__.
+
+        If a child process exits while the Director is running, its exit status and any error are logged through the log
+        actor, and the Director is stopped, as events can no longer reach the actors of that process
+        """
+        for actor in actors:
+            actor_name = actor.name if isinstance(actor, Actor) else actor
+            if actor_name not in self.actors:
+                raise SetupError("Actor '{actor}' must be registered before it is pinned to a process".format(actor=actor_name))
+
+            self.processes[actor_name] = name
+
     def register_log_actor(self, actor, name, *args, **kwargs):
         """Initialize a log actor for the director instance"""
         self.log_actor = self.__create_actor(actor, name, *args, **kwargs)
@@ -177,7 +298,19 @@ class Director(object):
         self.error_actor = self.__create_actor(actor, name, *args, **kwargs)
         return self.error_actor
 
+    def register_trace_actor(self, actor, name, *args, **kwargs):
+        """
+        Initialize a trace actor for the director instance, which enables tracing. The trace actor receives batches of finished
+        traces on its 'traces' inbound queue (See compysition.tracing.Tracer).
+        Actors pinned to a child process are not traced
+        """
+        self.trace_actor = self.__create_actor(actor, name, *args, **kwargs)
+        self.tracer = Tracer(sample_rate=self.trace_sample_rate, batch_size=self.trace_batch_size, flush_interval=self.trace_flush_interval)
+        return self.trace_actor
+
     def __create_actor(self, actor, name, *args, **kwargs):
+        kwargs.setdefault("copy_on_write", self.copy_on_write)
+        kwargs.setdefault("log_level", self.log_level)
         return actor(name, size=self.size, *args, **kwargs)
 
     def _setup_default_connections(self):
@@ -196,19 +329,41 @@ class Director(object):
         self.log_actor.connect_log_queue(source_queue_name="logs", destination=self.log_actor, check_existing=False)
         self.error_actor.connect_log_queue(source_queue_name="logs", destination=self.log_actor, check_existing=False)
 
+        if self.trace_actor is not None:
+            for actor in self.actors.values() + [self.error_actor]:
+                if actor.tracer is None:
+                    actor.tracer = self.tracer
+
+            self.trace_actor.register_consumer("traces", self.tracer.queue)
+            self.trace_actor.connect_log_queue(source_queue_name="logs", destination=self.log_actor, check_existing=False)
+
     def is_running(self):
         return self.__running
 
     def start(self, block=True):
-        '''Starts all registered actors.'''
+        '''Starts all registered actors, forking a child process for every registered process.'''
         self.__running = True
         self._setup_default_connections()
 
-        for actor in self.actors.values():
+        if self.processes:
+            self.__fork_processes()
+
+        for actor in self.__get_process_actors(None):
             actor.start()
+            self.metrics.register(actor)
 
         self.log_actor.start()
         self.error_actor.start()
+        self.metrics.register(self.log_actor)
+        self.metrics.register(self.error_actor)
+        if self.trace_actor is not None:
+            self.trace_actor.start()
+            self.tracer.start()
+            self.metrics.register(self.trace_actor)
+        if self.metrics_address:
+            self.__metrics_server = self.metrics.serve(self.metrics_address, app=self.__admin_app)
+        if self.watchdog is not None:
+            self.watchdog.start()
 
         if self.generate_blockdiag:
             self.finalize_blockdiag()
@@ -220,11 +375,219 @@ class Director(object):
         self.__block.wait()
 
     def stop(self):
-        '''Stops all input actors.'''
+        '''Stops all input actors, and all child processes.'''
 
-        for actor in self.actors.values():
+        for actor in self.__get_process_actors(self.__process):
             actor.stop()
 
-        self.log_actor.stop()
+        if self.__process is None:
+            if self.trace_actor is not None:
+                self.tracer.stop()
+                self.trace_actor.stop()
+            self.log_actor.stop()
+            self.__stop_processes()
+            if self.__metrics_server is not None:
+                self.__metrics_server.stop()
+                self.__metrics_server = None
+
+        self.__close_ipc()
+        self.profiler.stop()
+        if self.watchdog is not None:
+            self.watchdog.stop()
         self.__running = False
-        self.__block.set()
\ No newline at end of file
+        self.__block.set()
+
+    def start_profiler(self):
+        self.profiler.start()
+
+    def stop_profiler(self):
+        """Stops the profiler and writes its samples to a new file in 'profile_dir', whose path is returned"""
+        self.profiler.stop()
+        path = "{0}{1}{2}-{3}.collapsed".format(self.profile_dir, os.sep, self.name, time.strftime("%Y%m%d%H%M%S"))
+        self.profiler.write(path)
+        self.log_actor.logger.info("Profile written to {path}".format(path=path))
+        return path
+
+    def toggle_profiler(self):
+        if self.profiler.running:
+            self.stop_profiler()
+        else:
+            self.start_profiler()
+
+    def __report_hub_block(self, actor_name, seconds, stack):
+        self.metrics.record_hub_block(actor_name, seconds)
+        actor = self.get_actor(actor_name) if actor_name else None
+        if actor is not None:
+            actor.logger.warning("Blocked the event loop for {0} ms in:\n{1}".format(int(seconds * 1000), stack))
+        else:
+            self.log_actor.logger.warning("The event loop was blocked for {0} ms outside of any consume call in:\n{1}".format(int(seconds * 1000), stack))
+
+    def __admin_app(self, environ, start_response):
+        if environ.get("PATH_INFO", "").rstrip("/") != "/profile":
+            return self.metrics.wsgi_app(environ, start_response)
+
+        if self.profiler.running:
+            start_response("409 Conflict", [("Content-Type", "text/plain")])
+            return ["The profiler is already running\n"]
+
+        try:
+            seconds = float(urlparse.parse_qs(environ.get("QUERY_STRING", "")).get("seconds", [10])[0])
+        except ValueError:
+            start_response("400 Bad Request", [("Content-Type", "text/plain")])
+            return ["'seconds' must be a number\n"]
+
+        self.profiler.start()
+        try:
+            gevent.sleep(seconds)
+        finally:
+            self.profiler.stop()
+
+        body = self.profiler.collapsed()
+        start_response("200 OK", [("Content-Type", "text/plain"), ("Content-Length", str(len(body)))])
+        return [body]
+
+    def __get_process_actors(self, process):
+        return [actor for actor in self.actors.values() if self.processes.get(actor.name, None) == process]
+
+    def __fork_processes(self):
+        links = self.__get_ipc_links()
+        for process in sorted(set(self.processes.values())):
+            error_read, error_write = os.pipe()
+            pid = fork()
+            if pid == 0:
+                os.close(error_read)
+                self.__run_process(process, links, error_write)
+            os.close(error_write)
+            self.__children[pid] = (process, error_read)
+
+        self.__connect_ipc(None, links)
+        for pid in self.__children.keys():
+            gevent.spawn(self.__watch_process, pid)
+
+    def __run_process(self, process, links, error_pipe):
+        """
+        Runs the actors pinned to <process> in a forked child, until the child is stopped. Never returns.
+        A failure is written to <error_pipe> for the main process to log, as the log actor does not run in this process
+        """
+        self.__process = process
+        self.__children = {}
+        exit_code = 0
+        try:
+            self.__connect_ipc(process, links)
+            for actor in self.__get_process_actors(process):
+                actor.tracer = None     # Nothing in this process consumes the tracer queue, which would grow unbounded
+                actor.start()
+
+            self.block()
+        except Exception:
+            exit_code = 1
+            try:
+                os.write(error_pipe, traceback.format_exc()[-16384:])      # Fits the pipe buffer, so this never blocks
+            except OSError:
+                pass
+        finally:
+            os._exit(exit_code)
+
+    def __watch_process(self, pid):
+        """Waits for the child process <pid> to exit. If it was not stopped by the Director, the exit is logged and the Director is stopped"""
+        try:
+            status = gevent.os.waitpid(pid, 0)[1]
+        except OSError:
+            status = None
+
+        child = self.__children.pop(pid, None)
+        if child is None:
+            return      # Stopped by __stop_processes
+
+        process, error_pipe = child
+        error = self.__read_error(error_pipe)
+        if status is not None and os.WIFSIGNALED(status):
+            reason = "was killed by signal {0}".format(os.WTERMSIG(status))
+        else:
+            reason = "exited with status {0}".format(os.WEXITSTATUS(status) if status is not None else "unknown")
+
+        self.log_actor.logger.error("Process '{process}' {reason}. Stopping the director{error}".format(
+            process=process, reason=reason, error=": {0}".format(error) if error else ""))
+        with gevent.Timeout(1, False):
+            # Lets the log actor write the error before it is stopped
+            for queue in self.log_actor.pool.inbound.values():
+                queue.wait_until_empty()
+        self.stop()
+
+    @staticmethod
+    def __read_error(error_pipe):
+        chunks = []
+        try:
+            chunk = os.read(error_pipe, 65536)
+            while chunk:
+                chunks.append(chunk)
+                chunk = os.read(error_pipe, 65536)
+        except OSError:
+            pass
+        finally:
+            os.close(error_pipe)
+
+        return "".join(chunks)
+
+    def __get_ipc_links(self):
+        """
+        Finds all queues between actors that run in different processes.
+        Returns a list of (queue, consumer, producers, address), where producers is a list of (actor, pool_scope, queue_key)
+        """
+        actors = self.actors.values() + [self.log_actor, self.error_actor]
+        consumers = {}
+        producers = {}
+        for actor in actors:
+            for queue in actor.pool.inbound.values():
+                consumers[id(queue)] = (queue, actor)
+
+            for pool_scope in (actor.pool.outbound, actor.pool.error, actor.pool.logs):
+                for key, queue in pool_scope.items():
+                    producers.setdefault(id(queue), []).append((actor, pool_scope, key))
+
+        links = []
+        for queue_id, (queue, consumer) in consumers.items():
+            consumer_process = self.processes.get(consumer.name, None)
+            queue_producers = producers.get(queue_id, [])
+            if any(self.processes.get(actor.name, None) != consumer_process for actor, pool_scope, key in queue_producers):
+                address = "ipc://{dir}{sep}compysition-{name}-{id}.ipc".format(dir=self.ipc_dir, sep=os.sep, name=self.name, id=uuid().get_hex())
+                links.append((queue, consumer, queue_producers, address))
+
+        return links
+
+    def __connect_ipc(self, process, links):
+        """Binds the receivers of queues consumed in <process>, and replaces queues that leave <process> with IPCQueues"""
+        context = zmq.Context()
+        for queue, consumer, producers, address in links:
+            if self.processes.get(consumer.name, None) == process:
+                receiver = IPCReceiver(address, queue, self.ipc_codec, consumer.logger)
+                receiver.start(context)
+                self.__ipc_receivers.append(receiver)
+            else:
+                ipc_queue = None
+                for actor, pool_scope, key in producers:
+                    if self.processes.get(actor.name, None) == process:
+                        if ipc_queue is None:
+                            ipc_queue = IPCQueue(queue.name, address, self.ipc_codec, maxsize=queue.maxsize)
+                            ipc_queue.connect(context)
+                            self.__ipc_queues.append(ipc_queue)
+                        pool_scope[key] = ipc_queue
+
+    def __close_ipc(self):
+        for ipc_queue in self.__ipc_queues:
+            ipc_queue.close()
+
+        for receiver in self.__ipc_receivers:
+            receiver.stop()
+
+        self.__ipc_queues, self.__ipc_receivers = [], []
+
+    def __stop_processes(self):
+        children, self.__children = self.__children, {}
+        for pid, (process, error_pipe) in children.items():
+            try:
+                os.kill(pid, signal.SIGTERM)
+                gevent.os.waitpid(pid, 0)
+            except OSError:
+                pass
+            os.close(error_pipe)
\ No newline at end of file
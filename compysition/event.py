@@ -32,6 +32,13 @@ from xml.sax.saxutils import XMLGenerator
 import re
 from copy import deepcopy
 from datetime import datetime
+from weakref import WeakSet
+from itertools import count
+from time import time, mktime
+from os import getpid
+import cPickle as pickle
+import struct
+import abc
 
 """
 Compysition event is created and passed by reference among actors
@@ -60,6 +67,124 @@ def remove_internal_xmlify(_json):
     return _json
 
 
+class _UnsupportedDirectConversion(Exception):
+    """Raised when data can not be converted between XML and JSON without the xmltodict string round trip"""
+
+
+def _push_json_value(item, key, value):
+    if key in item:
+        existing = item[key]
+        if isinstance(existing, list):
+            existing.append(value)
+        else:
+            item[key] = [existing, value]
+    else:
+        item[key] = value
+
+
+def _element_to_json(element):
+    """Mirrors the xmltodict.parse result for a single namespace free element"""
+    if element.nsmap:
+        raise _UnsupportedDirectConversion()
+
+    item = None
+    if element.attrib:
+        item = OrderedDict(("@" + key, value) for key, value in element.attrib.items())
+
+    text = [element.text] if element.text else []
+    for child in element:
+        if not isinstance(child.tag, basestring):
+            raise _UnsupportedDirectConversion()
+        if item is None:
+            item = OrderedDict()
+        _push_json_value(item, child.tag, _element_to_json(child))
+        if child.tail:
+            text.append(child.tail)
+
+    text = "".join(text).strip() or None
+    if item is not None:
+        if text:
+            _push_json_value(item, "#text", text)
+        return item
+
+    return text
+
+
+def _json_to_elements(key, value, parent=None):
+    """Mirrors the xmltodict.unparse output for a single key and value, building the elements directly"""
+    if not hasattr(value, "__iter__") or isinstance(value, (basestring, dict)):
+        value = [value]
+    elif parent is None and len(value) > 1:
+        raise _UnsupportedDirectConversion()
+
+    if not value:
+        raise _UnsupportedDirectConversion()
+
+    element = None
+    for item in value:
+        if item is None:
+            item = {}
+        elif isinstance(item, bool):
+            item = u"true" if item else u"false"
+        elif not isinstance(item, dict):
+            item = unicode(item)
+        if isinstance(item, basestring):
+            item = {"#text": item}
+
+        element = etree.Element(key) if parent is None else etree.SubElement(parent, key)
+        text = None
+        for item_key, item_value in item.items():
+            if item_key == "#text":
+                text = item_value
+            elif item_key.startswith("@"):
+                if item_key == "@xmlns":
+                    raise _UnsupportedDirectConversion()
+                element.set(item_key[1:], unicode(item_value))
+            else:
+                _json_to_elements(item_key, item_value, element)
+
+        if text:
+            if text.lstrip().startswith("<"):
+                # Possibly embedded XML, which UnescapedDictXMLGenerator writes unescaped
+                raise _UnsupportedDirectConversion()
+            if len(element):
+                element[-1].tail = text
+            else:
+                element.text = text
+
+    return element
+
+
+def xml_to_json(data):
+    """
+    Converts XML event data to JSON event data. Namespace free elements are converted directly, anything else is serialized
+    and parsed with xmltodict
+    """
+    if isinstance(data, etree._Element):
+        try:
+            return remove_internal_xmlify(OrderedDict([(data.tag, _element_to_json(data))]))
+        except _UnsupportedDirectConversion:
+            pass
+
+    return remove_internal_xmlify(xmltodict.parse(etree.tostring(data), expat=expat))
+
+
+def json_to_xml(data):
+    """
+    Converts JSON event data to XML event data. Elements are built directly where possible, anything else is serialized
+    with xmltodict and parsed
+    """
+    data = internal_xmlify(data)
+    if len(data) == 1:
+        try:
+            return _json_to_elements(*data.items()[0])
+        except (_UnsupportedDirectConversion, AttributeError, ValueError, TypeError):
+            # The xmltodict path either handles the data or raises the error the data has always raised
+            pass
+
+    return etree.fromstring(xmltodict.unparse(data).encode('utf-8'))
+
+
 class NullLookupValue(object):
 
     def get(self, key, value=None):
@@ -87,12 +212,87 @@ _XML_TYPES = [etree._Element, etree._ElementTree, etree._XSLTResultTree]
 _JSON_TYPES = [dict, list, OrderedDict]
 
 
+class _EventIdGenerator(object):
+    """
+    Generates unique 32 character hex event IDs from a random per-process prefix and a counter, which is far cheaper than
+    generating a uuid4 for every event. The prefix is regenerated whenever the process ID changes, so that forked processes
+    never hand out the same IDs
+    """
+
+    def __init__(self):
+        self.__pid = None
+
+    def next(self):
+        pid = getpid()
+        if pid != self.__pid:
+            self.__pid = pid
+            self.__prefix = uuid().get_hex()[:20]
+            self.__counter = count()
+
+        return "{0}{1:012x}".format(self.__prefix, next(self.__counter))
+
+_event_ids = _EventIdGenerator()
+_state_slots = {}
+_conversion_plans = {}
+
+
+def _get_state_slots(cls):
+    """Returns the names of all slots holding event state for the provided event class, including inherited slots"""
+    try:
+        return _state_slots[cls]
+    except KeyError:
+        slots = tuple(slot for klass in cls.__mro__ for slot in getattr(klass, "__slots__", ()) if slot not in ("__dict__", "__weakref__"))
+        _state_slots[cls] = slots
+        return slots
+
+
+class UnparsedData(object):
+    """
+    Wraps event data that is still in its raw serialized (str) form. Setting an UnparsedData as event data defers parsing
+    of the raw data until event.data is first read, and data_string() returns the raw data without a reparse as long as
+    event.data was never read.
+
+    Note that malformed raw data is only detected once event.data is read, which then raises InvalidEventDataModification
+
+    e.g. XMLEvent(data=UnparsedData(request_body))
+    """
+
+    __slots__ = ("raw", )
+
+    def __init__(self, raw):
+        self.raw = raw
+
+    def __str__(self):
+        return str(self.raw)
+
+    def __deepcopy__(self, memo):
+        return self         # The raw data is immutable
+
+
+class _SharedData(object):
+    """
+    Holds event data that is shared between copy-on-write copies of an event (See Event.shared_copy).
+    Every event that still references the shared data is tracked as an owner, so that the last remaining owner can take the data without copying it
+    """
+
+    def __init__(self, data):
+        self.data = data
+        self.owners = WeakSet()
+
+    def release(self, event):
+        """Returns a private instance of the shared data for 'event'. A copy is only made if other events still share the data"""
+        self.owners.discard(event)
+        if len(self.owners) > 0:
+            return deepcopy(self.data)
+        return self.data
+
+
 class DataFormatInterface(object):
     """
     Interface used as an identifier for data format classes. Used during event type conversion
     To create a new datatype, simply implement this interface on the newly created class
     """
-    pass
+    __slots__ = ()
 
 
 class Event(object):
@@ -105,18 +305,28 @@ class Event(object):
         - data:     <The data passed and worked on from event to event. Mutable and variable>
         - kwargs:   All other kwargs passed upon Event instantiation will be added to the event dictionary
 
+    The fixed event properties are held in __slots__, while any additional properties are stored in the instance dictionary,
+    which is only allocated once an additional property is set. The event_id is generated on first access, and 'created'
+    is stored as a timestamp that is only converted to a datetime on access
+
+    'trace' is None unless the event is sampled for tracing (See compysition.tracing.Tracer)
     """
 
+    __slots__ = ("_event_id", "_meta_id", "service", "_data", "_error", "_created", "__dict__", "__weakref__")
+
     _content_type = "text/plain"
+    _shared_data = None
+    trace = None
 
     def __init__(self, meta_id=None, service=None, data=None, *args, **kwargs):
-        self.event_id = uuid().get_hex()
-        self.meta_id = meta_id if meta_id else self.event_id
+        self._event_id = None
+        self._meta_id = meta_id
+        self._created = time()
         self.service = service or DEFAULT_EVENT_SERVICE
         self.data = data
         self.error = None
-        self.created = datetime.now()
-        self.__dict__.update(kwargs)
+        if kwargs:
+            self.__dict__.update(kwargs)
 
     def set(self, key, value):
         try:
@@ -133,12 +343,28 @@ class Event(object):
 
     @property
     def data(self):
+        if self._shared_data is not None:
+            self._data = self._shared_data.release(self)
+            self._shared_data = None
+
+        if self._data.__class__ is UnparsedData:
+            self._data = self._convert(self._data.raw)
+
         return self._data
 
     @data.setter
     def data(self, data):
+        if self._shared_data is not None:
+            self._shared_data.owners.discard(self)
+            self._shared_data = None
+
+        self._data = self._convert(data)
+
+    def _convert(self, data, converter=None):
         try:
-            self._data = self.conversion_methods[data.__class__](data)
+            if converter is None:
+                converter = self.conversion_methods[data.__class__]
+            return converter(data)
         except KeyError:
             raise InvalidEventDataModification("Data of type '{_type}' was not valid for event type {cls}: {err}".format(_type=type(data),
                                                                                           cls=self.__class__, err=traceback.format_exc()))
@@ -149,14 +375,29 @@ class Event(object):
 
     @property
     def event_id(self):
+        if self._event_id is None:
+            self._event_id = _event_ids.next()
         return self._event_id
 
     @event_id.setter
     def event_id(self, event_id):
-        if self.get("_event_id", None):
-            raise InvalidEventDataModification("Cannot alter event_id once it has been set. A new event must be created")
-        else:
-            self._event_id = event_id
+        raise InvalidEventDataModification("Cannot alter event_id once it has been set. A new event must be created")
+
+    @property
+    def meta_id(self):
+        return self._meta_id or self.event_id
+
+    @meta_id.setter
+    def meta_id(self, meta_id):
+        self._meta_id = meta_id
+
+    @property
+    def created(self):
+        return datetime.fromtimestamp(self._created)
+
+    @created.setter
+    def created(self, created):
+        self._created = mktime(created.timetuple()) + created.microsecond / 1000000.0
 
     def lookup(self, path):
         """
@@ -175,14 +416,31 @@ class Event(object):
         Gets a dictionary of all event properties except for event.data
         Useful when event data is too large to copy in a performant manner
         """
-        return {k: v for k, v in self.__dict__.items() if k != "data" and k != "_data"}
+        properties = {k: v for k, v in self._get_state().items() if k not in ("_data", "_shared_data")}
+        properties["meta_id"] = properties.pop("_meta_id") or self.event_id
+        properties["created"] = datetime.fromtimestamp(properties.pop("_created"))
+        return properties
+
+    def _get_state(self):
+        """Gets a dictionary of the raw values of all slotted and additional event properties"""
+        self.event_id   # The event_id is generated lazily, and must exist before an event is copied or serialized
+        state = {slot: getattr(self, slot) for slot in _get_state_slots(self.__class__) if hasattr(self, slot)}
+        state.update(self.__dict__)
+        return state
+
+    def _set_state(self, state):
+        for key, value in state.items():
+            object.__setattr__(self, key, value)
 
     def __getstate__(self):
-        return dict(self.__dict__)
+        state = self._get_state()
+        state.pop("_shared_data", None)
+        return state
 
     def __setstate__(self, state):
-        self.__dict__ = state
-        self.data = state['_data']
+        unparsed = state.pop('_data_unparsed', False)
+        self._set_state(state)
+        self.data = UnparsedData(state['_data']) if unparsed else state['_data']
         self.error = state.get('_error', None)
 
     def __str__(self):
@@ -222,34 +480,69 @@ class Event(object):
     def data_string(self):
         return str(self.data)
 
-    def convert(self, convert_to):
-        if issubclass(convert_to, self.__class__):
-            # Widening conversion
-            new_class = convert_to
-        else:
-            if not issubclass(self.__class__, convert_to):
-                # A complex widening conversion
-                bases = tuple([convert_to] + filter(lambda cls: not issubclass(cls, DataFormatInterface) and not issubclass(convert_to, cls), list(self.__class__.__bases__) + [self.__class__]))
-                if len(bases) == 1:
-                    new_class = bases[0]
-                else:
-                    new_class = filter(lambda cls: cls.__bases__ == bases, built_classes)[0]
-            else:
-                # This is an attempted narrowing conversion
-                raise InvalidEventConversion("Narrowing event conversion attempted, this is not allowed <Attempted {old} -> {new}>".format(
-                        old=self.__class__, new=convert_to))
+    def detached_data(self):
+        """
+        Returns the event data in a form that may be used off the hub, e.g. by a function passed to Actor.offload, while this
+        event is not touched by other greenlets. Data shared with copy-on-write copies is released to this event first, which
+        must happen on the hub. Unparsed data is returned as is, so that it can be parsed off the hub with parse_data
+        """
+        if self._shared_data is not None:
+            self._data = self._shared_data.release(self)
+            self._shared_data = None
 
-        new_class = new_class.__new__(new_class)
-        new_class.__dict__.update(self.__dict__)
-        new_class.data = self.data
-        return new_class
+        return self._data
+
+    def parse_data(self, data):
+        """Returns <data> as returned by detached_data, with unparsed data parsed. Does not modify this event"""
+        if data.__class__ is UnparsedData:
+            return self._convert(data.raw)
+        return data
+
+    def convert(self, convert_to):
+        """
+        Returns a copy of this event of class <convert_to>, with its data converted to the data format of that class.
+        The source event is not modified, so this may be offloaded once the data is detached (See detached_data)
+        """
+        new_class, converter = _get_conversion_plan(self.__class__, convert_to)
+        new_event = new_class.__new__(new_class)
+        data = self.detached_data()
+        if converter is not _keep_data:
+            # Only conversions between data formats need the data parsed, otherwise unparsed data stays unparsed
+            data = new_event._convert(self.parse_data(data), converter)
+
+        new_event._set_state(self._get_state())
+        new_event._data = data
+        new_event._shared_data = None
+        return new_event
 
     def clone(self):
         return deepcopy(self)
 
+    def shared_copy(self):
+        """
+        Creates a copy-on-write copy of this event. All event properties are copied, but 'data' is shared between this event
+        and the copy. The first time either event accesses or replaces 'data', that event is given a private copy of the data,
+        as long as another event is still sharing it. Events that never touch 'data' never pay for a copy of it
+        """
+        if self._shared_data is None:
+            self._shared_data = _SharedData(self._data)
+            self._shared_data.owners.add(self)
+
+        state = self._get_state()
+        del state["_data"], state["_shared_data"]
+
+        new_event = self.__class__.__new__(self.__class__)
+        new_event._set_state(deepcopy(state))
+        new_event._data = self._data
+        new_event._shared_data = self._shared_data
+        self._shared_data.owners.add(new_event)
+        return new_event
+
 
 class HttpEvent(Event):
 
+    __slots__ = ("headers", "method", "_status", "environment")
+
     content_type = "text/plain"
 
     def __init__(self, headers=None, status=(200, "OK"), environment={}, *args, **kwargs):
@@ -272,6 +565,10 @@ class HttpEvent(Event):
             if len(status) == 2:
                 self._status = (int(status[0]), status[1])
 
+    def __setstate__(self, state):
+        super(HttpEvent, self).__setstate__(state)
+        self.status = tuple(self._status)     # Restores the status tuple for wire formats that only know lists
+
     def _set_error(self, exception):
         if exception is not None:
             error_state = http_code_map[exception.__class__]
@@ -283,20 +580,27 @@ class HttpEvent(Event):
 
 class _XMLFormatInterface(DataFormatInterface):
 
+    __slots__ = ()
+
     content_type = "application/xml"
 
-    conversion_methods = {str: lambda data: etree.fromstring(data)}
+    conversion_methods = {str: lambda data: etree.fromstring(data), UnparsedData: lambda data: data}
     conversion_methods.update(dict.fromkeys(_XML_TYPES, lambda data: data))
-    conversion_methods.update(dict.fromkeys(_JSON_TYPES, lambda data: etree.fromstring(xmltodict.unparse(internal_xmlify(data)).encode('utf-8'))))
+    conversion_methods.update(dict.fromkeys(_JSON_TYPES, json_to_xml))
     conversion_methods.update({None.__class__: lambda data: etree.fromstring("<root/>")})
 
     def __getstate__(self):
         state = super(_XMLFormatInterface, self).__getstate__()
-        state['_data'] = etree.tostring(self.data)
+        state['_data'] = self.data_string()
+        if self._data.__class__ is UnparsedData:
+            state['_data_unparsed'] = True     # Keeps the data lazy in the copy, rather than parsing it in __setstate__
         return state
 
     def data_string(self):
-        return etree.tostring(self.data)
+        data = self._data
+        if data.__class__ is UnparsedData:
+            return data.raw
+        return etree.tostring(data)
 
     def format_error(self):
         errors = super(_XMLFormatInterface, self).format_error()
@@ -324,20 +628,27 @@ class _XMLFormatInterface(DataFormatInterface):
 
 class _JSONFormatInterface(DataFormatInterface):
 
+    __slots__ = ()
+
     content_type = "application/json"
 
-    conversion_methods = {str: lambda data: json.loads(data)}
-    conversion_methods.update(dict.fromkeys(_JSON_TYPES, lambda data: json.loads(json.dumps(data))))
-    conversion_methods.update(dict.fromkeys(_XML_TYPES, lambda data: remove_internal_xmlify(xmltodict.parse(etree.tostring(data), expat=expat))))
+    conversion_methods = {str: lambda data: json.loads(data), UnparsedData: lambda data: data}
+    conversion_methods.update(dict.fromkeys(_JSON_TYPES, lambda data: data))
+    conversion_methods.update(dict.fromkeys(_XML_TYPES, xml_to_json))
     conversion_methods.update({None.__class__: lambda data: {}})
 
     def __getstate__(self):
         state = super(_JSONFormatInterface, self).__getstate__()
-        state['_data'] = json.dumps(self.data)
+        state['_data'] = self.data_string()
+        if self._data.__class__ is UnparsedData:
+            state['_data_unparsed'] = True     # Keeps the data lazy in the copy, rather than parsing it in __setstate__
         return state
 
     def data_string(self):
-        return json.dumps(self.data)
+        data = self._data
+        if data.__class__ is UnparsedData:
+            return data.raw
+        return json.dumps(data)
 
     def error_string(self):
         error = self.format_error()
@@ -347,39 +658,275 @@ class _JSONFormatInterface(DataFormatInterface):
 
 
 class XMLEvent(_XMLFormatInterface, Event):
-    pass
+    __slots__ = ()
 
 
 class JSONEvent(_JSONFormatInterface, Event):
-    pass
+    __slots__ = ()
 
 
 class JSONHttpEvent(JSONEvent, HttpEvent):
-    pass
+    __slots__ = ()
 
 
 class XMLHttpEvent(XMLEvent, HttpEvent):
-    pass
+    __slots__ = ()
 
 
 class LogEvent(Event):
     """
     This is a lightweight event designed to mimic some of the event properties of a regular event
+    The formatted 'time', 'message' and the 'data' dictionary are only built when they are accessed
     """
 
-    def __init__(self, level, origin_actor, message, id=None):
+    __slots__ = ("id", "level", "origin_actor", "_message", "_args")
+
+    def __init__(self, level, origin_actor, message, id=None, args=()):
+        self._event_id = None
+        self._meta_id = id
+        self._created = time()
+        self._data = None
+        self._error = None
+        self.service = DEFAULT_EVENT_SERVICE
         self.id = id
-        self.event_id = uuid().get_hex()
-        self.meta_id = id or self.event_id
         self.level = level
-        self.time = datetime.now().strftime('%Y-%m-%d %H:%M:%S,%f')[:-3]
         self.origin_actor = origin_actor
-        self.message = message
-        self.data = {"id":              self.id,
-                    "level":            self.level,
-                    "time":             self.time,
-                    "origin_actor":     self.origin_actor,
-                    "message":          self.message}
+        self._message = message
+        self._args = args
+
+    @property
+    def message(self):
+        if self._args:
+            self._message = self._message.format(*self._args)
+            self._args = ()
+        return self._message
+
+    @message.setter
+    def message(self, message):
+        self._message = message
+        self._args = ()
+
+    @property
+    def time(self):
+        return datetime.fromtimestamp(self._created).strftime('%Y-%m-%d %H:%M:%S,%f')[:-3]
+
+    @property
+    def data(self):
+        if self._data is None:
+            self._data = {"id":             self.id,
+                          "level":          self.level,
+                          "time":           self.time,
+                          "origin_actor":   self.origin_actor,
+                          "message":        self.message}
+        return self._data
+
+    @data.setter
+    def data(self, data):
+        Event.data.fset(self, data)
+
+    def _get_state(self):
+        # Copies and serialized events only carry the formatted message, never the format arguments
+        state = super(LogEvent, self)._get_state()
+        del state["_message"], state["_args"]
+        state["message"] = self.message
+        return state
+
+class EventCodec(object):
+    """
+    **Interface for serializing events to, and deserializing events from, a list of message frames**
+
+    Used by actors that transport events between processes, such as ZMQPush/ZMQPull and MDPClient/MDPWorker.
+    To create a new wire format, implement this interface and pass an instance as the 'codec' of the transporting actors
+    """
+
+    __metaclass__ = abc.ABCMeta
+
+    @abc.abstractmethod
+    def encode(self, event):
+        """Returns a list of frames (str) representing 'event'"""
+        pass
+
+    @abc.abstractmethod
+    def decode(self, frames):
+        """Returns the event represented by 'frames'. A frame may either be a str or a zmq.Frame"""
+        pass
+
+    @staticmethod
+    def _frame_bytes(frame):
+        return getattr(frame, "bytes", frame)
+
+
+class PickleEventCodec(EventCodec):
+    """
+    **Serializes events with cPickle into a single frame**
+
+    This is the default wire format. It supports arbitrary event properties, but must only be used between trusted peers
+    """
+
+    def encode(self, event):
+        return [pickle.dumps(event, pickle.HIGHEST_PROTOCOL)]
+
+    def decode(self, frames):
+        return pickle.loads(self._frame_bytes(frames[0]))
+
+
+class BinaryEventCodec(EventCodec):
+    """
+    **Serializes events into a small header frame followed by the raw event data as a separate frame**
+
+    Header frame layout:
+        - 2 bytes:  Magic ('CE')
+        - 1 byte:   Format version
+        - 1 byte:   Payload type (raw str, unicode, JSON or None)
+        - 1 byte:   Length of the event class name
+        - n bytes:  Event class name
+        - rest:     JSON object of all event properties except for 'data'
+
+    The payload frame contains event.data_string() for XML and JSON events, which a receiver keeps as UnparsedData so that it
+    is only parsed once event.data is read, and the data is never pickled. Only known Event classes and compysition exceptions are instantiated while decoding, which
+    makes this codec safe to use with untrusted peers. As a consequence, every event property must be JSON serializable, and
+    encoding an event with any other property raises a TypeError. Transporting actors only use this codec when it is passed as their 'codec'
+    """
+
+    MAGIC = "CE"
+    VERSION = 1
+    _HEADER = struct.Struct("!2sBBB")
+
+    PAYLOAD_RAW = 0
+    PAYLOAD_UNICODE = 1
+    PAYLOAD_JSON = 2
+    PAYLOAD_NONE = 3
+
+    _event_classes = {}
+
+    def encode(self, event):
+        state = event._get_state()
+        data = state.pop("_data")
+        state.pop("_shared_data", None)
+        error = state.pop("_error", None)
+        if error is not None:
+            state["_error"] = self._encode_error(error)
+
+        if isinstance(event, DataFormatInterface):
+            payload_type, payload = self.PAYLOAD_RAW, event.data_string()
+        else:
+            data = event.data
+            if data is None:
+                payload_type, payload = self.PAYLOAD_NONE, ""
+            elif isinstance(data, str):
+                payload_type, payload = self.PAYLOAD_RAW, data
+            elif isinstance(data, unicode):
+                payload_type, payload = self.PAYLOAD_UNICODE, data.encode("utf-8")
+            else:
+                payload_type, payload = self.PAYLOAD_JSON, json.dumps(data)
+
+        class_name = event.__class__.__name__
+        header = self._HEADER.pack(self.MAGIC, self.VERSION, payload_type, len(class_name)) + class_name + json.dumps(state)
+        return [header, payload]
+
+    def decode(self, frames):
+        header, payload = self._frame_bytes(frames[0]), self._frame_bytes(frames[1])
+        magic, version, payload_type, name_length = self._HEADER.unpack_from(header)
+        if magic != self.MAGIC or version != self.VERSION:
+            raise InvalidEventConversion("Received an event frame that is not a valid version {0} binary event".format(self.VERSION))
+
+        offset = self._HEADER.size
+        event_class = self._get_event_class(header[offset:offset + name_length])
+        state = json.loads(header[offset + name_length:])
+
+        if payload_type == self.PAYLOAD_RAW and issubclass(event_class, DataFormatInterface):
+            payload = UnparsedData(payload)
+        elif payload_type == self.PAYLOAD_NONE:
+            payload = None
+        elif payload_type == self.PAYLOAD_UNICODE:
+            payload = payload.decode("utf-8")
+        elif payload_type == self.PAYLOAD_JSON:
+            payload = json.loads(payload)
+
+        state["_data"] = payload
+        state["_error"] = self._decode_error(state.get("_error", None))
+
+        event = event_class.__new__(event_class)
+        event.__setstate__(dict((str(key), value) for key, value in state.items()))
+        return event
+
+    @staticmethod
+    def _encode_error(error):
+        messages = getattr(error, "message", str(error))
+        if not isinstance(messages, list):
+            messages = [messages]
+
+        return {"type": error.__class__.__name__, "message": [str(getattr(message, "message", message)) for message in messages]}
+
+    @staticmethod
+    def _decode_error(error):
+        if error is not None:
+            error_class = globals().get(str(error["type"]), None)
+            if not (isinstance(error_class, type) and issubclass(error_class, CompysitionException)):
+                error_class = CompysitionException
+            error = error_class(error["message"])
+
+        return error
+
+    @classmethod
+    def _get_event_class(cls, name):
+        event_class = cls._event_classes.get(name, None)
+        if event_class is None:
+            # Refresh from the Event class hierarchy, to pick up event classes that were defined since the last lookup
+            classes, pending = {}, [Event]
+            while pending:
+                event_class = pending.pop()
+                classes[event_class.__name__] = event_class
+                pending.extend(event_class.__subclasses__())
+            cls._event_classes = classes
+
+            event_class = classes.get(name, None)
+            if event_class is None:
+                raise InvalidEventConversion("Received an event of unknown type '{name}'".format(name=name))
+
+        return event_class
+
+
+def _keep_data(data):
+    return data
+
+
+def _get_conversion_plan(source, target):
+    """
+    Returns a cached (new_class, converter) plan for converting events of class 'source' to 'target'.
+    The converter is _keep_data when both classes share a data format, a direct XML<->JSON converter when converting between
+    data formats, and otherwise None, in which case the target class conversion_methods are looked up by data type
+    """
+    plan = _conversion_plans.get((source, target), None)
+    if plan is None:
+        if issubclass(target, source):
+            # Widening conversion
+            new_class = target
+        elif not issubclass(source, target):
+            # A complex widening conversion
+            bases = tuple([target] + filter(lambda cls: not issubclass(cls, DataFormatInterface) and not issubclass(target, cls), list(source.__bases__) + [source]))
+            if len(bases) == 1:
+                new_class = bases[0]
+            else:
+                new_class = filter(lambda cls: cls.__bases__ == bases, built_classes)[0]
+        else:
+            # This is an attempted narrowing conversion
+            raise InvalidEventConversion("Narrowing event conversion attempted, this is not allowed <Attempted {old} -> {new}>".format(
+                    old=source, new=target))
+
+        if new_class.conversion_methods is source.conversion_methods:
+            converter = _keep_data
+        elif issubclass(source, _XMLFormatInterface) and issubclass(new_class, _JSONFormatInterface):
+            converter = xml_to_json
+        elif issubclass(source, _JSONFormatInterface) and issubclass(new_class, _XMLFormatInterface):
+            converter = json_to_xml
+        else:
+            converter = None
+
+        plan = _conversion_plans[(source, target)] = (new_class, converter)
+
+    return plan
+
 
 built_classes = [Event, XMLEvent, JSONEvent, HttpEvent, JSONHttpEvent, XMLHttpEvent, LogEvent]
 __all__ = map(lambda cls: cls.__name__, built_classes)
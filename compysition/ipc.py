@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+#
+# -*- coding: utf-8 -*-
+#
+#  Copyright 2014 Adam Fiebig <fiebig.adam@gmail.com>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+#
+
+import zmq.green as zmq
+import gevent
+import os
+from compysition.errors import QueueFull
+
+
+class IPCQueue(object):
+
+    '''The sending end of a queue whose consuming actor runs in another process.
+
+    Takes the place of a Queue in the outbound, error or log pool of an actor, and sends every event that is put on it
+    over a ZeroMQ ipc PUSH socket to the IPCReceiver of the consuming process. As the queue contents live in the consuming
+    process, this end of the queue always reports itself as empty.
+
+    Parameters:
+
+        name (str):
+            | The name of the queue this queue replaces
+        address (str):
+            | The ZeroMQ ipc address of the IPCReceiver
+        codec (compysition.event.EventCodec):
+            | The codec used to encode events. Must match the codec of the IPCReceiver
+        maxsize (Optional[int]):
+            | The max amount of events that may be buffered on the socket before 'put' blocks. A value of 0 or None represents
+            | an unlimited size
+            | Default: None
+
+    '''
+
+    def __init__(self, name, address, codec, maxsize=None):
+        self.name = name
+        self.address = address
+        self.codec = codec
+        self.maxsize = maxsize or 0
+        self.__socket = None
+
+    def __len__(self):
+        return 0
+
+    def __nonzero__(self):
+        return True
+    __bool__ = __nonzero__
+
+    def connect(self, context):
+        self.__socket = context.socket(zmq.PUSH)
+        self.__socket.setsockopt(zmq.SNDHWM, self.maxsize)
+        self.__socket.setsockopt(zmq.LINGER, 0)
+        self.__socket.connect(self.address)
+
+    def close(self):
+        if self.__socket is not None:
+            self.__socket.close()
+            self.__socket = None
+
+    def qsize(self):
+        return 0
+
+    def empty(self):
+        return True
+
+    def full(self):
+        return False
+
+    def put(self, element, block=True, timeout=None):
+        '''Encodes and sends element to the consuming process.'''
+
+        if not block or timeout is not None:
+            if not self.__socket.poll(0 if not block else timeout * 1000, zmq.POLLOUT):
+                raise QueueFull("Queue {0} is full".format(self.name))
+
+        self.__socket.send_multipart(self.codec.encode(element), copy=False)
+
+    def wait_until_empty(self):
+        pass
+
+    def wait_until_free(self):
+        pass
+
+
+class IPCReceiver(object):
+
+    '''The receiving end of an IPCQueue, which puts every received event on the local queue of the consuming actor.
+
+    Parameters:
+
+        address (str):
+            | The ZeroMQ ipc address to bind to
+        queue (compysition.queue.Queue):
+            | The inbound queue of the consuming actor
+        codec (compysition.event.EventCodec):
+            | The codec used to decode events. Must match the codec of the IPCQueues sending to this receiver
+        logger (compysition.logger.Logger):
+            | The logger to report undecodable events to
+
+    '''
+
+    def __init__(self, address, queue, codec, logger):
+        self.address = address
+        self.queue = queue
+        self.codec = codec
+        self.logger = logger
+        self.__socket = None
+        self.__greenlet = None
+
+    def start(self, context):
+        self.__socket = context.socket(zmq.PULL)
+        self.__socket.setsockopt(zmq.RCVHWM, self.queue.maxsize)
+        self.__socket.setsockopt(zmq.LINGER, 0)
+        self.__socket.bind(self.address)
+        self.__greenlet = gevent.spawn(self.__receive)
+
+    def stop(self):
+        if self.__greenlet is not None:
+            self.__greenlet.kill()
+            self.__greenlet = None
+
+        if self.__socket is not None:
+            self.__socket.close()
+            self.__socket = None
+            try:
+                os.unlink(self.address.replace("ipc://", "", 1))
+            except OSError:
+                pass
+
+    def __receive(self):
+        while True:
+            frames = self.__socket.recv_multipart(copy=False)
+            try:
+                event = self.codec.decode(frames)
+            except Exception as err:
+                self.logger.error("Received invalid event format on queue '{queue}': {err}".format(queue=self.queue.name, err=err))
+            else:
+                self.queue.put(event)
@@ -35,58 +35,83 @@ class Logger(object):
     We use a pool in order to support multiple logging types per process. For example, sending to a third party log
     aggregator as WELL as using a filelogger
 
+    Messages below the level of the logger are dropped before any work is done. Any positional arguments passed after the
+    message are applied with str.format once the message is actually written, e.g. logger.debug("Got {0}", value)
+
     Args:
         - name(str):
             | The name to use when sending log events
         - queue_pool(_InternalQueuePool):
             | The pool to use when sending log events
+        - level(Optional[int or str]):
+            | The minimum level of messages that are sent, as a python logging level or level name
+            | (Default: logging.NOTSET)
     """
 
-    def __init__(self, name, queue_pool):
+    def __init__(self, name, queue_pool, level=logging.NOTSET):
         self.name = name
         if not isinstance(queue_pool, _InternalQueuePool):
             raise TypeError("Logger queue_pool must be of type '_InternalQueuePool'")
 
         self.__pool = queue_pool
+        self.set_level(level)
+
+    def set_level(self, level):
+        if isinstance(level, basestring):
+            level = getattr(logging, level.upper(), logging.NOTSET)
 
-    def log(self, level, message, event=None, log_entry_id=None):
+        self.level = level or logging.NOTSET
+
+    def is_enabled_for(self, level):
+        """
+        Whether a message of the provided level would be sent. Use this to skip building expensive messages that would be dropped
+        """
+        return level >= self.level
+
+    def log(self, level, message, *args, **kwargs):
         """
         Uses log_entry_id explicitely as the logged ID, if defined. Otherwise, will attempt to ascertain the ID from 'event', if passed
         """
+        if level < self.level or not self.__pool:
+            return
+
+        log_entry_id = kwargs.get("log_entry_id", None)
         if not log_entry_id:
+            event = kwargs.get("event", None)
             if event:
                 log_entry_id = event.meta_id
 
-        for key in self.__pool.keys():
+        # Log events are never modified by the log actors, so every queue receives the same event
+        log_event = LogEvent(level, self.name, message, id=log_entry_id, args=args)
+        for queue in self.__pool.values():
             try:
-                log_event = LogEvent(level, self.name, message, id=log_entry_id)
-                self.__pool[key].put(log_event)
+                queue.put(log_event)
             except QueueFull:
-                self.__pool.wait_until_free()
-                self.__pool[key].put(log_event)
+                queue.wait_until_free()
+                queue.put(log_event)
 
-    def critical(self, message, event=None, log_entry_id=None):
+    def critical(self, message, *args, **kwargs):
         """Generates a log message with priority logging.CRITICAL
         """
-        self.log(logging.CRITICAL, message, event=event, log_entry_id=log_entry_id)
+        self.log(logging.CRITICAL, message, *args, **kwargs)
 
-    def error(self, message, event=None, log_entry_id=None):
+    def error(self, message, *args, **kwargs):
         """Generates a log message with priority error(3).
         """
-        self.log(logging.ERROR, message, event=event, log_entry_id=log_entry_id)
+        self.log(logging.ERROR, message, *args, **kwargs)
 
-    def warn(self, message, event=None, log_entry_id=None):
+    def warn(self, message, *args, **kwargs):
         """Generates a log message with priority logging.WARN
         """
-        self.log(logging.WARN, message, event=event, log_entry_id=log_entry_id)
+        self.log(logging.WARN, message, *args, **kwargs)
     warning=warn
 
-    def info(self, message, event=None, log_entry_id=None):
+    def info(self, message, *args, **kwargs):
         """Generates a log message with priority logging.INFO.
         """
-        self.log(logging.INFO, message, event=event, log_entry_id=log_entry_id)
+        self.log(logging.INFO, message, *args, **kwargs)
 
-    def debug(self, message, event=None, log_entry_id=None):
+    def debug(self, message, *args, **kwargs):
         """Generates a log message with priority logging.DEBUG
         """
-        self.log(logging.DEBUG, message, event=event, log_entry_id=log_entry_id)
\ No newline at end of file
+        self.log(logging.DEBUG, message, *args, **kwargs)
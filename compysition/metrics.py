@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+#
+# -*- coding: utf-8 -*-
+#
+#  metrics.py
+#
+#  Copyright 2014 Adam Fiebig <fiebig.adam@gmail.com>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+
+from bisect import bisect_left
+from collections import OrderedDict
+from gevent import pywsgi
+
+"""
+Low overhead runtime metrics of actors and queues, exposed in the Prometheus text format
+"""
+
+DEFAULT_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+HUB_BLOCK_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram(object):
+
+    """
+    **Counts observed values in fixed buckets**
+
+    An observation only increments the count of its bucket, and the cumulative counts Prometheus expects are only calculated
+    once the histogram is read
+
+    Parameters:
+        buckets (Optional[tuple]):
+            | The sorted upper bounds of the buckets. Values above the last bound are counted in an implicit '+Inf' bucket
+            | Default: DEFAULT_LATENCY_BUCKETS
+    """
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets=DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative_counts(self):
+        """Returns a list of (upper_bound, count of values <= upper_bound), ending with the '+Inf' bound"""
+        total, counts = 0, []
+        for bound, count in zip(self.buckets + (float("inf"), ), self.counts):
+            total += count
+            counts.append((bound, total))
+
+        return counts
+
+
+class ActorMetrics(object):
+
+    """
+    **The metrics of a single actor**
+
+    The counters are plain attributes that the actor increments directly:
+        - consumed:     The amount of events that were consumed, including events consumed in batches
+        - sent:         The amount of events that were put on outbound and error queues
+        - errors:       The amount of events for which consume raised an exception
+        - in_progress:  The amount of consume calls that are currently running
+        - consume_time: A Histogram of the seconds spent per consume or consume_batch call
+        - hub_blocks:   The amount of times a consume call blocked the gevent hub (See compysition.watchdog)
+        - hub_blocked_seconds: The total seconds the hub was blocked by consume calls
+
+    Actors may add actor specific values with 'register'
+    """
+
+    def __init__(self, buckets=DEFAULT_LATENCY_BUCKETS):
+        self.consumed = 0
+        self.sent = 0
+        self.errors = 0
+        self.in_progress = 0
+        self.consume_time = Histogram(buckets)
+        self.hub_blocks = 0
+        self.hub_blocked_seconds = 0.0
+        self.custom = OrderedDict()
+
+    def register(self, name, function, metric_type="gauge", description=""):
+        """
+        Adds an actor specific metric called <name>, whose value is read by calling <function> whenever the metrics are
+        collected. <metric_type> is either 'gauge' or 'counter'
+        """
+        self.custom[name] = (metric_type, description, function)
+
+
+class MetricsRegistry(object):
+
+    """
+    **Collects the metrics of registered actors and their inbound queues**
+
+    Every queue is consumed by exactly one actor, so reporting the inbound queues of all actors covers every connected
+    queue once. Queues are labeled with the name of their consuming actor and their inbound queue name.
+
+    Only actors running in the current process are reported. Actors pinned to another process (See Director.register_process)
+    are not visible to the registry of the main process
+
+    Blocks of the gevent hub are counted per actor, and in 'hub_blocks' for the whole process (See record_hub_block)
+    """
+
+    def __init__(self):
+        self.actors = OrderedDict()
+        self.hub_blocks = Histogram(HUB_BLOCK_BUCKETS)
+
+    def register(self, actor):
+        self.actors[actor.name] = actor
+
+    def unregister(self, actor):
+        self.actors.pop(actor.name, None)
+
+    def record_hub_block(self, actor_name, seconds):
+        """Records that the hub was blocked for <seconds>, by a consume call of <actor_name> if it is not None"""
+        self.hub_blocks.observe(seconds)
+        actor = self.actors.get(actor_name, None)
+        if actor is not None:
+            actor.metrics.hub_blocks += 1
+            actor.metrics.hub_blocked_seconds += seconds
+
+    def collect(self):
+        """
+        Returns a list of (metric_name, metric_type, description, samples) tuples, where samples is a list of (suffix, labels, value),
+        with labels as a list of (label, value)
+        """
+        metrics = OrderedDict()
+
+        def add(name, metric_type, description, labels, value, suffix=""):
+            metrics.setdefault(name, (metric_type, description, []))[2].append((suffix, labels, value))
+
+        def add_histogram(name, description, labels, histogram):
+            for bound, count in histogram.cumulative_counts():
+                add(name, "histogram", description, labels + [("le", _format_bound(bound))], count, suffix="_bucket")
+            add(name, "histogram", description, labels, histogram.sum, suffix="_sum")
+            add(name, "histogram", description, labels, histogram.count, suffix="_count")
+
+        add_histogram("compysition_hub_block_seconds", "Seconds the gevent hub was blocked, per detected block", [], self.hub_blocks)
+
+        for actor in self.actors.values():
+            actor_labels = [("actor", actor.name)]
+            actor_metrics = actor.metrics
+            add("compysition_actor_events_consumed_total", "counter", "Events consumed by the actor", actor_labels, actor_metrics.consumed)
+            add("compysition_actor_events_sent_total", "counter", "Events put on outbound and error queues by the actor", actor_labels, actor_metrics.sent)
+            add("compysition_actor_consume_errors_total", "counter", "Events for which consume raised an exception", actor_labels, actor_metrics.errors)
+            add("compysition_actor_consumes_in_progress", "gauge", "Consume calls that are currently running", actor_labels, actor_metrics.in_progress)
+
+            add_histogram("compysition_actor_consume_seconds", "Seconds spent per consume call", actor_labels, actor_metrics.consume_time)
+            add("compysition_actor_hub_blocks_total", "counter", "Times a consume call blocked the gevent hub", actor_labels, actor_metrics.hub_blocks)
+            add("compysition_actor_hub_blocked_seconds_total", "counter", "Seconds consume calls blocked the gevent hub", actor_labels,
+                actor_metrics.hub_blocked_seconds)
+
+            for custom_name, (metric_type, description, function) in actor_metrics.custom.items():
+                add("compysition_actor_{0}".format(custom_name), metric_type, description, actor_labels, function())
+
+            for queue_name, queue in actor.pool.inbound.items():
+                queue_labels = actor_labels + [("queue", queue_name)]
+                add("compysition_queue_depth", "gauge", "Events waiting on the queue", queue_labels, queue.qsize())
+                add("compysition_queue_puts_total", "counter", "Events put on the queue", queue_labels, queue.put_count)
+                add("compysition_queue_gets_total", "counter", "Events taken off of the queue", queue_labels, queue.get_count)
+
+        return [(name, metric_type, description, samples) for name, (metric_type, description, samples) in metrics.items()]
+
+    def render(self):
+        """Returns all metrics in the Prometheus text exposition format"""
+        lines = []
+        for name, metric_type, description, samples in self.collect():
+            lines.append("# HELP {0} {1}".format(name, description))
+            lines.append("# TYPE {0} {1}".format(name, metric_type))
+            for suffix, labels, value in samples:
+                label_string = ",".join('{0}="{1}"'.format(label, _escape_label(label_value)) for label, label_value in labels)
+                label_string = "{{{0}}}".format(label_string) if label_string else ""
+                lines.append("{0}{1}{2} {3}".format(name, suffix, label_string, _format_value(value)))
+
+        return "\n".join(lines) + "\n"
+
+    def wsgi_app(self, environ, start_response):
+        """A WSGI application that serves the rendered metrics on any path"""
+        body = self.render()
+        start_response("200 OK", [("Content-Type", "text/plain; version=0.0.4"), ("Content-Length", str(len(body)))])
+        return [body]
+
+    def serve(self, address, app=None):
+        """
+        Starts serving the metrics on <address>, a (host, port) tuple, and returns the started pywsgi.WSGIServer.
+        A WSGI <app> that serves additional routes may be passed in place of 'wsgi_app'
+        """
+        server = pywsgi.WSGIServer(address, app or self.wsgi_app, log=None)
+        server.start()
+        return server
+
+
+def _format_bound(bound):
+    return "+Inf" if bound == float("inf") else repr(float(bound))
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
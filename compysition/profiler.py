@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+#
+# -*- coding: utf-8 -*-
+#
+#  profiler.py
+#
+#  Copyright 2014 Adam Fiebig <fiebig.adam@gmail.com>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+
+from collections import Counter, defaultdict
+import signal
+import os
+
+"""
+A sampling CPU profiler for a running compysition process
+"""
+
+# Frames of these functions belong to the consume call of the actor in their 'self' local (See Actor)
+_CONSUME_FUNCTIONS = frozenset(("__do_consume", "__do_consume_batch"))
+HUB = "hub"
+
+
+class SamplingProfiler(object):
+
+    """
+    **Samples the stack of the running greenlet at a fixed interval of CPU time**
+
+    A SIGPROF timer interrupts the process every 'interval' seconds of consumed CPU time, and the stack of whatever greenlet
+    is running at that moment is counted. A stack that passes through the consume call of an actor is attributed to that
+    actor, and any other stack to the hub. As samples are taken in CPU time, an idle process is not sampled.
+
+    While the profiler is stopped no timer is installed, so it costs nothing. Only the main thread of the process is sampled,
+    and only one profiler can run per process, as it owns SIGPROF
+
+    Parameters:
+        interval (Optional[float]):
+            | The seconds of CPU time between two samples
+            | Default: 0.005
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.samples = Counter()
+        self.running = False
+        self.__labels = {}
+        self.__previous_handler = None
+
+    def start(self):
+        """Discards the samples of a previous run and starts sampling"""
+        if self.running:
+            return
+
+        self.samples.clear()
+        self.__previous_handler = signal.signal(signal.SIGPROF, self.__sample)
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+        self.running = True
+
+    def stop(self):
+        if not self.running:
+            return
+
+        signal.setitimer(signal.ITIMER_PROF, 0, 0)
+        signal.signal(signal.SIGPROF, self.__previous_handler or signal.SIG_DFL)
+        self.running = False
+
+    def __sample(self, signum, frame):
+        labels = self.__labels
+        stack = []
+        owner = None
+        while frame is not None:
+            code = frame.f_code
+            if owner is None and code.co_name in _CONSUME_FUNCTIONS:
+                owner = getattr(frame.f_locals.get("self", None), "name", None)
+
+            try:
+                stack.append(labels[code])
+            except KeyError:
+                label = labels[code] = "{0} ({1}:{2})".format(code.co_name, os.path.basename(code.co_filename), code.co_firstlineno)
+                stack.append(label)
+
+            frame = frame.f_back
+
+        stack.append(HUB if owner is None else "actor:{0}".format(owner))
+        stack.reverse()
+        self.samples[";".join(stack)] += 1
+
+    def actor_times(self):
+        """Returns the sampled CPU seconds per actor name, with the time spent outside of any consume call under 'hub'"""
+        times = defaultdict(float)
+        for stack, count in self.samples.iteritems():
+            owner = stack.split(";", 1)[0]
+            times[owner[len("actor:"):] if owner.startswith("actor:") else owner] += count * self.interval
+
+        return dict(times)
+
+    def function_times(self):
+        """Returns the sampled CPU seconds per function, counting only the time spent in the function itself"""
+        times = defaultdict(float)
+        for stack, count in self.samples.iteritems():
+            times[stack.rsplit(";", 1)[-1]] += count * self.interval
+
+        return dict(times)
+
+    def collapsed(self):
+        """Returns the samples as collapsed stacks, one 'frame;frame;frame count' line per stack, as read by flamegraph.pl"""
+        return "".join("{0} {1}\n".format(stack, count) for stack, count in sorted(self.samples.iteritems()))
+
+    def write(self, path):
+        """Writes the collapsed stacks to <path>, creating its directory if necessary"""
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        with open(path, "w") as output:
+            output.write(self.collapsed())
@@ -24,9 +24,9 @@
 
 
 from compysition.errors import QueueEmpty, QueueFull
-from gevent import sleep
 from gevent.event import Event
-import gevent.queue as gqueue
+from collections import deque
+from time import time
 from uuid import uuid4 as uuid
 
 
@@ -83,44 +83,100 @@ class QueuePool(object):
             queue.wait_until_empty()
 
 
-class Queue(gqueue.Queue):
-        
-    '''A subclass of gevent.queue.Queue used to organize communication messaging between Compysition Actors.
+class Queue(object):
+
+    '''A notification driven FIFO queue used to organize communication messaging between Compysition Actors.
+
+    Items are held in a deque for O(1) put and get. Waiting for content, space or emptiness blocks on gevent events
+    that are set and cleared as the queue transitions between states, so no waiting operation ever polls the queue.
+    The total amount of puts and gets is counted in 'put_count' and 'get_count' (See compysition.metrics)
 
     Parameters:
 
         name (str):
             | The name of this queue. Used in certain actors to determine origin faster than reverse key-value lookup
+        maxsize (Optional[int]):
+            | The max amount of items this queue may contain. A value of 0 or None represents an unlimited size
+            | Default: None
 
     '''
 
-    def __init__(self, name, *args, **kwargs):
-        super(Queue, self).__init__(*args, **kwargs)
+    def __init__(self, name, maxsize=None):
         self.name = name
+        self.maxsize = maxsize or 0
+        self.__items = deque()
+        self.put_count = 0
+        self.get_count = 0
         self.__has_content = Event()
         self.__has_content.clear()
+        self.__has_space = Event()
+        self.__has_space.set()
+        self.__empty = Event()
+        self.__empty.set()
+
+    def __len__(self):
+        return len(self.__items)
+
+    def __nonzero__(self):
+        # A queue is always truthy, even when it is empty, as queue pools test for connected queues by truthiness
+        return True
+    __bool__ = __nonzero__
 
-    def get(self, block=False, *args, **kwargs):
+    def qsize(self):
+        return len(self.__items)
+
+    def empty(self):
+        return len(self.__items) == 0
+
+    def full(self):
+        return self.maxsize > 0 and len(self.__items) >= self.maxsize
+
+    def get(self, block=False, timeout=None):
         '''Gets an element from the queue.'''
 
-        try:
-            element = super(Queue, self).get(block=block, *args, **kwargs)
-        except gqueue.Empty:
-            self.__has_content.clear()
-            raise QueueEmpty("Queue {0} has no waiting events".format(self.name))
+        if not self.__items:
+            self.__wait(self.__has_content, block, timeout, QueueEmpty("Queue {0} has no waiting events".format(self.name)), self.empty)
 
-        if self.qsize == 0:
+        element = self.__items.popleft()
+        self.get_count += 1
+
+        if not self.__items:
             self.__has_content.clear()
+            self.__empty.set()
+
+        if self.maxsize > 0:
+            self.__has_space.set()
 
         return element
 
-    def put(self, element, *args, **kwargs):
+    def put(self, element, block=True, timeout=None):
         '''Puts element in queue.'''
-        try:
-            super(Queue, self).put(element, *args, **kwargs)
+
+        if self.full():
+            self.__wait(self.__has_space, block, timeout, QueueFull("Queue {0} is full".format(self.name)), self.full)
+
+        self.__items.append(element)
+        self.put_count += 1
+
+        if len(self.__items) == 1:
+            self.__empty.clear()
             self.__has_content.set()
-        except gqueue.Full:
-            raise QueueFull("Queue {0} is full".format(self.name))
+
+        if self.full():
+            self.__has_space.clear()
+
+    def __wait(self, event, block, timeout, error, condition):
+        '''Blocks on <event> until <condition> is no longer met, raising <error> if not blocking or if <timeout> expires.'''
+
+        if not block:
+            raise error
+
+        deadline = None if timeout is None else time() + timeout
+        while condition():
+            remaining = None if deadline is None else deadline - time()
+            if remaining is not None and remaining <= 0:
+                raise error
+            event.wait(remaining)
 
     def wait_until_content(self):
         '''Blocks until at least 1 slot is taken.'''
@@ -128,15 +184,14 @@ class Queue(gqueue.Queue):
 
     def wait_until_empty(self):
         '''Blocks until the queue is completely empty.'''
+        self.__empty.wait()
 
-        while not self.__has_content.is_set():
-            sleep(0)
+    def wait_until_free(self):
+        '''Blocks until at least 1 slot is free.'''
+        self.__has_space.wait()
 
     def dump(self, other_queue):
         """**Dump all items on this queue to another queue**"""
-        try:
-            while True:
-                other_queue.put(self.next())
-        except:
-            pass
+        while self.__items:
+            other_queue.put(self.get())
 
@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+#
+# -*- coding: utf-8 -*-
+#
+#  tracing.py
+#
+#  Copyright 2014 Adam Fiebig <fiebig.adam@gmail.com>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+
+from compysition.event import JSONEvent
+from compysition.queue import Queue
+from zlib import crc32
+from time import time
+import gevent
+
+"""
+Sampled end-to-end tracing of events along the actor graph
+"""
+
+# The fields of a span, which is stored as a list so that it survives JSON based wire formats unchanged
+SPAN_ACTOR, SPAN_QUEUE, SPAN_ENQUEUED, SPAN_STARTED, SPAN_ENDED = range(5)
+
+
+class Tracer(object):
+
+    """
+    **Records where sampled events spend their time, and exports the finished traces in batches**
+
+    A sampled event carries its trace in event.trace, a list of [actor, queue, enqueue_ts, start_ts, end_ts] spans with one span
+    per hop: enqueue_ts is taken when an actor puts the event on 'queue', start_ts and end_ts when 'actor' starts consuming the
+    event and when it sends the event on (or finishes consuming it). Events that are not sampled never get a trace, but every
+    send of such an event by an actor with a tracer still computes the crc32 of its meta_id to make the sampling decision.
+
+    Whether an event is sampled is derived from its meta_id, so an event and any event created with its meta_id are either both
+    traced or both not, on every actor sharing the same 'sample_rate'. A trace is finished once an actor consumed the event
+    without sending it on. Finished traces are put on 'queue' as a JSONEvent whose data is a list of
+    {"trace_id": meta_id, "event_id": event_id, "spans": spans}, once 'batch_size' traces are waiting or every 'flush_interval'
+
+    Parameters:
+        sample_rate (Optional[float]):
+            | The fraction of events to trace, from 0 to 1
+            | Default: 0.01
+        batch_size (Optional[int]):
+            | The amount of finished traces sent in a single event
+            | Default: 100
+        flush_interval (Optional[float]):
+            | The max amount of seconds a finished trace waits for its batch to fill up
+            | Default: 1
+    """
+
+    def __init__(self, sample_rate=0.01, batch_size=100, flush_interval=1):
+        self.sample_rate = sample_rate
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = Queue("traces")
+        self.running = False
+        self.__threshold = int(sample_rate * 0x100000000)
+        self.__traces = []
+
+    def start(self):
+        if self.running:
+            return
+
+        self.running = True
+        gevent.spawn(self.__flush_periodically)
+
+    def stop(self):
+        self.running = False
+        self.flush()
+
+    def __flush_periodically(self):
+        while self.running:
+            gevent.sleep(self.flush_interval)
+            self.flush()
+
+    def flush(self):
+        if self.__traces:
+            traces, self.__traces = self.__traces, []
+            self.queue.put(JSONEvent(data=traces))
+
+    def is_sampled(self, event):
+        if self.__threshold <= 0:
+            return False
+        return (crc32(event.meta_id) & 0xffffffff) < self.__threshold
+
+    def send(self, event):
+        """Called by an actor that is about to send <event>. Ends the span of the sending actor, or starts a sampled trace"""
+        trace = event.trace
+        if trace is None:
+            if self.is_sampled(event):
+                event.trace = []
+        elif trace and trace[-1][SPAN_ENDED] is None:
+            trace[-1][SPAN_ENDED] = time()
+
+    def enqueue(self, event, queue_name):
+        """Called for every copy of <event> put on a queue. The trace is replaced rather than extended, as copies may share it"""
+        if event.trace is not None:
+            event.trace = event.trace + [[None, queue_name, time(), None, None]]
+
+    def begin(self, event, actor_name, started):
+        """Called when <actor_name> starts consuming <event>. Returns the span of this hop, or None if it is not traced"""
+        trace = event.trace
+        if trace:
+            span = trace[-1]
+            if span[SPAN_ACTOR] is None:
+                span[SPAN_ACTOR], span[SPAN_STARTED] = actor_name, started
+                return span
+
+        return None
+
+    def end(self, event, span, ended):
+        """Called when the actor of <span> finished consuming <event>. If the event was not sent on, its trace is finished"""
+        if span[SPAN_ENDED] is None:
+            span[SPAN_ENDED] = ended
+            self.__traces.append({"trace_id": event.meta_id, "event_id": event.event_id, "spans": event.trace})
+            if len(self.__traces) >= self.batch_size:
+                self.flush()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+#
+# -*- coding: utf-8 -*-
+#
+#  watchdog.py
+#
+#  Copyright 2014 Adam Fiebig <fiebig.adam@gmail.com>
+#
+#  This program is free software; you can redistribute it and/or modify
+#  it under the terms of the GNU General Public License as published by
+#  the Free Software Foundation; either version 3 of the License, or
+#  (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software
+#  Foundation, Inc., 51 Franklin Street, Fifth Floor, Boston,
+#  MA 02110-1301, USA.
+#
+
+from compysition.profiler import _CONSUME_FUNCTIONS
+from gevent.monkey import get_original
+from time import time
+import gevent
+import traceback
+import sys
+
+"""
+Detection of greenlets that block the gevent hub
+"""
+
+
+def find_consuming_actor(frame):
+    """Returns the name of the actor whose consume call <frame> is part of, or None"""
+    while frame is not None:
+        if frame.f_code.co_name in _CONSUME_FUNCTIONS:
+            return getattr(frame.f_locals.get("self", None), "name", None)
+        frame = frame.f_back
+
+    return None
+
+
+class HubWatchdog(object):
+
+    """
+    **Detects greenlets that block the gevent hub for longer than a threshold**
+
+    A greenlet updates a heartbeat a few times per threshold, and an OS thread checks it. Once the heartbeat is older than
+    'threshold', the thread captures the stack that currently runs on the hub and the actor whose consume call it belongs to.
+    When the hub runs again, the heartbeat greenlet calls <report>(actor_name, seconds, stack) with the total time the hub was
+    blocked. actor_name is None if the blocking code did not run in a consume call.
+
+    The thread never calls into gevent, so it keeps running while the hub is blocked
+
+    Parameters:
+        threshold (Optional[float]):
+            | The seconds the hub may be blocked before it is reported
+            | Default: 0.1
+        report (Optional[callable]):
+            | Called on the hub for every detected block
+            | Default: None
+    """
+
+    def __init__(self, threshold=0.1, report=None):
+        self.threshold = threshold
+        self.report = report
+        self.running = False
+        self.__heartbeat = None
+        self.__stall = None             # (heartbeat, actor_name, stack) of the block that is currently detected
+        self.__hub_thread = None
+
+    def start(self):
+        if self.running:
+            return
+
+        self.running = True
+        self.__heartbeat = time()
+        self.__hub_thread = get_original("thread", "get_ident")()
+        gevent.spawn(self.__beat)
+        get_original("thread", "start_new_thread")(self.__watch, ())
+
+    def stop(self):
+        self.running = False
+
+    def __beat(self):
+        while self.running:
+            now = time()
+            heartbeat, self.__heartbeat = self.__heartbeat, now
+            stall = self.__stall
+            if stall is not None and stall[0] == heartbeat:
+                self.__stall = None
+                if self.report is not None:
+                    self.report(stall[1], now - heartbeat, stall[2])
+
+            gevent.sleep(self.threshold / 4)
+
+    def __watch(self):
+        sleep = get_original("time", "sleep")
+        while self.running:
+            sleep(self.threshold / 4)
+            heartbeat = self.__heartbeat
+            if time() - heartbeat > self.threshold and (self.__stall is None or self.__stall[0] != heartbeat):
+                frame = sys._current_frames().get(self.__hub_thread)
+                if frame is None:
+                    continue
+                self.__stall = (heartbeat, find_consuming_actor(frame), "".join(traceback.format_stack(frame)))
@@ -3,6 +3,8 @@ import unittest
 from compysition.actors import *
 from compysition.errors import *
 from compysition.event import *
+from compysition.actors.util import XPathLookup, namespace_scope
+from lxml import etree
 
 from compysition.testutils.test_actor import TestActorWrapper
 
@@ -123,3 +125,94 @@ class TestEventXMLXpathsFilter(TestEventRouter):
                         "outbox_names": ["four"]}
 
     cases = [single_outbox_case, multiple_outbox_case, regex_match_case]
+
+
+class TestEventRouterIndex(unittest.TestCase):
+
+    def generate_router(self, filters):
+        router = EventRouter("eventrouterindextest", routing_filters=filters)
+        for filter in filters:
+            for outbox_name in filter.outbox_names:
+                router.pool.outbound.add(outbox_name)
+        router.pre_hook()
+        return router
+
+    def matched_outboxes(self, router, **event_kwargs):
+        return [filter.outbox_names[0] for filter in router.get_matching_filters(Event(**event_kwargs))]
+
+    def test_matches_agree_with_linear_scan(self):
+        filters = [EventFilter(value_regexes="^exact$", outbox_names="exact", event_scope="service"),
+                   EventFilter(value_regexes="act", outbox_names="substring", event_scope="service"),
+                   EventFilter(value_regexes=["^[0-9]+$", "^none$"], outbox_names="digits", event_scope="service"),
+                   EventFilter(value_regexes="(?i)^EXACT$", outbox_names="ignorecase", event_scope="service"),
+                   EventFilter(value_regexes="^exact$", outbox_names="data", event_scope="data")]
+        router = self.generate_router(filters)
+
+        for service in ["exact", "exact", "EXACT", "inexact", "123", "none", "nothing", u"exact"]:
+            for data in ["exact", None]:
+                event = Event(service=service, data=data)
+                expected = [filter for filter in filters if filter.matches(event)]
+                self.assertEqual(router.get_matching_filters(event), expected)
+
+    def test_matches_in_filter_order(self):
+        filters = [EventFilter(value_regexes="one", outbox_names="first", event_scope="service"),
+                   EventXMLFilter(xpath="/foo", value_regexes="one", outbox_names="second", event_scope="service"),
+                   EventFilter(value_regexes="one", outbox_names="third", event_scope="data"),
+                   EventFilter(value_regexes="on", outbox_names="fourth", event_scope="service")]
+        router = self.generate_router(filters)
+
+        self.assertEqual(self.matched_outboxes(router, service="one", data="one"), ["first", "third", "fourth"])
+        self.assertEqual(self.matched_outboxes(router, service="only", data="one"), ["third", "fourth"])
+        self.assertEqual(self.matched_outboxes(router, service="two", data="two"), [])
+
+    def test_set_filter_after_first_match(self):
+        router = self.generate_router([EventFilter(value_regexes="one", outbox_names="one", event_scope="service")])
+        self.assertEqual(self.matched_outboxes(router, service="one"), ["one"])
+
+        router.set_filter(EventFilter(value_regexes="^one$", outbox_names="two", event_scope="service"))
+        self.assertEqual(self.matched_outboxes(router, service="one"), ["one", "two"])
+
+
+class TestEventRouterDeduplicateOutboxes(unittest.TestCase):
+
+    def generate_router(self, **router_kwargs):
+        filters = [EventFilter(value_regexes="one", outbox_names=["shared", "first"], event_scope="service"),
+                   EventFilter(value_regexes="^one$", outbox_names=["shared", "second"], event_scope="service")]
+        router = EventRouter("eventrouterdeduplicatetest", routing_filters=filters, **router_kwargs)
+        for outbox_name in ["shared", "first", "second"]:
+            router.pool.outbound.add(outbox_name)
+        router.pre_hook()
+        return router
+
+    def test_overlapping_filters_send_once_per_outbox(self):
+        router = self.generate_router(deduplicate_outboxes=True)
+        router.consume(Event(service="one"))
+
+        outputs = [router.pool.outbound[name].get() for name in ["shared", "first", "second"]]
+        self.assertEqual(router.pool.outbound["shared"].qsize(), 0)
+        self.assertEqual(len(set(map(id, outputs))), 3)
+
+    def test_overlapping_filters_send_per_filter_by_default(self):
+        router = self.generate_router()
+        router.consume(Event(service="one"))
+        self.assertEqual(router.pool.outbound["shared"].qsize(), 2)
+
+
+
+class TestXPathLookup(unittest.TestCase):
+
+    def test_default_namespace_lookup(self):
+        xml = etree.fromstring('<root xmlns="urn:foo"><child>bar</child></root>')
+        self.assertEqual([result.text for result in XPathLookup(xml).lookup('/root/child')], ['bar'])
+
+    def test_lookups_on_differently_namespaced_documents(self):
+        for xml in ('<root><child>bar</child></root>', '<root xmlns="urn:foo"><child>bar</child></root>', '<root><child>bar</child></root>'):
+            self.assertEqual([result.text for result in XPathLookup(etree.fromstring(xml)).lookup('/root/child')], ['bar'])
+
+    def test_namespaces_only_cached_within_scope(self):
+        xml = etree.fromstring('<root><child>bar</child></root>')
+        with namespace_scope():
+            self.assertEqual([result.text for result in XPathLookup(xml).lookup('/root/child')], ['bar'])
+
+        xml.set('{urn:foo}attribute', 'baz')
+        self.assertEqual(XPathLookup(xml).namespaces, {'ns0': 'urn:foo'})
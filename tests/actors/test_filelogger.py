@@ -0,0 +1,79 @@
+import unittest
+import logging
+import os
+import shutil
+import tempfile
+import gevent
+
+from compysition.actors import *
+from compysition.event import LogEvent
+
+from compysition.testutils.test_actor import TestActorWrapper
+
+
+class TestBufferedFileLogger(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "compysition.log")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def generate_actor(self, **actor_kwargs):
+        actor = FileLogger("filelogger", directory=self.directory, buffered=True, **actor_kwargs)
+        return TestActorWrapper(actor, output_queues=[])
+
+    def log(self, actor, count, level=logging.INFO):
+        for i in range(count):
+            actor.input = LogEvent(level, "actor", "line {0}".format(i))
+        gevent.sleep(0.05)
+
+    def read_lines(self, path=None):
+        if not os.path.exists(path or self.path):
+            return []
+
+        with open(path or self.path) as log_file:
+            return log_file.read().splitlines()
+
+    def test_written_once_flush_size_is_reached(self):
+        actor = self.generate_actor(flush_size=5, flush_interval=0)
+        self.log(actor, 4)
+        self.assertEqual(self.read_lines(), [])
+
+        self.log(actor, 1)
+        lines = self.read_lines()
+        self.assertEqual(len(lines), 5)
+        self.assertTrue(lines[0].endswith("actor=actor :: line 0"))
+
+        actor.stop()
+
+    def test_written_after_flush_interval(self):
+        actor = self.generate_actor(flush_size=1000, flush_interval=0.1)
+        self.log(actor, 3)
+        gevent.sleep(0.2)
+        self.assertEqual(len(self.read_lines()), 3)
+        actor.stop()
+
+    def test_written_on_stop(self):
+        actor = self.generate_actor(flush_interval=0)
+        self.log(actor, 3)
+        self.log(actor, 3, level=logging.DEBUG)
+        actor.stop()
+        self.assertEqual(len(self.read_lines()), 3)
+
+    def test_rotated_per_write(self):
+        actor = self.generate_actor(flush_size=10, flush_interval=0, maxBytes=300, backupCount=2)
+        self.log(actor, 30)
+        actor.stop()
+
+        self.assertEqual(len(self.read_lines()), 10)
+        self.assertEqual(len(self.read_lines(self.path + ".1")), 10)
+        self.assertEqual(len(self.read_lines(self.path + ".2")), 10)
+        self.assertTrue(self.read_lines(self.path + ".2")[0].endswith("line 0"))
+
+    def test_written_in_threadpool(self):
+        actor = self.generate_actor(flush_size=5, flush_interval=0, threadpool_size=1)
+        self.log(actor, 5)
+        self.assertEqual(len(self.read_lines()), 5)
+        actor.stop()
@@ -0,0 +1,163 @@
+import unittest
+import json
+import socket
+import gevent
+from StringIO import StringIO
+
+from compysition.actors import *
+from compysition.event import HttpEvent, JSONHttpEvent
+
+from compysition.testutils.test_actor import TestActorWrapper
+
+
+def free_port():
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+def generate_environ(path="/foo", method="POST", body="", content_type="text/plain", accept="*/*"):
+    return {"REQUEST_METHOD": method,
+            "PATH_INFO": path,
+            "QUERY_STRING": "",
+            "SERVER_NAME": "localhost",
+            "SERVER_PORT": "80",
+            "SERVER_PROTOCOL": "HTTP/1.1",
+            "REMOTE_ADDR": "127.0.0.1",
+            "CONTENT_TYPE": content_type,
+            "CONTENT_LENGTH": str(len(body)),
+            "HTTP_ACCEPT": accept,
+            "wsgi.url_scheme": "http",
+            "wsgi.input": StringIO(body),
+            "wsgi.errors": StringIO()}
+
+
+def request(actor, **environ_kwargs):
+    """Spawns a WSGI call of the actor. The greenlet value is a tuple of the status, headers dict and body"""
+    def call():
+        start_response_args = []
+        body = actor(generate_environ(**environ_kwargs), lambda status, headers: start_response_args.append((status, headers)))
+        status, headers = start_response_args[0]
+        return status, dict(headers), "".join(body)
+
+    return gevent.spawn(call)
+
+
+class TestHTTPServer(unittest.TestCase):
+
+    def setUp(self):
+        self.actor = TestActorWrapper(HTTPServer("http", address="127.0.0.1", port=free_port()), output_queues=["foo"])
+
+    def tearDown(self):
+        self.actor.stop()
+
+    def request(self, **environ_kwargs):
+        return request(self.actor.actor, **environ_kwargs)
+
+    def test_response_event_answers_request(self):
+        response = self.request(body="hello")
+        event = self.actor.output
+        self.assertEqual(event.data, "hello")
+        self.assertIn(event.event_id, self.actor.actor.responders)
+
+        event.data = "world"
+        event.status = (202, "Accepted")
+        event.headers["X-Foo"] = "bar"
+        self.actor.input = event
+
+        status, headers, body = response.get(timeout=5)
+        self.assertEqual(status, "202 Accepted")
+        self.assertEqual(headers["X-Foo"], "bar")
+        self.assertEqual(headers["Content-Length"], str(len(body)))
+        self.assertEqual(json.loads(body), {"data": "world"})     # Plain string data is returned nested under a data key
+        self.assertEqual(self.actor.actor.responders, {})
+
+    def test_concurrent_requests_answered_out_of_order(self):
+        responses = [self.request(body=str(i)) for i in range(5)]
+        events = [self.actor.output for response in responses]
+        for event in reversed(events):
+            event.data = "response {0}".format(event.data)
+            self.actor.input = event
+
+        for i, response in enumerate(responses):
+            self.assertEqual(json.loads(response.get(timeout=5)[2]), {"data": "response {0}".format(i)})
+
+    def test_no_content_response(self):
+        response = self.request(body="hello")
+        event = self.actor.output
+        event.status = (204, "No Content")
+        self.actor.input = event
+
+        status, headers, body = response.get(timeout=5)
+        self.assertEqual(status, "204 No Content")
+        self.assertEqual(body, "")
+
+    def test_unknown_queue_answered_with_error(self):
+        response = self.request(path="/bar", body="{}", content_type="application/json", accept="application/json")
+        status, headers, body = response.get(timeout=5)
+        self.assertEqual(status, "404 Not Found")
+        self.assertEqual(headers["Content-Type"], JSONHttpEvent.content_type)
+
+    def test_unrouted_path_answered_by_bottle(self):
+        response = self.request(path="/foo/bar/baz")
+        status, headers, body = response.get(timeout=5)
+        self.assertEqual(status, "404 Not Found")
+
+
+class TestHTTPServerTimeout(unittest.TestCase):
+
+    ROUTES = {"routes": [{"path": "/<queue>", "method": ["POST"]},
+                         {"path": "/slow/<queue>", "method": ["POST"], "response_timeout": 0.5}]}
+
+    def setUp(self):
+        self.actor = TestActorWrapper(HTTPServer("http", address="127.0.0.1", port=free_port(), routes_config=self.ROUTES,
+                                                 response_timeout=0.1), output_queues=["foo"])
+
+    def tearDown(self):
+        self.actor.stop()
+
+    def request(self, **environ_kwargs):
+        return request(self.actor.actor, **environ_kwargs)
+
+    def test_dropped_event_answered_with_timeout(self):
+        response = self.request(body="hello")
+        self.actor.output
+        self.assertEqual(self.actor.actor.outstanding_requests, 1)
+
+        status, headers, body = response.get(timeout=5)
+        self.assertEqual(status, "408 Request Timeout")
+        self.assertEqual(self.actor.actor.outstanding_requests, 0)
+        self.assertEqual(self.actor.actor.timed_out_requests, 1)
+
+    def test_timeout_response_follows_accept(self):
+        response = self.request(body="hello", accept="application/xml")
+        self.actor.output
+        status, headers, body = response.get(timeout=5)
+        self.assertEqual(status, "408 Request Timeout")
+        self.assertEqual(headers["Content-Type"], "application/xml")
+
+    def test_late_response_ignored(self):
+        response = self.request(body="hello")
+        event = self.actor.output
+        self.assertEqual(response.get(timeout=5)[0], "408 Request Timeout")
+        self.actor.input = event
+        gevent.sleep(0.05)
+        self.assertEqual(self.actor.actor.responders, {})
+
+    def test_route_response_timeout(self):
+        response = self.request(path="/slow/foo", body="hello")
+        event = self.actor.output
+        gevent.sleep(0.2)
+        self.actor.input = event
+        self.assertEqual(response.get(timeout=5)[0], "200 OK")
+
+    def test_answered_requests_do_not_time_out(self):
+        responses = [self.request(body=str(i)) for i in range(3)]
+        for response in responses:
+            self.actor.input = self.actor.output
+
+        self.assertEqual([json.loads(response.get(timeout=5)[2]) for response in responses], [{"data": str(i)} for i in range(3)])
+        gevent.sleep(0.2)
+        self.assertEqual(self.actor.actor.timed_out_requests, 0)
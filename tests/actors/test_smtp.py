@@ -0,0 +1,127 @@
+import unittest
+import gevent
+import gsmtpd.server
+
+from compysition.actors import *
+from compysition.actors.util import SMTPConnectionPool
+from compysition.event import XMLEvent
+
+from compysition.testutils.test_actor import TestActorWrapper
+
+
+class RecordingSMTPServer(gsmtpd.server.SMTPServer):
+
+    def __init__(self, *args, **kwargs):
+        super(RecordingSMTPServer, self).__init__(("127.0.0.1", 0), *args, **kwargs)
+        self.connections = 0
+        self.messages = []
+
+    def handle(self, sock, addr):
+        self.connections += 1
+        super(RecordingSMTPServer, self).handle(sock, addr)
+
+    def process_message(self, peer, mailfrom, rcpttos, data):
+        self.messages.append((mailfrom, rcpttos, data))
+
+
+class TestSMTPConnectionPool(unittest.TestCase):
+
+    def setUp(self):
+        self.server = RecordingSMTPServer()
+        self.server.start()
+        self.host = ("127.0.0.1", self.server.server_port)
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_session_reused(self):
+        pool = SMTPConnectionPool(self.host)
+        for i in range(3):
+            pool.sendmail("from@test.com", ["to@test.com"], "message {0}".format(i))
+        pool.close()
+
+        self.assertEqual(len(self.server.messages), 3)
+        self.assertEqual(self.server.connections, 1)
+
+    def test_session_replaced_after_max_messages(self):
+        pool = SMTPConnectionPool(self.host, max_messages=2)
+        self.assertEqual(pool.sendmany([("from@test.com", ["to@test.com"], "message")] * 5), [None] * 5)
+        pool.close()
+
+        self.assertEqual(len(self.server.messages), 5)
+        self.assertEqual(self.server.connections, 3)
+
+    def test_idle_session_expired(self):
+        pool = SMTPConnectionPool(self.host, idle_timeout=0.05)
+        pool.sendmail("from@test.com", ["to@test.com"], "message")
+        gevent.sleep(0.1)
+        pool.sendmail("from@test.com", ["to@test.com"], "message")
+        pool.close()
+
+        self.assertEqual(self.server.connections, 2)
+
+    def test_reconnect_after_disconnect(self):
+        pool = SMTPConnectionPool(self.host)
+        pool.sendmail("from@test.com", ["to@test.com"], "message")
+        # Simulate a session that was dropped by the server while idle
+        session = pool._SMTPConnectionPool__idle[0].smtp
+        session.sock.close()
+
+        pool.sendmail("from@test.com", ["to@test.com"], "message")
+        pool.close()
+
+        self.assertEqual(len(self.server.messages), 2)
+        self.assertEqual(self.server.connections, 2)
+
+    def test_errors_returned_per_message(self):
+        pool = SMTPConnectionPool(self.host)
+        results = pool.sendmany([("from@test.com", ["to@test.com"], "message"),
+                                 ("from@test.com", [], "message"),
+                                 ("from@test.com", ["to@test.com"], "message")])
+        pool.close()
+
+        self.assertIsNone(results[0])
+        self.assertIsInstance(results[1], Exception)
+        self.assertIsNone(results[2])
+        self.assertEqual(len(self.server.messages), 2)
+
+
+class TestSMTPOut(unittest.TestCase):
+
+    message = "<email><To>to@test.com</To><From>from</From><Subject>Test</Subject><Body>body</Body></email>"
+
+    def setUp(self):
+        self.server = RecordingSMTPServer()
+        self.server.start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def generate_actor(self, **actor_kwargs):
+        actor = SMTPOut("smtpout", domain="test.com", host=("127.0.0.1", self.server.server_port), **actor_kwargs)
+        return TestActorWrapper(actor)
+
+    def test_events_sent_over_one_session(self):
+        actor = self.generate_actor()
+        for i in range(3):
+            actor.input = XMLEvent(data=self.message)
+            actor.output
+        actor.stop()
+
+        self.assertEqual(len(self.server.messages), 3)
+        self.assertEqual(self.server.connections, 1)
+        mailfrom, rcpttos, data = self.server.messages[0]
+        self.assertIn("from@test.com", mailfrom)
+        self.assertEqual(rcpttos, ["to@test.com"])
+        self.assertIn("Subject: Test", data)
+
+    def test_batch_sent_over_one_session(self):
+        actor = self.generate_actor(batch_size=5, batch_linger_ms=50)
+        for i in range(5):
+            actor.input = XMLEvent(data=self.message)
+        for i in range(5):
+            actor.output
+        actor.stop()
+
+        self.assertEqual(len(self.server.messages), 5)
+        self.assertEqual(self.server.connections, 1)
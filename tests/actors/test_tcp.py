@@ -0,0 +1,87 @@
+import unittest
+import socket
+import gevent
+
+from compysition.actors import *
+from compysition.actors.tcp import encode_message, MessageReader
+from compysition.event import Event, XMLEvent
+from compysition.queue import Queue
+
+from compysition.testutils.test_actor import TestActorWrapper
+
+
+def free_port():
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+class TestMessageReader(unittest.TestCase):
+
+    def test_messages_split_across_reads(self):
+        data = encode_message(["header", "payload"]) + encode_message(["", "second"])
+        reader = MessageReader()
+        messages = []
+        for i in range(len(data)):
+            messages.extend(reader.feed(data[i]))
+
+        self.assertEqual(messages, [["header", "payload"], ["", "second"]])
+
+    def test_messages_in_single_read(self):
+        data = bytearray(encode_message(["one"]) * 3 + encode_message(["two"])[:5])
+        reader = MessageReader()
+        self.assertEqual(reader.feed(data, len(data)), [["one"]] * 3)
+        self.assertEqual(reader.feed(encode_message(["two"])[5:]), [["two"]])
+
+
+class TestTCP(unittest.TestCase):
+
+    def setUp(self):
+        self.port = free_port()
+        self.receiver = self.generate_receiver()
+
+    def tearDown(self):
+        self.receiver.stop()
+
+    def generate_receiver(self):
+        return TestActorWrapper(TCPIn("tcpin", host="127.0.0.1", port=self.port))
+
+    def generate_sender(self, **actor_kwargs):
+        sender = TCPOut("tcpout", host="127.0.0.1", port=self.port, **actor_kwargs)
+        return TestActorWrapper(sender, output_queues=[])
+
+    def test_events_sent_over_one_connection(self):
+        sender = self.generate_sender()
+        events = [XMLEvent(data="<foo>{0}</foo>".format(i)) for i in range(100)]
+        for event in events:
+            sender.input = event
+
+        outputs = dict((output.event_id, output) for output in [self.receiver.output for event in events])
+        for event in events:
+            self.assertEqual(outputs[event.event_id].data_string(), event.data_string())
+
+        self.assertEqual(len(sender.actor._TCPOut__idle), 1)
+        sender.stop()
+
+    def test_batch_sent_in_one_write(self):
+        sender = self.generate_sender(batch_size=10, batch_linger_ms=50)
+        for i in range(10):
+            sender.input = Event(data=str(i))
+
+        self.assertEqual(sorted(self.receiver.output.data for i in range(10)), [str(i) for i in range(10)])
+        sender.stop()
+
+    def test_reconnect_after_receiver_restart(self):
+        sender = self.generate_sender()
+        sender.input = Event(data="one")
+        self.assertEqual(self.receiver.output.data, "one")
+
+        self.receiver.stop()
+        gevent.sleep(0.05)
+        self.receiver = self.generate_receiver()
+
+        sender.input = Event(data="two")
+        self.assertEqual(self.receiver.output.data, "two")
+        sender.stop()
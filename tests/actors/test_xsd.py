@@ -2,6 +2,7 @@ import unittest
 
 from compysition.actors import *
 from compysition.event import *
+from compysition.event import UnparsedData
 from compysition.errors import MalformedEventData
 from compysition.testutils.test_actor import TestActorWrapper
 
@@ -50,4 +51,16 @@ class TestXSD(unittest.TestCase):
         _input = XMLEvent(data=invalid_xml)
         self.actor.input = _input
         _output = self.actor.error
-        self.assertTrue(isinstance(_output.error, MalformedEventData))
\ No newline at end of file
+        self.assertTrue(isinstance(_output.error, MalformedEventData))
+    def test_threadpool_validation(self):
+        actor = TestActorWrapper(XSD("xsd", xsd=xsd, threadpool_size=2))
+        missing_bar2 = "<foo><bar/></foo>"
+        extra_element = "<foo><bar/><bar2/><bar3/><bar4/><bar5/></foo>"
+        for data in (missing_bar2, extra_element, valid_xml):
+            actor.input = XMLEvent(data=UnparsedData(data))
+
+        errors = [actor.error.error.message for i in range(2)]
+        self.assertEqual(len([message for message in errors if "bar2" in str(message)]), 1)
+        self.assertEqual(len([message for message in errors if "bar5" in str(message)]), 1)
+        self.assertEqual(actor.output.data.tag, "foo")
+        actor.stop()
@@ -2,6 +2,8 @@ import unittest
 
 from compysition.actors import *
 from compysition.event import *
+from compysition.event import UnparsedData
+from compysition.actors.util import CompiledRegistry
 from compysition.errors import MalformedEventData
 
 from compysition.testutils.test_actor import TestActorWrapper
@@ -72,3 +74,27 @@ class TestXSLT(unittest.TestCase):
         output = actor.error
         self.assertEqual(output.error.__class__, case['output'])
 
+
+    def test_threadpool_xslt(self):
+        case = simple_xslt_case
+        actor = TestActorWrapper(XSLT("xslt", xslt=case['xslt'], threadpool_size=2))
+        actor.input = XMLEvent(data=UnparsedData(case['input']))
+        self.assertEqual(actor.output.data_string(), case['output'])
+
+    def test_threadpool_xslt_raised_error(self):
+        case = xslt_raised_error_case
+        actor = TestActorWrapper(XSLT("xslt", xslt=case['xslt'], threadpool_size=2))
+        actor.input = XMLEvent(data=case['input'])
+        self.assertEqual(actor.error.error.__class__, case['output'])
+
+    def test_template_shared_between_actors(self):
+        case = simple_xslt_case
+        self.assertIs(XSLT("xslt_one", xslt=case['xslt']).template, XSLT("xslt_two", xslt=case['xslt']).template)
+
+    def test_registry_eviction(self):
+        registry = CompiledRegistry(maxsize=1)
+        template = registry.xslt(simple_xslt_case['xslt'])
+        self.assertIs(registry.xslt(simple_xslt_case['xslt']), template)
+        registry.xslt(xslt_raised_error_case['xslt'])
+        self.assertEqual(len(registry), 1)
+        self.assertIsNot(registry.xslt(simple_xslt_case['xslt']), template)
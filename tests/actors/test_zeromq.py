@@ -1,5 +1,6 @@
 import random
 import unittest
+from datetime import datetime
 from uuid import uuid4 as uuid
 
 from compysition.actors import *
@@ -33,6 +34,12 @@ class TestPushPullIPC(unittest.TestCase):
         self.assertEqual(_output.event_id, _input.event_id)
         self.assertEqual(_output.meta_id, _input.meta_id)
 
+    def test_push_event_with_non_json_property(self):
+        _input = XMLEvent(data="<foo/>")
+        _input.received = datetime(2015, 1, 1)
+        self.push.input = _input
+        self.assertEqual(self.pull.output.received, _input.received)
+
 
 class TestZMQPushPullTCP(TestPushPullIPC):
 
@@ -0,0 +1,164 @@
+import unittest
+from gevent import sleep, spawn
+from gevent.monkey import get_original
+
+from compysition.actor import Actor
+from compysition.event import *
+from compysition.event import UnparsedData
+from compysition.errors import InvalidEventDataModification, QueueFull
+
+from compysition.testutils.test_actor import TestActorWrapper
+
+
+class BatchingActor(Actor):
+
+    def consume(self, event, *args, **kwargs):
+        self.send_event(event)
+
+    def consume_batch(self, events, *args, **kwargs):
+        for event in events:
+            event.batch_length = len(events)
+            self.send_event(event)
+
+
+class TestActorBatchConsume(unittest.TestCase):
+
+    def test_batch_waits_for_linger(self):
+        actor = TestActorWrapper(BatchingActor("batching", batch_size=3, batch_linger_ms=500))
+        for i in range(3):
+            actor.input = Event(data=str(i))
+
+        outputs = [actor.output for i in range(3)]
+        self.assertEqual([output.batch_length for output in outputs], [3, 3, 3])
+        self.assertEqual(sorted(output.data for output in outputs), ['0', '1', '2'])
+
+    def test_batch_size_of_one_uses_consume(self):
+        actor = TestActorWrapper(BatchingActor("batching"))
+        actor.input = Event(data='foo')
+        self.assertFalse(hasattr(actor.output, 'batch_length'))
+
+
+class XMLBatchingActor(BatchingActor):
+
+    input = XMLEvent
+    output = XMLEvent
+
+
+class QueueFullBatchingActor(BatchingActor):
+
+    def __init__(self, *args, **kwargs):
+        super(QueueFullBatchingActor, self).__init__(*args, **kwargs)
+        self.attempts = 0
+
+    def consume_batch(self, events, *args, **kwargs):
+        self.attempts += 1
+        if self.attempts == 1:
+            raise QueueFull("Queue outbox is full")
+        super(QueueFullBatchingActor, self).consume_batch(events, *args, **kwargs)
+
+
+class TestActorBatchConsumeErrors(unittest.TestCase):
+
+    def test_failed_conversion_only_drops_event(self):
+        actor = TestActorWrapper(XMLBatchingActor("batching", batch_size=3, batch_linger_ms=500))
+        actor.input = XMLEvent(data='<foo/>')
+        actor.input_queues.values()[0].put(JSONEvent(data={'not a tag': 'bar'}))     # Bypasses the output check of the input setter
+        actor.input = XMLEvent(data='<bar/>')
+
+        self.assertEqual(sorted(actor.output.data.tag for i in range(2)), ['bar', 'foo'])
+        self.assertIsInstance(actor.error.error, InvalidEventDataModification)
+
+    def test_queue_full_requeues_batch(self):
+        actor = TestActorWrapper(QueueFullBatchingActor("batching", batch_size=2, batch_linger_ms=500))
+        actor.input = Event(data='0')
+        actor.input = Event(data='1')
+
+        self.assertEqual(sorted(actor.output.data for i in range(2)), ['0', '1'])
+        self.assertEqual(actor.actor.attempts, 2)
+
+
+class ConcurrencyTrackingActor(Actor):
+
+    def __init__(self, *args, **kwargs):
+        super(ConcurrencyTrackingActor, self).__init__(*args, **kwargs)
+        self.running = 0
+        self.max_running = 0
+
+    def consume(self, event, *args, **kwargs):
+        self.running += 1
+        self.max_running = max(self.running, self.max_running)
+        sleep(0.05)
+        self.running -= 1
+        self.send_event(event)
+
+
+class TestActorMaxConcurrency(unittest.TestCase):
+
+    def test_concurrent_consumes_are_bounded(self):
+        actor = TestActorWrapper(ConcurrencyTrackingActor("concurrency", max_concurrency=2))
+        for i in range(6):
+            actor.input = Event(data=str(i))
+
+        [actor.output for i in range(6)]
+        self.assertEqual(actor.actor.max_running, 2)
+
+    def test_unbounded_by_default(self):
+        actor = TestActorWrapper(ConcurrencyTrackingActor("concurrency"))
+        for i in range(6):
+            actor.input = Event(data=str(i))
+
+        [actor.output for i in range(6)]
+        self.assertEqual(actor.actor.max_running, 6)
+
+
+get_ident = get_original('thread', 'get_ident')
+
+
+class BlockingWorkActor(Actor):
+
+    def consume(self, event, *args, **kwargs):
+        event.thread = self.offload(self.work)
+        self.send_event(event)
+
+    def work(self):
+        get_original('time', 'sleep')(0.2)
+        return get_ident()
+
+
+class TestActorOffload(unittest.TestCase):
+
+    def test_offload_runs_in_threadpool(self):
+        actor = TestActorWrapper(BlockingWorkActor("offload", threadpool_size=1))
+        ticks = []
+        ticker = spawn(lambda: [ticks.append(sleep(0.01)) for i in range(10)])
+        actor.input = Event(data='foo')
+        output = actor.output
+        self.assertNotEqual(output.thread, get_ident())
+        self.assertTrue(ticker.ready())     # The hub kept running other greenlets during the work
+
+    def test_offload_without_threadpool(self):
+        actor = TestActorWrapper(BlockingWorkActor("offload"))
+        actor.input = Event(data='foo')
+        self.assertEqual(actor.output.thread, get_ident())
+
+
+class ForwardingActor(Actor):
+
+    input = XMLEvent
+    output = XMLEvent
+
+    def consume(self, event, *args, **kwargs):
+        self.send_event(event)
+
+
+class TestActorSendEvent(unittest.TestCase):
+
+    def test_deepcopy_keeps_data_unparsed(self):
+        actor = ForwardingActor("forwarding")
+        outboxes = [actor.pool.outbound.add("outbox_{0}".format(i)) for i in range(2)]
+        actor.send_event(XMLEvent(data=UnparsedData('<foo><bar>baz</bar></foo>')))
+
+        for outbox in outboxes:
+            event = outbox.get()
+            self.assertIsInstance(event._data, UnparsedData)
+            self.assertEqual(event.data.find('bar').text, 'baz')
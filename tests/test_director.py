@@ -0,0 +1,90 @@
+import unittest
+import os
+from gevent import sleep
+from gevent.queue import Queue as GQueue
+
+from compysition.actor import Actor
+from compysition.director import Director
+from compysition.errors import SetupError
+from compysition.event import *
+
+
+class Feeder(Actor):
+
+    def consume(self, event, *args, **kwargs):
+        self.send_event(event)
+
+
+class PidStamper(Actor):
+
+    def consume(self, event, *args, **kwargs):
+        event.pid = os.getpid()
+        self.logger.info("Stamped event", event=event)
+        self.send_event(event)
+
+
+class Collector(Actor):
+
+    def __init__(self, name, results=None, *args, **kwargs):
+        super(Collector, self).__init__(name, *args, **kwargs)
+        self.results = results
+
+    def consume(self, event, *args, **kwargs):
+        self.results.put(event)
+
+
+class FailingStarter(Actor):
+
+    def pre_hook(self):
+        raise RuntimeError("Unable to start")
+
+    def consume(self, event, *args, **kwargs):
+        pass
+
+
+class TestDirectorProcesses(unittest.TestCase):
+
+    def setUp(self):
+        self.results = GQueue()
+        self.director = Director(generate_blockdiag=False)
+        self.feeder = self.director.register_actor(Feeder, "feeder")
+        self.stamper = self.director.register_actor(PidStamper, "stamper")
+        self.collector = self.director.register_actor(Collector, "collector", results=self.results)
+        self.director.connect_queue(self.feeder, self.stamper)
+        self.director.connect_queue(self.stamper, self.collector)
+
+    def tearDown(self):
+        self.director.stop()
+
+    def test_pinned_actor_runs_in_child_process(self):
+        self.director.register_process("worker", self.stamper)
+        self.director.start(block=False)
+
+        for i in range(10):
+            self.feeder.send_event(JSONEvent(data={'value': i}))
+
+        events = [self.results.get(timeout=10) for i in range(10)]
+        self.assertEqual(sorted(event.data['value'] for event in events), range(10))
+        self.assertEqual(len(set(event.pid for event in events)), 1)
+        self.assertNotEqual(events[0].pid, os.getpid())
+
+    def test_failed_child_process_stops_director(self):
+        failing = self.director.register_actor(FailingStarter, "failing")
+        self.director.connect_queue(self.feeder, failing)
+        self.director.register_process("broken", failing)
+        self.director.start(block=False)
+
+        for i in range(50):
+            if not self.director.is_running():
+                break
+            sleep(0.1)
+
+        self.assertFalse(self.director.is_running())
+
+    def test_unpinned_actors_run_in_main_process(self):
+        self.director.start(block=False)
+        self.feeder.send_event(Event(data='foo'))
+        self.assertEqual(self.results.get(timeout=10).pid, os.getpid())
+
+    def test_pinning_unregistered_actor(self):
+        self.assertRaises(SetupError, self.director.register_process, "worker", "unknown")
@@ -1,6 +1,10 @@
 import unittest
+import json
+import xmltodict
+from lxml import etree
 from compysition.event import *
-from compysition.errors import InvalidEventDataModification
+from compysition.event import BinaryEventCodec, UnparsedData, xml_to_json, json_to_xml, internal_xmlify, remove_internal_xmlify
+from compysition.errors import InvalidEventDataModification, InvalidEventConversion, MalformedEventData
 
 
 class TestEvent(unittest.TestCase):
@@ -42,4 +46,165 @@ class TestJSONHttpEvent(unittest.TestCase):
         self.event = JSONHttpEvent(data={'cat': 'fat'})
 
     def test_json_event_content_type(self):
-        self.assertEqual(self.event.headers.get('Content-Type'), 'application/json')
\ No newline at end of file
+        self.assertEqual(self.event.headers.get('Content-Type'), 'application/json')
+
+class TestEventSharedCopy(unittest.TestCase):
+
+    def setUp(self):
+        self.event = XMLEvent(data='<foo><bar>baz</bar></foo>')
+
+    def test_shared_copy_shares_data_until_accessed(self):
+        copy = self.event.shared_copy()
+        self.assertIs(copy._data, self.event._data)
+        self.assertIsNot(copy.data, self.event.data)
+
+    def test_shared_copy_isolates_modification(self):
+        copy = self.event.shared_copy()
+        copy.data.find('bar').text = 'modified'
+        self.assertEqual(self.event.data.find('bar').text, 'baz')
+
+    def test_last_owner_takes_data_without_copy(self):
+        original_data = self.event._data
+        copy = self.event.shared_copy()
+        del self.event
+        self.assertIs(copy.data, original_data)
+
+    def test_shared_copy_copies_properties(self):
+        self.event.foo = {'bar': 'baz'}
+        copy = self.event.shared_copy()
+        copy.foo['bar'] = 'modified'
+        self.assertEqual(self.event.foo['bar'], 'baz')
+        self.assertEqual(copy.event_id, self.event.event_id)
+
+
+class TestEventState(unittest.TestCase):
+
+    def test_event_id_is_unique(self):
+        self.assertNotEqual(Event().event_id, Event().event_id)
+
+    def test_meta_id_defaults_to_event_id(self):
+        event = Event()
+        self.assertEqual(event.meta_id, event.event_id)
+
+    def test_event_id_is_immutable(self):
+        event = Event()
+        self.assertRaises(InvalidEventDataModification, setattr, event, 'event_id', 'foo')
+
+    def test_additional_properties(self):
+        event = Event(foo='bar')
+        self.assertEqual(event.foo, 'bar')
+        self.assertEqual(event.get_properties()['foo'], 'bar')
+
+    def test_copy_preserves_ids(self):
+        event = XMLHttpEvent(data='<foo/>')
+        copy = event.clone()
+        self.assertEqual(copy.event_id, event.event_id)
+        self.assertEqual(copy.meta_id, event.meta_id)
+        self.assertEqual(copy.created, event.created)
+
+    def test_log_event_data(self):
+        event = LogEvent(10, 'actor', 'message', id='123')
+        self.assertEqual(event.data['message'], 'message')
+        self.assertEqual(event.data['time'], event.time)
+        self.assertEqual(event.meta_id, '123')
+
+
+class TestBinaryEventCodec(unittest.TestCase):
+
+    codec = BinaryEventCodec()
+
+    def assertRoundTrip(self, event):
+        decoded = self.codec.decode(self.codec.encode(event))
+        self.assertIsInstance(decoded, event.__class__)
+        self.assertEqual(decoded.event_id, event.event_id)
+        self.assertEqual(decoded.meta_id, event.meta_id)
+        self.assertEqual(decoded.data, event.data)
+        return decoded
+
+    def test_xml_event(self):
+        event = XMLEvent(data='<foo><bar>baz</bar></foo>')
+        decoded = self.codec.decode(self.codec.encode(event))
+        self.assertEqual(decoded.data_string(), event.data_string())
+
+    def test_json_event(self):
+        self.assertRoundTrip(JSONEvent(data={'foo': ['bar', 'baz']}))
+
+    def test_event_data_types(self):
+        for data in ('foo', u'f\xf6\xf6', {'foo': 1}, None):
+            self.assertEqual(self.assertRoundTrip(Event(data=data)).data, data)
+
+    def test_http_event_properties(self):
+        event = JSONHttpEvent(data={'foo': 'bar'}, status=(201, "Created"), headers={'foo': 'bar'}, accept='application/json')
+        decoded = self.assertRoundTrip(event)
+        self.assertEqual(decoded.status, (201, "Created"))
+        self.assertEqual(decoded.headers, {'foo': 'bar'})
+        self.assertEqual(decoded.accept, 'application/json')
+
+    def test_error(self):
+        event = Event(data='foo')
+        event.error = MalformedEventData('bad data')
+        decoded = self.assertRoundTrip(event)
+        self.assertIsInstance(decoded.error, MalformedEventData)
+        self.assertEqual(decoded.error.message, ['bad data'])
+
+    def test_unknown_event_class(self):
+        header, payload = self.codec.encode(Event(data='foo'))
+        header = header.replace('Event', 'Evilx')
+        self.assertRaises(InvalidEventConversion, self.codec.decode, [header, payload])
+
+
+class TestEventLazyData(unittest.TestCase):
+
+    def test_xml_data_parsed_on_access(self):
+        event = XMLEvent(data=UnparsedData('<foo><bar>baz</bar></foo>'))
+        self.assertIsInstance(event._data, UnparsedData)
+        self.assertEqual(event.data.find('bar').text, 'baz')
+        self.assertNotIsInstance(event._data, UnparsedData)
+
+    def test_data_string_returns_raw_data(self):
+        raw = '{"foo":  "bar"}'
+        event = JSONEvent(data=UnparsedData(raw))
+        self.assertIs(event.data_string(), raw)
+        self.assertIsInstance(event._data, UnparsedData)
+
+    def test_invalid_data_raises_on_access(self):
+        event = JSONEvent(data=UnparsedData('cat'))
+        with self.assertRaises(InvalidEventDataModification):
+            event.data
+
+    def test_codec_decode_keeps_data_unparsed(self):
+        codec = BinaryEventCodec()
+        decoded = codec.decode(codec.encode(XMLEvent(data='<foo/>')))
+        self.assertIsInstance(decoded._data, UnparsedData)
+        self.assertEqual(decoded.data.tag, 'foo')
+
+
+class TestEventConversion(unittest.TestCase):
+
+    def test_xml_to_json_matches_xmltodict(self):
+        for xml in ('<a/>', '<a b="1">x</a>', '<a><b>1</b><b>2</b><c/></a>', '<a> x <b y="1"/> z </a>', '<a xmlns="urn:a"><b/></a>'):
+            element = etree.fromstring(xml)
+            expected = remove_internal_xmlify(xmltodict.parse(etree.tostring(element)))
+            self.assertEqual(json.dumps(xml_to_json(element)), json.dumps(expected))
+
+    def test_json_to_xml_matches_xmltodict(self):
+        for data in ({'a': None}, {'a': {'@b': 1, '#text': 'x'}}, {'a': {'b': [1, 2], 'c': True}}, [1, 2], {'a': {'b': '<c/>'}}):
+            expected = etree.fromstring(xmltodict.unparse(internal_xmlify(data)).encode('utf-8'))
+            self.assertEqual(etree.tostring(json_to_xml(data)), etree.tostring(expected))
+
+    def test_convert_between_formats(self):
+        event = XMLEvent(data='<foo><bar>baz</bar></foo>', meta_id='123')
+        converted = event.convert(JSONHttpEvent)
+        self.assertIsInstance(converted, JSONHttpEvent)
+        self.assertEqual(converted.data, {'foo': {'bar': 'baz'}})
+        self.assertEqual(converted.event_id, event.event_id)
+        self.assertEqual(converted.meta_id, '123')
+
+    def test_convert_keeps_unparsed_data(self):
+        converted = XMLEvent(data=UnparsedData('<foo/>')).convert(XMLHttpEvent)
+        self.assertIsInstance(converted._data, UnparsedData)
+        self.assertEqual(converted.data.tag, 'foo')
+
+    def test_narrowing_conversion(self):
+        for _ in range(2):
+            self.assertRaises(InvalidEventConversion, XMLHttpEvent().convert, XMLEvent)
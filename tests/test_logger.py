@@ -0,0 +1,51 @@
+import unittest
+import logging
+
+from compysition.logger import Logger
+from compysition.queue import _InternalQueuePool
+from compysition.event import LogEvent, BinaryEventCodec, XMLEvent
+
+
+class Unformattable(object):
+
+    def __format__(self, format_spec):
+        raise AssertionError("Message arguments were formatted before the message was read")
+
+
+class TestLogger(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = _InternalQueuePool()
+        self.pool.add("one")
+        self.pool.add("two")
+        self.logger = Logger("logger", self.pool, level="INFO")
+
+    def test_messages_below_level_are_dropped(self):
+        self.logger.debug("dropped")
+        self.assertEqual(self.pool["one"].qsize(), 0)
+        self.assertFalse(self.logger.is_enabled_for(logging.DEBUG))
+        self.assertTrue(self.logger.is_enabled_for(logging.WARN))
+
+    def test_log_event_shared_across_queues(self):
+        self.logger.info("shared", event=XMLEvent(meta_id="123"))
+        log_event = self.pool["one"].get()
+        self.assertIs(self.pool["two"].get(), log_event)
+        self.assertEqual(log_event.id, "123")
+
+    def test_message_formatted_lazily(self):
+        self.logger.info("Got {0}", Unformattable())
+        log_event = self.pool["one"].get()
+        self.assertRaises(AssertionError, getattr, log_event, "message")
+
+        self.logger.info("Got {0} and {1}", "one", 2)
+        self.assertEqual(self.pool["one"].get().message, "Got one and 2")
+
+    def test_message_without_arguments_not_formatted(self):
+        self.logger.info("<data>{0}</data>")
+        self.assertEqual(self.pool["one"].get().message, "<data>{0}</data>")
+
+    def test_log_event_serialized_with_formatted_message(self):
+        log_event = LogEvent(logging.INFO, "logger", "Got {0}", args=("one", ))
+        decoded = BinaryEventCodec().decode(BinaryEventCodec().encode(log_event))
+        self.assertEqual(decoded.message, "Got one")
+        self.assertEqual(decoded.data["message"], "Got one")
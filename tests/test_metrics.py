@@ -0,0 +1,80 @@
+import unittest
+import gevent
+
+from compysition.actor import Actor
+from compysition.event import Event
+from compysition.metrics import Histogram, MetricsRegistry
+from compysition.queue import Queue
+
+from compysition.testutils.test_actor import TestActorWrapper
+
+
+class Forwarder(Actor):
+
+    def consume(self, event, *args, **kwargs):
+        if event.data == "fail":
+            raise Exception("Failed")
+        self.send_event(event)
+
+
+class TestHistogram(unittest.TestCase):
+
+    def test_cumulative_counts(self):
+        histogram = Histogram(buckets=(1, 5))
+        for value in (0.5, 1, 3, 10):
+            histogram.observe(value)
+
+        self.assertEqual(histogram.cumulative_counts(), [(1, 2), (5, 3), (float("inf"), 4)])
+        self.assertEqual(histogram.count, 4)
+        self.assertEqual(histogram.sum, 14.5)
+
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.actor = TestActorWrapper(Forwarder("forwarder"))
+        self.registry = MetricsRegistry()
+        self.registry.register(self.actor.actor)
+
+    def tearDown(self):
+        self.actor.stop()
+
+    def put(self, event):
+        # Unlike TestActorWrapper.input, this does not count as an event sent by the actor
+        self.actor.input_queues["inbox"].put(event)
+
+    def test_queue_counts(self):
+        queue = Queue("test")
+        queue.put(1)
+        queue.put(2)
+        queue.get()
+        self.assertEqual((queue.put_count, queue.get_count, queue.qsize()), (2, 1, 1))
+
+    def test_actor_counts(self):
+        self.put(Event(data="one"))
+        self.put(Event(data="fail"))
+        self.actor.output
+        self.actor.error
+        gevent.sleep(0)
+
+        metrics = self.actor.actor.metrics
+        self.assertEqual(metrics.consumed, 2)
+        self.assertEqual(metrics.sent, 2)
+        self.assertEqual(metrics.errors, 1)
+        self.assertEqual(metrics.in_progress, 0)
+        self.assertEqual(metrics.consume_time.count, 2)
+
+    def test_render(self):
+        self.actor.actor.metrics.register("answer", lambda: 42, description="The answer")
+        self.put(Event(data="one"))
+        self.actor.output
+        gevent.sleep(0)
+
+        lines = self.registry.render().splitlines()
+        self.assertIn("# TYPE compysition_actor_events_consumed_total counter", lines)
+        self.assertIn('compysition_actor_events_consumed_total{actor="forwarder"} 1', lines)
+        self.assertIn('compysition_actor_consume_seconds_bucket{actor="forwarder",le="+Inf"} 1', lines)
+        self.assertIn('compysition_actor_consume_seconds_count{actor="forwarder"} 1', lines)
+        self.assertIn('compysition_queue_puts_total{actor="forwarder",queue="inbox"} 1', lines)
+        self.assertIn('compysition_queue_depth{actor="forwarder",queue="inbox"} 0', lines)
+        self.assertIn('compysition_actor_answer{actor="forwarder"} 42', lines)
@@ -0,0 +1,77 @@
+import unittest
+import os
+import shutil
+import tempfile
+import time
+
+from compysition.actor import Actor
+from compysition.event import Event
+from compysition.profiler import SamplingProfiler, HUB
+
+from compysition.testutils.test_actor import TestActorWrapper
+
+
+def burn(seconds):
+    end = time.time() + seconds
+    while time.time() < end:
+        pass
+
+
+class Burner(Actor):
+
+    def consume(self, event, *args, **kwargs):
+        burn(0.2)
+        self.send_event(event)
+
+
+class TestSamplingProfiler(unittest.TestCase):
+
+    def setUp(self):
+        self.profiler = SamplingProfiler(interval=0.001)
+
+    def tearDown(self):
+        self.profiler.stop()
+
+    def test_consume_attributed_to_actor(self):
+        actor = TestActorWrapper(Burner("burner"))
+        self.profiler.start()
+        actor.input = Event()
+        actor.output
+        self.profiler.stop()
+        actor.stop()
+
+        times = self.profiler.actor_times()
+        self.assertGreater(times.get("burner", 0), times.get(HUB, 0))
+        self.assertTrue(any(function.startswith("burn (test_profiler.py") for function in self.profiler.function_times()))
+
+    def test_collapsed_stacks(self):
+        self.profiler.start()
+        burn(0.1)
+        self.profiler.stop()
+
+        lines = self.profiler.collapsed().splitlines()
+        self.assertGreater(len(lines), 0)
+        for line in lines:
+            stack, count = line.rsplit(" ", 1)
+            self.assertTrue(stack.startswith(HUB + ";"))
+            self.assertGreater(int(count), 0)
+
+    def test_stopped_profiler_takes_no_samples(self):
+        self.profiler.start()
+        self.profiler.stop()
+        self.profiler.samples.clear()
+        burn(0.05)
+        self.assertEqual(len(self.profiler.samples), 0)
+
+    def test_write(self):
+        directory = tempfile.mkdtemp()
+        try:
+            self.profiler.start()
+            burn(0.05)
+            self.profiler.stop()
+            path = os.path.join(directory, "profile", "test.collapsed")
+            self.profiler.write(path)
+            with open(path) as profile:
+                self.assertEqual(profile.read(), self.profiler.collapsed())
+        finally:
+            shutil.rmtree(directory)
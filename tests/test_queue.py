@@ -0,0 +1,55 @@
+import unittest
+import gevent
+
+from compysition.queue import Queue
+from compysition.errors import QueueEmpty, QueueFull
+
+
+class TestQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.queue = Queue("test", maxsize=2)
+
+    def test_fifo_order(self):
+        self.queue.put('one')
+        self.queue.put('two')
+        self.assertEqual(self.queue.get(), 'one')
+        self.assertEqual(self.queue.get(), 'two')
+
+    def test_get_empty_raises(self):
+        self.assertRaises(QueueEmpty, self.queue.get)
+        self.assertRaises(QueueEmpty, self.queue.get, block=True, timeout=0.01)
+
+    def test_put_full_raises(self):
+        self.queue.put('one')
+        self.queue.put('two')
+        self.assertRaises(QueueFull, self.queue.put, 'three', block=False)
+        self.assertRaises(QueueFull, self.queue.put, 'three', timeout=0.01)
+
+    def test_content_cleared_after_get(self):
+        self.queue.put('one')
+        self.queue.get()
+        with gevent.Timeout(0.05, False):
+            self.queue.wait_until_content()
+            self.fail("wait_until_content returned for an empty queue")
+
+    def test_wait_until_empty(self):
+        self.queue.put('one')
+        gevent.spawn_later(0.01, self.queue.get)
+        with gevent.Timeout(1):
+            self.queue.wait_until_empty()
+        self.assertEqual(self.queue.qsize(), 0)
+
+    def test_blocking_get_wakes_on_put(self):
+        gevent.spawn_later(0.01, self.queue.put, 'one')
+        self.assertEqual(self.queue.get(block=True, timeout=1), 'one')
+
+    def test_blocking_put_wakes_on_get(self):
+        self.queue.put('one')
+        self.queue.put('two')
+        gevent.spawn_later(0.01, self.queue.get)
+        self.queue.put('three', timeout=1)
+        self.assertEqual(self.queue.qsize(), 2)
+
+    def test_empty_queue_is_truthy(self):
+        self.assertTrue(self.queue)
@@ -0,0 +1,89 @@
+import unittest
+
+from compysition.actor import Actor
+from compysition.event import Event, JSONEvent
+from compysition.queue import Queue
+from compysition.tracing import Tracer
+
+
+class Forwarder(Actor):
+
+    def consume(self, event, *args, **kwargs):
+        self.send_event(event)
+
+
+class Terminal(Actor):
+
+    def consume(self, event, *args, **kwargs):
+        pass
+
+
+class TestTracing(unittest.TestCase):
+
+    def setUp(self):
+        self.actors = []
+
+    def build(self, tracer, terminals=1):
+        """Connects source -> forwarder -> terminal(s), and returns the source actor and the queue it sends to"""
+        self.actors = [Forwarder("source", tracer=tracer), Forwarder("forwarder", tracer=tracer)]
+        inbox = Queue("inbox")
+        self.actors[1].register_consumer("inbox", inbox)
+        for i in range(terminals):
+            terminal = Terminal("terminal_{0}".format(i), tracer=tracer)
+            queue = Queue("to_terminal_{0}".format(i))
+            self.actors[1].pool.outbound.add(queue.name, queue=queue)
+            terminal.register_consumer("inbox", queue)
+            self.actors.append(terminal)
+
+        for actor in self.actors:
+            actor.start()
+
+        return self.actors[0], inbox
+
+    def tearDown(self):
+        for actor in self.actors:
+            actor.stop()
+
+    def test_spans_per_hop(self):
+        tracer = Tracer(sample_rate=1, batch_size=1)
+        source, inbox = self.build(tracer)
+        source.send_event(Event(meta_id="flow"), queues=[inbox])
+
+        batch = tracer.queue.get(block=True, timeout=5)
+        self.assertIsInstance(batch, JSONEvent)
+        self.assertEqual(len(batch.data), 1)
+        trace = batch.data[0]
+        self.assertEqual(trace["trace_id"], "flow")
+
+        spans = trace["spans"]
+        self.assertEqual([(span[0], span[1]) for span in spans], [("forwarder", "inbox"), ("terminal_0", "to_terminal_0")])
+        for span in spans:
+            self.assertTrue(span[2] <= span[3] <= span[4])
+        self.assertTrue(spans[0][4] <= spans[1][2])
+
+    def test_fan_out_traced_per_copy(self):
+        tracer = Tracer(sample_rate=1, batch_size=2)
+        source, inbox = self.build(tracer, terminals=2)
+        source.send_event(Event(), queues=[inbox])
+
+        traces = tracer.queue.get(block=True, timeout=5).data
+        self.assertEqual(sorted(trace["spans"][-1][0] for trace in traces), ["terminal_0", "terminal_1"])
+        self.assertEqual(traces[0]["spans"][0], traces[1]["spans"][0])
+
+    def test_unsampled_events_not_traced(self):
+        tracer = Tracer(sample_rate=0, batch_size=1)
+        source, inbox = self.build(tracer)
+        event = Event()
+        source.send_event(event, queues=[inbox])
+        self.actors[1].pool.outbound["to_terminal_0"].wait_until_empty()
+
+        tracer.flush()
+        self.assertEqual(tracer.queue.qsize(), 0)
+        self.assertIsNone(event.trace)
+
+    def test_sampling_follows_meta_id(self):
+        tracer = Tracer(sample_rate=0.5)
+        events = [Event(meta_id="flow_{0}".format(i)) for i in range(100)]
+        sampled = [tracer.is_sampled(event) for event in events]
+        self.assertEqual(sampled, [tracer.is_sampled(Event(meta_id=event.meta_id)) for event in events])
+        self.assertTrue(0 < sum(sampled) < 100)
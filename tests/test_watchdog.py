@@ -0,0 +1,69 @@
+import unittest
+from gevent import sleep
+from gevent.monkey import get_original
+
+from compysition.actor import Actor
+from compysition.event import Event
+from compysition.metrics import MetricsRegistry
+from compysition.watchdog import HubWatchdog
+
+from compysition.testutils.test_actor import TestActorWrapper
+
+
+class BlockingActor(Actor):
+
+    def consume(self, event, *args, **kwargs):
+        get_original('time', 'sleep')(0.3)
+        self.send_event(event)
+
+
+class TestHubWatchdog(unittest.TestCase):
+
+    def setUp(self):
+        self.reports = []
+        self.watchdog = HubWatchdog(threshold=0.1, report=lambda *report: self.reports.append(report))
+        self.watchdog.start()
+        sleep(0.05)
+
+    def tearDown(self):
+        self.watchdog.stop()
+
+    def test_block_attributed_to_actor(self):
+        actor = TestActorWrapper(BlockingActor("blocking"))
+        actor.input = Event()
+        actor.output
+        sleep(0.1)
+        actor.stop()
+
+        self.assertEqual(len(self.reports), 1)
+        actor_name, seconds, stack = self.reports[0]
+        self.assertEqual(actor_name, "blocking")
+        self.assertGreaterEqual(seconds, 0.25)
+        self.assertIn("in consume", stack)
+
+    def test_block_outside_of_consume(self):
+        get_original('time', 'sleep')(0.3)
+        sleep(0.1)
+
+        self.assertEqual(len(self.reports), 1)
+        self.assertIsNone(self.reports[0][0])
+        self.assertIn("test_block_outside_of_consume", self.reports[0][2])
+
+    def test_short_blocks_not_reported(self):
+        for i in range(5):
+            get_original('time', 'sleep')(0.01)
+            sleep(0)
+
+        sleep(0.1)
+        self.assertEqual(self.reports, [])
+
+    def test_block_recorded_in_metrics(self):
+        actor = BlockingActor("blocking")
+        registry = MetricsRegistry()
+        registry.register(actor)
+        registry.record_hub_block("blocking", 0.3)
+        registry.record_hub_block(None, 0.2)
+
+        self.assertEqual((actor.metrics.hub_blocks, actor.metrics.hub_blocked_seconds), (1, 0.3))
+        self.assertEqual(registry.hub_blocks.count, 2)
+        self.assertIn("compysition_hub_block_seconds_count 2", registry.render().splitlines())